@@ -0,0 +1,268 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides our Bloom filter artifact and its loader.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+from typing import BinaryIO, List, Optional, Union
+
+from ultimate_hosts_blacklist.deployment_launcher.index import normalize
+
+MAGIC: bytes = b"UHBBLOOM"
+FORMAT_VERSION: int = 1
+
+#: magic, format version, number of hash functions, release version, number
+#: of bits, number of entries, false positive rate.
+HEADER_FORMAT: str = "<8sHH32sQQd"
+HEADER_SIZE: int = struct.calcsize(HEADER_FORMAT)
+
+
+def get_optimal_size(capacity: int, false_positive_rate: float) -> int:
+    """
+    Provides the number of bits needed to store the given number of entries
+    with the given false positive rate.
+
+    :param capacity:
+        The number of entries to store.
+    :param false_positive_rate:
+        The wanted false positive rate.
+    """
+
+    if not 0 < false_positive_rate < 1:
+        raise ValueError("<false_positive_rate> should be between 0 and 1.")
+
+    capacity = max(capacity, 1)
+
+    return max(
+        8, math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+    )
+
+
+def get_optimal_hash_count(size: int, capacity: int) -> int:
+    """
+    Provides the number of hash functions minimizing the false positive rate.
+
+    :param size:
+        The number of bits of the filter.
+    :param capacity:
+        The number of entries to store.
+    """
+
+    return max(1, round(size / max(capacity, 1) * math.log(2)))
+
+
+class BloomFilter:
+    """
+    Provides a Bloom filter. A negative answer means that the subject is
+    definitely not listed, a positive one that it may be listed.
+
+    Use :py:meth:`load` to open a previously dumped filter. The bits are then
+    read from :py:mod:`mmap` - there is no parsing step.
+
+    :param capacity:
+        The number of entries to store.
+    :param false_positive_rate:
+        The wanted false positive rate.
+    """
+
+    version: Optional[str] = None
+    size: int = 0
+    hash_count: int = 0
+    entries_count: int = 0
+    false_positive_rate: float = 0.0
+
+    bits: Optional[Union[bytearray, memoryview]] = None
+
+    _file_stream: Optional[BinaryIO] = None
+    _buffer: Optional[mmap.mmap] = None
+
+    def __init__(self, capacity: int = 0, false_positive_rate: float = 0.001) -> None:
+        self.size = get_optimal_size(capacity, false_positive_rate)
+        self.hash_count = get_optimal_hash_count(self.size, capacity)
+        self.false_positive_rate = false_positive_rate
+        self.entries_count = 0
+
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def __enter__(self) -> "BloomFilter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.entries_count
+
+    def __contains__(self, subject: str) -> bool:
+        return self.might_contain(subject)
+
+    def _get_positions(self, subject: str) -> List[int]:
+        """
+        Provides the positions of the bits of the given subject.
+        """
+
+        digest = hashlib.blake2b(normalize(subject), digest_size=16).digest()
+
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, subject: str) -> None:
+        """
+        Adds the given subject into the filter.
+
+        :param subject:
+            The domain or IP to add.
+        """
+
+        bits = self.bits
+
+        for position in self._get_positions(subject):
+            bits[position >> 3] |= 1 << (position & 7)
+
+        self.entries_count += 1
+
+    def might_contain(self, subject: str) -> bool:
+        """
+        Checks if the given subject may be listed.
+
+        :param subject:
+            The domain or IP to look for.
+        """
+
+        bits = self.bits
+
+        for position in self._get_positions(subject):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def dump(self, destination: str, *, version: str = "") -> int:
+        """
+        Writes the filter into the given file.
+
+        :param destination:
+            The file to write.
+        :param version:
+            The release version to store into the header.
+
+        :return:
+            The number of written bytes.
+        """
+
+        with open(destination, "wb") as file_stream:
+            file_stream.write(
+                struct.pack(
+                    HEADER_FORMAT,
+                    MAGIC,
+                    FORMAT_VERSION,
+                    self.hash_count,
+                    version.encode("utf-8")[:32],
+                    self.size,
+                    self.entries_count,
+                    self.false_positive_rate,
+                )
+            )
+            file_stream.write(self.bits)
+
+            return file_stream.tell()
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        """
+        Opens the filter previously dumped into the given file.
+
+        :param path:
+            The path of the file to open.
+        """
+
+        result = cls.__new__(cls)
+
+        result._file_stream = open(path, "rb")
+
+        if os.fstat(result._file_stream.fileno()).st_size < HEADER_SIZE:
+            result.close()
+            raise ValueError(f"<path> ({path!r}) is not a valid filter.")
+
+        result._buffer = mmap.mmap(
+            result._file_stream.fileno(), 0, access=mmap.ACCESS_READ
+        )
+
+        (
+            magic,
+            format_version,
+            result.hash_count,
+            version,
+            result.size,
+            result.entries_count,
+            result.false_positive_rate,
+        ) = struct.unpack_from(HEADER_FORMAT, result._buffer, 0)
+
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            result.close()
+            raise ValueError(f"<path> ({path!r}) is not a supported filter.")
+
+        if (
+            not result.size
+            or not result.hash_count
+            or len(result._buffer) - HEADER_SIZE < (result.size + 7) // 8
+        ):
+            result.close()
+            raise ValueError(f"<path> ({path!r}) is a truncated filter.")
+
+        result.version = version.rstrip(b"\x00").decode("utf-8", errors="replace")
+        result.bits = memoryview(result._buffer)[HEADER_SIZE:]
+
+        return result
+
+    def close(self) -> None:
+        """
+        Closes the underlying mapping and file - if any.
+        """
+
+        if self._buffer is not None:
+            if self.bits is not None:
+                self.bits.release()
+                self.bits = None
+
+            self._buffer.close()
+            self._buffer = None
+
+        if self._file_stream is not None:
+            self._file_stream.close()
+            self._file_stream = None
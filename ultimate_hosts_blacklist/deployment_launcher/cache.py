@@ -0,0 +1,76 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides the (process-wide) objects we keep warm
+between the input sources and between the releases of a long-running process.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+#: The cached objects along with the time they were built at.
+_OBJECTS: Dict[str, Tuple[float, Any]] = {}
+
+
+def get(name: str, factory: Callable[[], Any], *, ttl: Optional[float] = None) -> Any:
+    """
+    Provides the (process-wide) object behind the given name.
+
+    The object is built with the given factory the first time it is requested,
+    then again once it is older than the given time to live.
+
+    :param name:
+        The name of the object.
+    :param factory:
+        The factory building the object.
+    :param ttl:
+        The number of seconds to keep the object for. :py:data:`None` means
+        forever.
+    """
+
+    if name in _OBJECTS:
+        built_at, value = _OBJECTS[name]
+
+        if ttl is None or time.monotonic() - built_at < ttl:
+            return value
+
+    value = factory()
+    _OBJECTS[name] = (time.monotonic(), value)
+
+    return value
+
+
+def clear() -> None:
+    """
+    Forgets all cached objects.
+    """
+
+    _OBJECTS.clear()
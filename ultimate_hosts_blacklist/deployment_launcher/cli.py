@@ -33,12 +33,26 @@ License:
 """
 
 import argparse
+import json
 import logging
+import sys
 
 import colorama
 
-from ultimate_hosts_blacklist.deployment_launcher import __version__
+from ultimate_hosts_blacklist.deployment_launcher import (
+    __version__,
+    formats,
+    mirror,
+    profiling,
+    provenance,
+    service,
+)
+from ultimate_hosts_blacklist.deployment_launcher.defaults import (
+    infrastructure,
+    outputs,
+)
 from ultimate_hosts_blacklist.deployment_launcher.orchester import Orchestration
+from ultimate_hosts_blacklist.deployment_launcher.query import query
 
 
 def tool() -> None:
@@ -62,6 +76,192 @@ def tool() -> None:
         help="Activates the debug mode.",
     )
 
+    parser.add_argument(
+        "--chunking-mode",
+        choices=outputs.CHUNKING_MODES,
+        default="fixed",
+        help="Sets the way we split our outputs into chunks. "
+        "Use 'content' to choose the split points from the content itself, "
+        "so that a small list change only touches one or two chunks. "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--bloom-false-positive-rate",
+        type=float,
+        default=outputs.BLOOM_FILTER_FALSE_POSITIVE_RATE,
+        help="Sets the false positive rate of the generated Bloom filter. "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--aggregate-ips",
+        action="store_true",
+        default=False,
+        help="Activates the aggregation of adjacent and contained IPs into "
+        "CIDR blocks in the IP and hosts.deny outputs.",
+    )
+
+    parser.add_argument(
+        "--sorting-mode",
+        choices=outputs.SORTING_MODES,
+        default="standard",
+        help="Sets the order of our domains. Use 'hierarchical' to sort them by "
+        "their reversed labels, so that related hosts are next to each other. "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--compact-hosts",
+        type=int,
+        default=0,
+        metavar="ENTRIES_PER_LINE",
+        help="Activates the generation of the compact hosts files, alongside "
+        "the current ones: up to the given number of domains per line after a "
+        "single address. It is capped at "
+        f"{outputs.WINDOWS_HOSTS_MAX_ENTRIES_PER_LINE} for Windows. "
+        "(default: %(default)s - deactivated)",
+    )
+
+    parser.add_argument(
+        "--extra-formats",
+        nargs="+",
+        choices=formats.EXTRA_FORMATS,
+        default=[],
+        metavar="FORMAT",
+        help="Activates the generation of the given resolver-native formats, "
+        "alongside the current ones. "
+        f"Choices: {', '.join(formats.EXTRA_FORMATS)}.",
+    )
+
+    parser.add_argument(
+        "--provenance-index",
+        default=None,
+        metavar="PATH",
+        help="Writes the provenance index - which sources list each of our "
+        "entries - into the given file. Use the provenance command to read it. "
+        "(default: %(default)s - deactivated)",
+    )
+
+    parser.add_argument(
+        "--entry-store",
+        default=None,
+        metavar="DIRECTORY",
+        help="Keeps our unique entries - along with the sources listing them - "
+        "into the given directory. A full run rebuilds it. "
+        "(default: %(default)s - deactivated)",
+    )
+
+    parser.add_argument(
+        "--update-sources",
+        nargs="+",
+        default=[],
+        metavar="SOURCE",
+        help="Only fetches the given sources and applies them to the entry "
+        "store instead of fetching all of them. Requires --entry-store. "
+        "Implies --in-memory.",
+    )
+
+    parser.add_argument(
+        "--workspace",
+        default=None,
+        metavar="DIRECTORY",
+        help="Keeps the intermediate files of the run into the given directory "
+        "along with a checkpoint of each completed stage (fetched, merged, "
+        "sorted, generated, deployed).",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Resumes the previous run of the workspace: the completed stages "
+        "whose inputs are unchanged are skipped. Requires --workspace.",
+    )
+
+    parser.add_argument(
+        "--hot-dir",
+        default=None,
+        metavar="DIRECTORY",
+        help="Downloads the (short-lived) raw files of the sources into the given "
+        "directory - ideally a tmpfs like /dev/shm. "
+        "(default: %(default)s - the workspace)",
+    )
+
+    parser.add_argument(
+        "--workspace-quota",
+        type=int,
+        default=0,
+        metavar="BYTES",
+        help="Aborts the run when its intermediate files use more than the given "
+        "number of bytes. (default: %(default)s - unlimited)",
+    )
+
+    parser.add_argument(
+        "--nodes",
+        nargs="+",
+        default=[],
+        metavar="URL",
+        help="Runs as a coordinator: the sources are fetched and sorted by the "
+        "given worker nodes (see the node command) instead of local processes. "
+        "(e.g. http://10.0.0.2:8766)",
+    )
+
+    parser.add_argument(
+        "--transport",
+        choices=outputs.TRANSPORTS,
+        default="file",
+        help="Sets the way the fetch workers hand the fetched data over. Use "
+        "'shared_memory' to hand them over as shared memory segments instead of "
+        "temporary files - when they fit into memory. Can't be used with "
+        "--workspace. (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--telemetry-report",
+        default=None,
+        metavar="FILE",
+        help="Writes the telemetry of the run - time, CPU, peak memory and disk "
+        "usage, entries and bytes in/out per stage and per source - into the "
+        "given JSON file.",
+    )
+
+    parser.add_argument(
+        "--prometheus-textfile",
+        default=None,
+        metavar="FILE",
+        help="Writes the telemetry of the run into the given file - for the "
+        "textfile collector of the Prometheus node exporter.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        choices=outputs.PROFILE_MODES,
+        default=None,
+        help="Profiles the run - the main process and every worker process - "
+        "with cProfile ('cpu'), tracemalloc ('memory') or both ('all'). The "
+        "profile files of each stage and each process are merged into a "
+        "report.txt listing the top functions by cumulative time and the top "
+        "allocation sites.",
+    )
+
+    parser.add_argument(
+        "--profile-dir",
+        default=None,
+        metavar="DIRECTORY",
+        help="Writes the profile files - and their report - into the given "
+        "directory. (default: a new temporary directory)",
+    )
+
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        default=False,
+        help="Activates the in-memory mode: the fetched data are merged, "
+        "deduplicated and converted from compact in-memory sets instead of "
+        "temporary files and external sorting. Use it when the data fits in RAM.",
+    )
+
     parser.add_argument(
         "-v",
         "--version",
@@ -70,8 +270,201 @@ def tool() -> None:
         version="%(prog)s " + __version__,
     )
 
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+    query_parser = subparsers.add_parser(
+        "query",
+        help="Checks the given subjects against the generated artifacts.",
+        description="Checks the given subjects (domains or IPs) against the "
+        "generated artifacts and reports the chunks containing them.",
+    )
+
+    query_parser.add_argument(
+        "subjects",
+        nargs="*",
+        help="The subjects to check. When none is given, they are read from "
+        "the given file or from stdin.",
+    )
+
+    query_parser.add_argument(
+        "-f",
+        "--file",
+        type=argparse.FileType("r", encoding="utf-8"),
+        help="Reads the subjects to check from the given file.",
+    )
+
+    query_parser.add_argument(
+        "--output-dir",
+        default=outputs.CURRENT_DIRECTORY,
+        help="Sets the directory containing the generated artifacts. "
+        "(default: %(default)s)",
+    )
+
+    query_parser.add_argument(
+        "--sorting-mode",
+        dest="query_sorting_mode",
+        choices=outputs.SORTING_MODES,
+        default=None,
+        help="Sets the order the artifacts were generated with. "
+        "(default: the global --sorting-mode)",
+    )
+
+    provenance_parser = subparsers.add_parser(
+        "provenance",
+        help="Reports the sources listing the given subjects.",
+        description="Reports the sources listing the given subjects (domains or "
+        "IPs) or the entries we lose if we drop the given source.",
+    )
+
+    provenance_parser.add_argument(
+        "subjects",
+        nargs="*",
+        help="The subjects to check. When none is given, they are read from "
+        "the given file or from stdin.",
+    )
+
+    provenance_parser.add_argument(
+        "-f",
+        "--file",
+        type=argparse.FileType("r", encoding="utf-8"),
+        help="Reads the subjects to check from the given file.",
+    )
+
+    provenance_parser.add_argument(
+        "--index",
+        required=True,
+        metavar="PATH",
+        help="Sets the provenance index to read.",
+    )
+
+    provenance_parser.add_argument(
+        "--drop-source",
+        default=None,
+        metavar="SOURCE",
+        help="Reports the entries only listed by the given source instead.",
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Runs as a service making a release each time it is triggered.",
+        description="Runs as a long-running service which keeps its setup warm "
+        "and makes a release - with the global options - each time it is "
+        "triggered through POST /release. The state of the service is "
+        "available through GET /status.",
+    )
+
+    serve_parser.add_argument(
+        "--host",
+        default=infrastructure.SERVICE_HOST,
+        help="Sets the host to listen on. (default: %(default)s)",
+    )
+
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=infrastructure.SERVICE_PORT,
+        help="Sets the port to listen on. (default: %(default)s)",
+    )
+
+    serve_parser.add_argument(
+        "--unix-socket",
+        default=None,
+        metavar="PATH",
+        help="Listens on the given Unix socket instead of the host and port.",
+    )
+
+    node_parser = subparsers.add_parser(
+        "node",
+        help="Runs as a worker node of a coordinator.",
+        description="Runs as a worker node which fetches and sorts the sources "
+        "a coordinator (started with --nodes) shares with it through "
+        "POST /fetch. The state of the node is available through GET /status.",
+    )
+
+    node_parser.add_argument(
+        "--host",
+        default=infrastructure.NODE_HOST,
+        help="Sets the host to listen on. (default: %(default)s)",
+    )
+
+    node_parser.add_argument(
+        "--port",
+        type=int,
+        default=infrastructure.NODE_PORT,
+        help="Sets the port to listen on. (default: %(default)s)",
+    )
+
+    node_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Sets the number of sources to process at once. "
+        "(default: the number of CPUs)",
+    )
+
+    sync_parser = subparsers.add_parser(
+        "sync",
+        help="Synchronizes a mirror with our latest release.",
+        description="Synchronizes a mirror directory with the latest release "
+        "published under the given URL. Only the files which differ from the "
+        "local manifest are downloaded.",
+    )
+
+    sync_parser.add_argument(
+        "url",
+        help="The URL our releases are published under. "
+        "(e.g. https://raw.githubusercontent.com/ORG/REPO/BRANCH)",
+    )
+
+    sync_parser.add_argument("directory", help="The mirror directory to synchronize.")
+
+    sync_parser.add_argument(
+        "--manifest-diff",
+        type=argparse.FileType("r", encoding="utf-8"),
+        default=None,
+        metavar="FILE",
+        help="Reads the manifest difference sent with the deployment request "
+        "instead of downloading the whole manifest.",
+    )
+
+    sync_parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Sets the number of files to download at once. (default: %(default)s)",
+    )
+
     args = parser.parse_args()
 
+    if not 0 < args.bloom_false_positive_rate < 1:
+        parser.error("--bloom-false-positive-rate must be between 0 and 1.")
+
+    if args.compact_hosts < 0:
+        parser.error("--compact-hosts must be a positive number (or 0).")
+
+    if args.update_sources and not args.entry_store:
+        parser.error("--update-sources requires --entry-store.")
+
+    if args.resume and not args.workspace:
+        parser.error("--resume requires --workspace.")
+
+    if args.transport == "shared_memory" and args.workspace:
+        parser.error("--transport shared_memory can't be used with --workspace.")
+
+    if args.transport == "shared_memory" and args.nodes:
+        parser.error("--transport shared_memory can't be used with --nodes.")
+
+    if args.profile_dir and not args.profile:
+        parser.error("--profile-dir requires --profile.")
+
+    if args.command == "node" or (args.command == "serve" and not args.unix_socket):
+        try:
+            service.check_host(args.host)
+        except ValueError:
+            parser.error(
+                "--host beyond the loopback interface requires UHB_SERVICE_SECRET."
+            )
+
     if args.debug:
         logging_level = logging.DEBUG
     else:
@@ -83,4 +476,87 @@ def tool() -> None:
 
     logging.info("Launcher version: %s", __version__)
 
-    Orchestration(debug=args.debug).start()
+    if args.command == "query":
+        if args.subjects:
+            subjects = args.subjects
+        elif args.file:
+            subjects = args.file
+        else:
+            subjects = sys.stdin
+
+        query(
+            subjects,
+            output_dir=args.output_dir,
+            sorting_mode=args.query_sorting_mode or args.sorting_mode,
+        )
+        return
+
+    if args.profile:
+        profiler = profiling.Profiler(args.profile_dir, mode=args.profile)
+    else:
+        profiler = None
+
+    if args.command == "node":
+        service.serve_node(
+            host=args.host,
+            port=args.port,
+            max_workers=args.workers,
+            profiler=profiler,
+        )
+        return
+
+    if args.command == "sync":
+        mirror.sync(
+            args.url,
+            args.directory,
+            manifest_diff=json.load(args.manifest_diff) if args.manifest_diff else None,
+            max_workers=args.workers,
+        )
+        return
+
+    if args.command == "provenance":
+        if args.subjects:
+            subjects = args.subjects
+        elif args.file:
+            subjects = args.file
+        elif args.drop_source:
+            subjects = []
+        else:
+            subjects = sys.stdin
+
+        provenance.lookup(subjects, path=args.index, drop_source=args.drop_source)
+        return
+
+    orchestration_kwargs = dict(
+        debug=args.debug,
+        chunking_mode=args.chunking_mode,
+        bloom_false_positive_rate=args.bloom_false_positive_rate,
+        aggregate_ips=args.aggregate_ips,
+        in_memory=args.in_memory,
+        sorting_mode=args.sorting_mode,
+        compact_hosts=args.compact_hosts,
+        extra_formats=args.extra_formats,
+        provenance_index=args.provenance_index,
+        entry_store=args.entry_store,
+        workspace_dir=args.workspace,
+        hot_dir=args.hot_dir,
+        workspace_quota=args.workspace_quota,
+        transport=args.transport,
+        nodes=args.nodes,
+        telemetry_report=args.telemetry_report,
+        prometheus_textfile=args.prometheus_textfile,
+        profiler=profiler,
+    )
+
+    if args.command == "serve":
+        service.serve(
+            host=args.host,
+            port=args.port,
+            unix_socket=args.unix_socket,
+            **orchestration_kwargs,
+        )
+        return
+
+    Orchestration(
+        **orchestration_kwargs, update_sources=args.update_sources, resume=args.resume
+    ).start()
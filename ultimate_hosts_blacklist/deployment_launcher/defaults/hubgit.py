@@ -33,6 +33,8 @@ License:
 """
 
 import os
+import re
+from typing import Pattern
 
 USERNAME: str = "ultimate-hosts-blacklist-bot"
 
@@ -43,6 +45,10 @@ else:
 
 ORG_SLUG_NAME: str = "Ultimate-Hosts-Blacklist"
 
+#: What the name of one of our repositories (sources) looks like. It ends up
+#: in paths and URLs, hence no separator and no :code:`..`.
+REPOSITORY_NAME_PATTERN: Pattern[str] = re.compile(r"(?!\.$)(?!.*\.\.)[A-Za-z0-9._-]+")
+
 RAW_URL_BASE: str = "https://raw.githubusercontent.com"
 PARTIAL_RAW_URL: str = f"{RAW_URL_BASE}/{ORG_SLUG_NAME}/%s/master/"
 
@@ -33,41 +33,116 @@ License:
 """
 
 import os
-from datetime import datetime
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Tuple
 
 from PyFunceble.helpers.download import DownloadHelper
 
 from .hubgit import IGNORE_REPO_RAW_URL
 
-CURRENT_DATETIME: datetime = datetime.utcnow()
 
-REPOSITORIES_TO_IGNORE: List[str] = [
-    x.strip()
-    for x in DownloadHelper(IGNORE_REPO_RAW_URL).download_text().splitlines()
-    if x and not x.strip().startswith("#")
-]
+def get_repositories_to_ignore() -> List[str]:
+    """
+    Downloads and provides the repositories we have to ignore.
+    """
 
-for index, line in enumerate(REPOSITORIES_TO_IGNORE):
-    if "#" in line:
-        line = line[: line.find("#")].strip()
+    result = [
+        x.strip()
+        for x in DownloadHelper(IGNORE_REPO_RAW_URL).download_text().splitlines()
+        if x and not x.strip().startswith("#")
+    ]
 
-        REPOSITORIES_TO_IGNORE[index] = line
+    for index, line in enumerate(result):
+        if "#" in line:
+            line = line[: line.find("#")].strip()
 
+            result[index] = line
 
-if "GITHUB_RUN_NUMBER" in os.environ:
-    VERSION: str = (
-        f"V2.{os.environ['GITHUB_RUN_NUMBER']}."
-        f"{CURRENT_DATETIME.strftime('%Y')}."
-        f"{CURRENT_DATETIME.strftime('%m')}."
-        f"{CURRENT_DATETIME.strftime('%d')}"
-    )
-else:
-    VERSION = (
+    return result
+
+
+def get_version(current_datetime: datetime) -> str:
+    """
+    Provides the version of a release made at the given time.
+
+    :param current_datetime:
+        The time of the release.
+    """
+
+    if "GITHUB_RUN_NUMBER" in os.environ:
+        return (
+            f"V2.{os.environ['GITHUB_RUN_NUMBER']}."
+            f"{current_datetime.strftime('%Y')}."
+            f"{current_datetime.strftime('%m')}."
+            f"{current_datetime.strftime('%d')}"
+        )
+
+    return (
         f"V2."
-        f"{CURRENT_DATETIME.strftime('%Y')}."
-        f"{CURRENT_DATETIME.strftime('%m')}."
-        f"{CURRENT_DATETIME.strftime('%d')}"
+        f"{current_datetime.strftime('%Y')}."
+        f"{current_datetime.strftime('%m')}."
+        f"{current_datetime.strftime('%d')}"
     )
 
+
+def refresh(*, repositories_to_ignore: bool = False) -> None:
+    """
+    Refreshes the time and the version of the current release - and
+    optionally the repositories to ignore. A long-running process has to call
+    it before each release.
+
+    :param repositories_to_ignore:
+        Downloads the repositories to ignore again.
+    """
+
+    global CURRENT_DATETIME, VERSION, REPOSITORIES_TO_IGNORE
+
+    CURRENT_DATETIME = datetime.now(timezone.utc)
+    VERSION = get_version(CURRENT_DATETIME)
+
+    if repositories_to_ignore:
+        REPOSITORIES_TO_IGNORE = get_repositories_to_ignore()
+
+
+CURRENT_DATETIME: datetime = datetime.now(timezone.utc)
+REPOSITORIES_TO_IGNORE: List[str] = get_repositories_to_ignore()
+VERSION: str = get_version(CURRENT_DATETIME)
+
+#: The number of seconds we keep our warm objects (e.g. the parsed whitelist)
+#: for, in a long-running process.
+WARM_CACHE_TTL: int = 3600
+
+#: The address the service listens on by default.
+SERVICE_HOST: str = "127.0.0.1"
+SERVICE_PORT: int = 8765
+
+#: The address a worker node listens on by default.
+NODE_HOST: str = "127.0.0.1"
+NODE_PORT: int = 8766
+
+#: The connect and read timeouts (in seconds) of the requests sent to our
+#: worker nodes. Fetching and sorting a large source can take a few minutes.
+NODE_REQUEST_TIMEOUT: Tuple[float, float] = (10.0, 900.0)
+
+if "UHB_SERVICE_SECRET" in os.environ:
+    SERVICE_SECRET: str = os.environ["UHB_SERVICE_SECRET"]
+else:
+    SERVICE_SECRET: str = None
+
 DOMAIN_DEPLOYMENT_LINK: str = "https://hosts.ubuntu101.co.za/update_hosts.php"
+
+#: The number of seconds we wait - at most - for a pushed release to be
+#: visible through the raw GitHub URLs.
+DEPLOYMENT_READINESS_TIMEOUT: float = 300.0
+
+#: The first and the maximal delay (in seconds) between two readiness checks.
+DEPLOYMENT_READINESS_INITIAL_DELAY: float = 1.0
+DEPLOYMENT_READINESS_MAX_DELAY: float = 30.0
+
+#: The connect and read timeouts (in seconds) of our deployment requests.
+DEPLOYMENT_REQUEST_TIMEOUT: Tuple[float, float] = (10.0, 120.0)
+
+#: The number of times we try to trigger the deployment of our mirror.
+DEPLOYMENT_TRIGGER_ATTEMPTS: int = 3
+
+DEPLOYMENT_USER_AGENT: str = "Ultimate-Hosts-Blacklist/central-repo-updaters"
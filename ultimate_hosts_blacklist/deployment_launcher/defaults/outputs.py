@@ -34,17 +34,41 @@ License:
 
 import importlib.resources
 import os
+from typing import List
 
 CURRENT_DIRECTORY: str = os.getcwd()
 
 MAX_FILE_SIZE_IN_BYTES: int = 5_242_880
 
+CHUNKING_MODES: List[str] = ["fixed", "content"]
+MIN_CHUNK_SIZE_IN_BYTES: int = 1_048_576
+CHUNK_BOUNDARY_MASK: int = (1 << 16) - 1
+
+#: The orders we can sort our domains with. :code:`hierarchical` sorts them by
+#: their reversed labels (:code:`com.example.sub`) so that related hosts are
+#: next to each other.
+SORTING_MODES: List[str] = ["standard", "hierarchical"]
+
+#: The order of our IPs. See :py:func:`sorter.get_ip_sorting_key`.
+IP_ORDER: str = "numeric"
+
+#: The ways our fetch workers hand their results over. :code:`shared_memory`
+#: hands them over as shared memory segments instead of temporary files.
+TRANSPORTS: List[str] = ["file", "shared_memory"]
+
+#: What our profiling mode profiles. See :py:class:`profiling.Profiler`.
+PROFILE_MODES: List[str] = ["cpu", "memory", "all"]
+
 TEMPLATE_DIRNAME: str = "templates"
 
 HOSTS_DENY_TEMPLATE_FILENAME: str = "hostsdeny.template"
 SUPER_HOSTS_DENY_TEMPLATE_FILENAME: str = "superhostsdeny.template"
 UNIX_HOSTS_TEMPLATE_FILENAME: str = "hosts.template"
 WINDOWS_HOSTS_TEMPLATE_FILENAME: str = "hosts.windows.template"
+DNSMASQ_TEMPLATE_FILENAME: str = "dnsmasq.template"
+UNBOUND_TEMPLATE_FILENAME: str = "unbound.template"
+RPZ_TEMPLATE_FILENAME: str = "rpz.template"
+ADGUARD_TEMPLATE_FILENAME: str = "adguard.template"
 README_TEMPLATE_FILENAME: str = "README_template.md"
 
 
@@ -88,4 +112,52 @@ WINDOWS_HOSTS_DIRNAME: str = "hosts.windows"
 INCOMPLETE_WINDOWS_HOSTS_FILENAME: str = "hosts{0}.windows"
 WINDOWS_HOSTS_DIR: str = os.path.join(CURRENT_DIRECTORY, WINDOWS_HOSTS_DIRNAME)
 
+COMPACT_UNIX_HOSTS_DIRNAME: str = "hosts.compact"
+INCOMPLETE_COMPACT_UNIX_HOSTS_FILENAME: str = "hosts{0}.compact"
+COMPACT_UNIX_HOSTS_DIR: str = os.path.join(
+    CURRENT_DIRECTORY, COMPACT_UNIX_HOSTS_DIRNAME
+)
+
+COMPACT_WINDOWS_HOSTS_DIRNAME: str = "hosts.windows.compact"
+INCOMPLETE_COMPACT_WINDOWS_HOSTS_FILENAME: str = "hosts{0}.windows.compact"
+COMPACT_WINDOWS_HOSTS_DIR: str = os.path.join(
+    CURRENT_DIRECTORY, COMPACT_WINDOWS_HOSTS_DIRNAME
+)
+
+#: The Windows resolver ignores the domains after the 9th of a line.
+WINDOWS_HOSTS_MAX_ENTRIES_PER_LINE: int = 9
+
+DNSMASQ_DIRNAME: str = "dnsmasq"
+INCOMPLETE_DNSMASQ_FILENAME: str = "dnsmasq{0}.conf"
+DNSMASQ_DIR: str = os.path.join(CURRENT_DIRECTORY, DNSMASQ_DIRNAME)
+
+UNBOUND_DIRNAME: str = "unbound"
+INCOMPLETE_UNBOUND_FILENAME: str = "unbound{0}.conf"
+UNBOUND_DIR: str = os.path.join(CURRENT_DIRECTORY, UNBOUND_DIRNAME)
+
+RPZ_DIRNAME: str = "rpz"
+INCOMPLETE_RPZ_FILENAME: str = "rpz{0}.zone"
+RPZ_DIR: str = os.path.join(CURRENT_DIRECTORY, RPZ_DIRNAME)
+
+ADGUARD_DIRNAME: str = "adguard"
+INCOMPLETE_ADGUARD_FILENAME: str = "adguard{0}.txt"
+ADGUARD_DIR: str = os.path.join(CURRENT_DIRECTORY, ADGUARD_DIRNAME)
+
 README_FILENAME: str = "README.md"
+MANIFEST_FILENAME: str = "manifest.json"
+
+BINARY_INDEX_DIRNAME: str = "index"
+BINARY_INDEX_FILENAME: str = "blocklist.idx"
+BINARY_INDEX_DIR: str = os.path.join(CURRENT_DIRECTORY, BINARY_INDEX_DIRNAME)
+
+DELTAS_DIRNAME: str = "deltas"
+DELTAS_DIR: str = os.path.join(CURRENT_DIRECTORY, DELTAS_DIRNAME)
+DELTAS_INDEX_FILENAME: str = "index.json"
+DOMAINS_PATCH_FILENAME: str = "domains.patch"
+IPS_PATCH_FILENAME: str = "ips.patch"
+MAX_DELTAS_TO_KEEP: int = 30
+
+BLOOM_FILTER_DIRNAME: str = "bloom"
+BLOOM_FILTER_FILENAME: str = "domains.bloom"
+BLOOM_FILTER_DIR: str = os.path.join(CURRENT_DIRECTORY, BLOOM_FILTER_DIRNAME)
+BLOOM_FILTER_FALSE_POSITIVE_RATE: float = 0.001
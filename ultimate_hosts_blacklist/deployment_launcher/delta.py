@@ -0,0 +1,372 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides the computation and publication of our delta
+releases.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import itertools
+import json
+import logging
+import os
+import shutil
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from PyFunceble.helpers.directory import DirectoryHelper
+from PyFunceble.helpers.file import FileHelper
+
+from ultimate_hosts_blacklist.deployment_launcher import generator
+from ultimate_hosts_blacklist.deployment_launcher.defaults import (
+    infrastructure,
+    outputs,
+)
+
+ADDED_MARKER: str = "+"
+REMOVED_MARKER: str = "-"
+
+
+def read_lines(
+    input_files: Iterable[Union[str, Iterable[str]]],
+) -> Generator[str, None, None]:
+    """
+    Provides each non-empty line of the given files, in order.
+
+    :param input_files:
+        The files (or in-memory subjects) to read.
+        See :py:func:`~ultimate_hosts_blacklist.deployment_launcher.generator.read_input`.
+    """
+
+    for input_file in input_files:
+        for line in generator.read_input(input_file):
+            line = line.strip()
+
+            if line:
+                yield line
+
+
+def merge_diff(
+    previous: Iterable[str],
+    current: Iterable[str],
+    *,
+    key: Optional[Callable[[str], Any]] = None,
+) -> Generator[Tuple[str, str], None, None]:
+    """
+    Compares two sorted and unique streams in a single linear pass and yields
+    each difference as a :code:`(marker, entry)` tuple.
+
+    :param previous:
+        The sorted entries of the previous release.
+    :param current:
+        The sorted entries of the current release.
+    :param key:
+        The sorting key both streams were sorted with.
+
+        Entries sharing the same key are compared as a group because the
+        sorting key is not required to be unique.
+    """
+
+    if key is None:
+
+        def key(element: str) -> str:
+            return element
+
+    previous_groups = itertools.groupby(previous, key=key)
+    current_groups = itertools.groupby(current, key=key)
+
+    previous_key, previous_group = next(previous_groups, (None, None))
+    current_key, current_group = next(current_groups, (None, None))
+
+    while previous_group is not None or current_group is not None:
+        if current_group is None or (
+            previous_group is not None and previous_key < current_key
+        ):
+            for entry in previous_group:
+                yield REMOVED_MARKER, entry
+
+            previous_key, previous_group = next(previous_groups, (None, None))
+        elif previous_group is None or current_key < previous_key:
+            for entry in current_group:
+                yield ADDED_MARKER, entry
+
+            current_key, current_group = next(current_groups, (None, None))
+        else:
+            previous_entries = set(previous_group)
+            current_entries = set(current_group)
+
+            for entry in sorted(previous_entries - current_entries):
+                yield REMOVED_MARKER, entry
+
+            for entry in sorted(current_entries - previous_entries):
+                yield ADDED_MARKER, entry
+
+            previous_key, previous_group = next(previous_groups, (None, None))
+            current_key, current_group = next(current_groups, (None, None))
+
+
+def write_patch(
+    destination: str, differences: Iterable[Tuple[str, str]]
+) -> Tuple[int, int]:
+    """
+    Writes the given differences into the given patch file and provides the
+    number of added and removed entries.
+
+    :param destination:
+        The patch file to write.
+    :param differences:
+        The differences to write. As yielded by :py:func:`merge_diff`.
+    """
+
+    added = 0
+    removed = 0
+
+    with open(destination, "w", encoding="utf-8") as file_stream:
+        for marker, entry in differences:
+            if marker == ADDED_MARKER:
+                added += 1
+            else:
+                removed += 1
+
+            file_stream.write(f"{marker}{entry}\n")
+
+    return added, removed
+
+
+def load_index() -> Dict[str, Any]:
+    """
+    Provides the current content of the delta chain index.
+    """
+
+    index_file = os.path.join(outputs.DELTAS_DIR, outputs.DELTAS_INDEX_FILENAME)
+
+    if FileHelper(index_file).exists():
+        with open(index_file, "r", encoding="utf-8") as file_stream:
+            try:
+                return json.load(file_stream)
+            except json.decoder.JSONDecodeError:
+                logging.critical("Could not decode (delta index): %s", index_file)
+
+    return {"latest": None, "sorting_mode": None, "ip_format": None, "chain": []}
+
+
+def save_index(index: Dict[str, Any]) -> None:
+    """
+    Saves the given delta chain index.
+
+    :param index:
+        The index to save.
+    """
+
+    index_file = os.path.join(outputs.DELTAS_DIR, outputs.DELTAS_INDEX_FILENAME)
+
+    with open(index_file, "w", encoding="utf-8") as file_stream:
+        json.dump(index, file_stream, indent=4)
+        file_stream.write("\n")
+
+
+def get_ip_format(aggregated: bool = False) -> str:
+    """
+    Provides the format of our IPs: their order and whether they are
+    aggregated.
+
+    :param aggregated:
+        Whether the IPs are aggregated (into CIDR blocks).
+    """
+
+    return f"{outputs.IP_ORDER}/{'aggregated' if aggregated else 'plain'}"
+
+
+def get_release_id(index: Dict[str, Any]) -> str:
+    """
+    Provides the identifier of the current release in the given delta chain
+    index: the current version - followed by the time of the release when the
+    version was already released, e.g. twice the same day.
+
+    :param index:
+        The delta chain index.
+    """
+
+    known_ids = {index["latest"]}
+
+    for entry in index["chain"]:
+        known_ids.update((entry.get("release", entry["version"]), entry["previous"]))
+
+    if infrastructure.VERSION not in known_ids:
+        return infrastructure.VERSION
+
+    base_id = (
+        f"{infrastructure.VERSION}."
+        f"{infrastructure.CURRENT_DATETIME.strftime('%H%M%S')}"
+    )
+    release_id = base_id
+    counter = 1
+
+    while release_id in known_ids:
+        counter += 1
+        release_id = f"{base_id}.{counter}"
+
+    return release_id
+
+
+def generate(
+    *,
+    previous_files: Dict[str, List[str]],
+    current_files: Dict[str, List[Union[str, Iterable[str]]]],
+    keys: Optional[Dict[str, Callable[[str], Any]]] = None,
+    sorting_mode: str = "standard",
+    ip_format: Optional[str] = None,
+) -> None:
+    """
+    Generates the patch files of the current release against the previous
+    one and appends them to the delta chain index. Each release is identified
+    by :py:func:`get_release_id`.
+
+    :param previous_files:
+        The files of the previous release, indexed by their kind
+        (:code:`domains` or :code:`ips`).
+    :param current_files:
+        The files (or in-memory subjects) of the current release, indexed by
+        their kind.
+    :param keys:
+        The sorting key the files were sorted with, indexed by their kind.
+    :param sorting_mode:
+        The sorting mode of the domains. The chain is restarted when it
+        differs from the one of the previous release, as both releases can't
+        be merged against each other.
+    :param ip_format:
+        The format of the IPs. See :py:func:`get_ip_format`. The chain is
+        restarted when it differs from the one of the previous release - as
+        for the sorting mode.
+    """
+
+    if keys is None:
+        keys = {}
+
+    if ip_format is None:
+        ip_format = get_ip_format()
+
+    DirectoryHelper(outputs.DELTAS_DIR).create()
+
+    index = load_index()
+    release_id = get_release_id(index)
+
+    # Releases previous to the sorting mode option were sorted in the
+    # standard order.
+    previous_sorting_mode = index.get("sorting_mode") or "standard"
+    # Releases previous to the IP format were not sorted numerically.
+    previous_ip_format = index.get("ip_format")
+
+    if (
+        index["latest"] is None
+        or not any(previous_files.values())
+        or previous_sorting_mode != sorting_mode
+        or previous_ip_format != ip_format
+    ):
+        logging.info(
+            "No previous release to compare with (sorting mode: %r, IP format: "
+            "%r). Starting delta chain at %r.",
+            previous_sorting_mode,
+            previous_ip_format,
+            release_id,
+        )
+
+        index["latest"] = release_id
+        index["sorting_mode"] = sorting_mode
+        index["ip_format"] = ip_format
+        index["chain"] = []
+
+        save_index(index)
+        return
+
+    release_dir = os.path.join(outputs.DELTAS_DIR, release_id)
+    DirectoryHelper(release_dir).create()
+
+    entry = {
+        "version": infrastructure.VERSION,
+        "release": release_id,
+        "previous": index["latest"],
+        "files": {},
+        "added": {},
+        "removed": {},
+    }
+
+    for kind, filename in (
+        ("domains", outputs.DOMAINS_PATCH_FILENAME),
+        ("ips", outputs.IPS_PATCH_FILENAME),
+    ):
+        destination = os.path.join(release_dir, filename)
+
+        logging.info("Started Generation of %r", destination)
+
+        added, removed = write_patch(
+            destination,
+            merge_diff(
+                read_lines(previous_files.get(kind, [])),
+                read_lines(current_files.get(kind, [])),
+                key=keys.get(kind),
+            ),
+        )
+
+        logging.info(
+            "Finished Generation of %r (added: %s, removed: %s)",
+            destination,
+            f"{added:,d}",
+            f"{removed:,d}",
+        )
+
+        entry["files"][kind] = f"{release_id}/{filename}"
+        entry["added"][kind] = added
+        entry["removed"][kind] = removed
+
+    index["chain"].append(entry)
+    index["latest"] = release_id
+    index["sorting_mode"] = sorting_mode
+    index["ip_format"] = ip_format
+
+    while len(index["chain"]) > outputs.MAX_DELTAS_TO_KEEP:
+        outdated = index["chain"].pop(0)
+        outdated_dir = os.path.join(
+            outputs.DELTAS_DIR, outdated.get("release", outdated["version"])
+        )
+
+        logging.info("Deleting outdated delta release %r", outdated_dir)
+        shutil.rmtree(outdated_dir, ignore_errors=True)
+
+    save_index(index)
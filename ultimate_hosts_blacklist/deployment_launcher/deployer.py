@@ -32,13 +32,26 @@ License:
     SOFTWARE.
 """
 
+import concurrent.futures
 import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
 
 import requests
 from PyFunceble.cli.continuous_integration.base import ContinuousIntegrationBase
 from PyFunceble.cli.continuous_integration.exceptions import StopExecution
 
-from ultimate_hosts_blacklist.deployment_launcher.defaults import infrastructure
+from ultimate_hosts_blacklist.deployment_launcher.defaults import (
+    hubgit,
+    infrastructure,
+    outputs,
+)
+
+#: The thread our asynchronous deployment requests are sent from.
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="uhb-deployer"
+)
 
 
 def github(ci_engine: ContinuousIntegrationBase) -> None:
@@ -54,14 +67,225 @@ def github(ci_engine: ContinuousIntegrationBase) -> None:
         pass
 
 
-def hosts_ubuntu101_co_za() -> None:
+def wait_until(
+    predicate: Callable[[], bool],
+    *,
+    timeout: float,
+    initial_delay: float,
+    max_delay: float,
+) -> bool:
+    """
+    Checks the given predicate - with an exponential backoff - until it is
+    met or the given timeout is reached.
+
+    :param predicate:
+        The predicate to check.
+    :param timeout:
+        The number of seconds to wait - at most.
+    :param initial_delay:
+        The delay between the first two checks.
+    :param max_delay:
+        The maximal delay between two checks.
+
+    :return:
+        Whether the predicate was met in time.
+    """
+
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+
+    while True:
+        if predicate():
+            return True
+
+        remaining = deadline - time.monotonic()
+
+        if remaining <= 0:
+            return False
+
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def get_raw_url(ci_engine: ContinuousIntegrationBase, filename: str) -> Optional[str]:
+    """
+    Provides the raw URL of the given file into the repository and branch we
+    push to.
+
+    :param filename:
+        The name of the file - relative to the root of the repository.
+
+    :return:
+        :py:data:`None` when we could not determine the repository or the
+        branch.
+    """
+
+    try:
+        destination = ci_engine.get_remote_destination()
+    except Exception:
+        return None
+
+    if destination.endswith(".git"):
+        destination = destination[: -len(".git")]
+
+    repository = "/".join(destination.replace(":", "/").split("/")[-2:])
+    branch = ci_engine.git_distribution_branch or ci_engine.git_branch
+
+    if repository.count("/") != 1 or not branch:
+        return None
+
+    return f"{hubgit.RAW_URL_BASE}/{repository}/{branch}/{filename}"
+
+
+def is_published(session: requests.Session, url: str, expected: bytes) -> bool:
     """
-    Trigger the deployment tool behind our domain.
+    Checks whether the given URL serves the given content.
+    """
+
+    try:
+        response = session.get(
+            url,
+            headers={"Cache-Control": "no-cache"},
+            timeout=infrastructure.DEPLOYMENT_REQUEST_TIMEOUT,
+        )
+    except requests.RequestException as exception:
+        logging.debug("Could not check %r: %s", url, exception)
+        return False
+
+    return response.status_code == 200 and response.content == expected
+
+
+def wait_for_github(ci_engine: ContinuousIntegrationBase) -> bool:
+    """
+    Waits for the pushed release to be visible through the raw GitHub URLs -
+    which our mirror downloads from. Our README is checked as it holds the
+    version of the release.
+
+    :return:
+        Whether the pushed release became visible in time.
     """
 
+    readme_file = os.path.join(outputs.CURRENT_DIRECTORY, outputs.README_FILENAME)
+    url = get_raw_url(ci_engine, outputs.README_FILENAME)
+
+    if not url or not os.path.isfile(readme_file):
+        logging.warning("Could not determine how to check the pushed release.")
+        return False
+
+    with open(readme_file, "rb") as file_stream:
+        expected = file_stream.read()
+
+    logging.info("Started to wait for %r to be published.", url)
+    start_time = time.perf_counter()
+
+    with requests.Session() as session:
+        session.headers["User-Agent"] = infrastructure.DEPLOYMENT_USER_AGENT
+
+        published = wait_until(
+            lambda: is_published(session, url, expected),
+            timeout=infrastructure.DEPLOYMENT_READINESS_TIMEOUT,
+            initial_delay=infrastructure.DEPLOYMENT_READINESS_INITIAL_DELAY,
+            max_delay=infrastructure.DEPLOYMENT_READINESS_MAX_DELAY,
+        )
+
+    if published:
+        logging.info("Release published after %.3fs.", time.perf_counter() - start_time)
+    else:
+        logging.warning(
+            "Release still not published after %.3fs.",
+            time.perf_counter() - start_time,
+        )
+
+    return published
+
+
+def trigger_hosts_ubuntu101_co_za(
+    manifest_diff: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Triggers the deployment tool behind our domain. The request is tried
+    again - with an exponential backoff - on network and server errors.
+
+    :param manifest_diff:
+        The difference between the manifest of our release and the previous
+        one. When given, it is posted to our mirror - which can then only
+        fetch the files which changed. See
+        :py:func:`ultimate_hosts_blacklist.deployment_launcher.mirror.sync`.
+
+    :return:
+        The status code (:py:data:`None` on failure) of the last attempt, the
+        number of attempts and the response time of the last attempt.
+    """
+
+    result = {"status_code": None, "attempts": 0, "response_time": None}
+    delay = infrastructure.DEPLOYMENT_READINESS_INITIAL_DELAY
+
     logging.info("Started deployment request to our mirror.")
-    requests.get(
-        infrastructure.DOMAIN_DEPLOYMENT_LINK,
-        headers={"User-Agent": "Ultimate-Hosts-Blacklist/central-repo-updaters"},
-    )
-    logging.info("Finished deployment request to our mirror.")
+
+    while result["attempts"] < infrastructure.DEPLOYMENT_TRIGGER_ATTEMPTS:
+        if result["attempts"]:
+            time.sleep(delay)
+            delay = min(delay * 2, infrastructure.DEPLOYMENT_READINESS_MAX_DELAY)
+
+        result["attempts"] += 1
+        start_time = time.perf_counter()
+
+        try:
+            response = requests.request(
+                "POST" if manifest_diff else "GET",
+                infrastructure.DOMAIN_DEPLOYMENT_LINK,
+                json=manifest_diff,
+                headers={"User-Agent": infrastructure.DEPLOYMENT_USER_AGENT},
+                timeout=infrastructure.DEPLOYMENT_REQUEST_TIMEOUT,
+            )
+        except requests.RequestException as exception:
+            result["status_code"] = None
+            result["response_time"] = time.perf_counter() - start_time
+
+            logging.warning(
+                "Deployment request to our mirror failed (attempt %d): %s",
+                result["attempts"],
+                exception,
+            )
+            continue
+
+        result["status_code"] = response.status_code
+        result["response_time"] = time.perf_counter() - start_time
+
+        if response.status_code < 500:
+            break
+
+        logging.warning(
+            "Deployment request to our mirror failed (attempt %d): HTTP %d",
+            result["attempts"],
+            response.status_code,
+        )
+
+    if result["status_code"] is not None and result["status_code"] < 400:
+        logging.info(
+            "Finished deployment request to our mirror (HTTP %d in %.3fs).",
+            result["status_code"],
+            result["response_time"],
+        )
+    else:
+        logging.error("Could not trigger the deployment of our mirror: %r", result)
+
+    return result
+
+
+def hosts_ubuntu101_co_za(
+    manifest_diff: Optional[Dict[str, Any]] = None,
+) -> "concurrent.futures.Future[Dict[str, Any]]":
+    """
+    Triggers the deployment tool behind our domain - in the background.
+
+    :param manifest_diff:
+        See :py:func:`trigger_hosts_ubuntu101_co_za`.
+
+    :return:
+        The future result of
+        :py:func:`trigger_hosts_ubuntu101_co_za`. The process waits for it
+        before exiting.
+    """
+
+    return _EXECUTOR.submit(trigger_hosts_ubuntu101_co_za, manifest_diff)
@@ -0,0 +1,357 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+Provides the client side of our distributed mode: the sources are fetched and
+sorted by our worker nodes.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple
+
+import requests
+
+from ultimate_hosts_blacklist.deployment_launcher.defaults import infrastructure
+
+#: The headers which give the size (in bytes) of each part of a fetch
+#: response. The parts are sent one after the other, in this order.
+PART_SIZE_HEADERS: List[str] = ["X-Info-Size", "X-Domains-Size", "X-IPs-Size"]
+
+#: The header which gives the telemetry record (as JSON) of a fetch.
+TELEMETRY_HEADER: str = "X-Telemetry"
+
+#: The number of bytes we copy at once from a fetch response.
+COPY_SIZE: int = 64 * 1024
+
+
+def get_signature(body: bytes) -> str:
+    """
+    Provides the signature of the given body, as expected into the
+    :code:`X-Hub-Signature-256` header. See
+    :py:data:`infrastructure.SERVICE_SECRET`.
+    """
+
+    return "sha256=" + (
+        hmac.new(
+            infrastructure.SERVICE_SECRET.encode("utf-8"), body, hashlib.sha256
+        ).hexdigest()
+    )
+
+
+def get_headers(body: bytes) -> Dict[str, str]:
+    """
+    Provides the headers of a request to a worker node.
+    """
+
+    result = {
+        "Content-Type": "application/json",
+        "User-Agent": infrastructure.DEPLOYMENT_USER_AGENT,
+    }
+
+    if infrastructure.SERVICE_SECRET:
+        result["X-Hub-Signature-256"] = get_signature(body)
+
+    return result
+
+
+def get_status(session: requests.Session, url: str) -> Dict[str, Any]:
+    """
+    Provides the status of the given worker node.
+
+    :param url:
+        The (base) URL of the node.
+    """
+
+    response = session.get(
+        url.rstrip("/") + "/status", timeout=infrastructure.NODE_REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+
+    return response.json()
+
+
+def copy(stream: BinaryIO, size: int, destination: str) -> None:
+    """
+    Copies the given number of bytes of the given stream into the given file.
+
+    :raise requests.ConnectionError:
+        When the stream ends too early.
+    """
+
+    with open(destination, "wb") as file_stream:
+        while size > 0:
+            block = stream.read(min(size, COPY_SIZE))
+
+            if not block:
+                raise requests.ConnectionError("Truncated response.")
+
+            file_stream.write(block)
+            size -= len(block)
+
+
+def fetch(
+    session: requests.Session,
+    url: str,
+    repository: str,
+    *,
+    info_dir: str,
+    output_dir: Optional[str] = None,
+    sorting_mode: str = "standard",
+) -> Tuple[Tuple[str, str], Dict[str, Any]]:
+    """
+    Lets the given worker node fetch the given source.
+
+    :param url:
+        The (base) URL of the node.
+    :param repository:
+        The name of the source to fetch.
+    :param info_dir:
+        The directory to write the information of the source into.
+    :param output_dir:
+        The directory to write the fetched files into. Defaults to the
+        temporary directory.
+    :param sorting_mode:
+        The sorting mode of the domains. See
+        :py:func:`sorter.get_domain_order`.
+
+    :return:
+        The fetched domains and IPs - each file sorted and deduplicated - and
+        the telemetry record of the fetching.
+    """
+
+    body = json.dumps({"repository": repository, "sorting_mode": sorting_mode}).encode(
+        "utf-8"
+    )
+    files = []
+
+    try:
+        with session.post(
+            url.rstrip("/") + "/fetch",
+            data=body,
+            headers=get_headers(body),
+            timeout=infrastructure.NODE_REQUEST_TIMEOUT,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+
+            info_size, domains_size, ips_size = [
+                int(response.headers[x]) for x in PART_SIZE_HEADERS
+            ]
+            record = {
+                **json.loads(response.headers.get(TELEMETRY_HEADER) or "{}"),
+                "node": url,
+            }
+
+            if info_size:
+                copy(
+                    response.raw,
+                    info_size,
+                    os.path.join(info_dir, f"{repository}.json"),
+                )
+
+            for size in (domains_size, ips_size):
+                file_descriptor, file_path = tempfile.mkstemp(dir=output_dir)
+                os.close(file_descriptor)
+                files.append(file_path)
+
+                copy(response.raw, size, file_path)
+    except Exception:
+        for file in files:
+            os.remove(file)
+
+        raise
+
+    return (files[0], files[1]), record
+
+
+class NodePool:
+    """
+    Shares the fetching of our sources between our worker nodes.
+
+    Each node processes as many sources at once as it has workers: a source is
+    sent to the first node with an idle worker. A node which can't be reached
+    anymore is left out and the sources it was processing are sent to the
+    other ones.
+
+    :param urls:
+        The (base) URLs of our worker nodes.
+
+    :raise ConnectionError:
+        When none of the given nodes can be reached.
+    """
+
+    urls: Optional[List[str]] = None
+    size: int = 0
+
+    _slots: Optional[queue.Queue] = None
+    _failed: Optional[Set[str]] = None
+    _lock: Optional[threading.Lock] = None
+    _local: Optional[threading.local] = None
+    _sessions: Optional[List[requests.Session]] = None
+
+    def __init__(self, urls: List[str]) -> None:
+        self.urls = list(urls)
+        self.size = 0
+
+        self._slots = queue.Queue()
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = []
+
+        for url in self.urls:
+            try:
+                workers = get_status(self.get_session(), url)["workers"]
+            except (requests.RequestException, ValueError, KeyError) as exception:
+                logging.critical("Could not reach the %r node: %s", url, exception)
+                continue
+
+            logging.info("Node %r: %d workers.", url, workers)
+
+            for _ in range(workers):
+                self._slots.put(url)
+                self.size += 1
+
+        if not self.size:
+            self.close()
+            raise ConnectionError("None of the nodes can be reached.")
+
+    def __enter__(self) -> "NodePool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes our HTTP sessions.
+        """
+
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+
+            self._sessions.clear()
+
+    def get_session(self) -> requests.Session:
+        """
+        Provides the HTTP session of the current thread.
+        """
+
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+
+            with self._lock:
+                self._sessions.append(self._local.session)
+
+        return self._local.session
+
+    def acquire(self) -> str:
+        """
+        Waits for an idle worker and provides the URL of its node.
+
+        :raise ConnectionError:
+            When none of our nodes can be reached anymore.
+        """
+
+        while True:
+            with self._lock:
+                if not self.size:
+                    raise ConnectionError("None of the nodes can be reached anymore.")
+
+            try:
+                url = self._slots.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            if url not in self._failed:
+                return url
+
+            with self._lock:
+                self.size -= 1
+
+    def release(self, url: str) -> None:
+        """
+        Gives the worker we acquired back.
+        """
+
+        if url in self._failed:
+            with self._lock:
+                self.size -= 1
+        else:
+            self._slots.put(url)
+
+    def fetch(
+        self,
+        repository: str,
+        *,
+        info_dir: str,
+        output_dir: Optional[str] = None,
+        sorting_mode: str = "standard",
+    ) -> Tuple[Tuple[str, str], Dict[str, Any]]:
+        """
+        Lets one of our nodes fetch the given source. See :py:func:`fetch`.
+        """
+
+        while True:
+            url = self.acquire()
+
+            try:
+                result = fetch(
+                    self.get_session(),
+                    url,
+                    repository,
+                    info_dir=info_dir,
+                    output_dir=output_dir,
+                    sorting_mode=sorting_mode,
+                )
+            except (requests.ConnectionError, requests.Timeout) as exception:
+                if url not in self._failed:
+                    self._failed.add(url)
+
+                    logging.critical(
+                        "Leaving the %r node out. Reason: %s", url, exception
+                    )
+
+                logging.info("[%r] Sending it to another node.", repository)
+                continue
+            finally:
+                self.release(url)
+
+            logging.info("[%r] Fetched by the %r node.", repository, url)
+
+            return result
@@ -0,0 +1,415 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+Provides our compact (in-memory) domain set.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import heapq
+import sys
+from array import array
+from typing import Any, Callable, Generator, Iterable, List, Optional, Tuple
+
+from PyFunceble.cli.utils.sort import get_best_sorting_key
+
+from ultimate_hosts_blacklist.deployment_launcher.index import (
+    decode_varint,
+    encode_block,
+)
+
+#: Our (unsigned) 64-bit array typecode.
+OFFSET_TYPECODE: str = "Q"
+ENTRIES_PER_BLOCK: int = 32
+
+
+def get_set_size(subjects: Iterable[str]) -> int:
+    """
+    Provides the (estimated) number of bytes a :py:class:`set` of the given
+    subjects would use: the :py:class:`str` objects and the hash table.
+
+    :param subjects:
+        The subjects to estimate.
+    """
+
+    strings_size = 0
+    subjects_count = 0
+
+    for subject in subjects:
+        strings_size += sys.getsizeof(subject)
+        subjects_count += 1
+
+    # The hash table is kept at most 60% full and each slot holds a hash and
+    # a pointer.
+    slots = 8
+
+    while slots * 3 < subjects_count * 5:
+        slots <<= 1
+
+    return sys.getsizeof(set()) + slots * 16 + strings_size
+
+
+class CompactDomainSet:
+    """
+    Provides a sorted and unique set of domains held into a single
+    :py:class:`bytearray` instead of one :py:class:`str` per domain.
+
+    The domains are split into blocks of :py:data:`ENTRIES_PER_BLOCK` sorted
+    entries which are front-coded
+    (see :py:func:`~ultimate_hosts_blacklist.deployment_launcher.index.encode_block`).
+    The offset of each block is kept into a packed array, which lets us binary
+    search the blocks.
+
+    The domains are ordered by the given sorting key and then by themselves,
+    as distinct domains can share the same sorting key. Duplicates are
+    therefore always contiguous and the sorting key is computed only once per
+    domain while building the set.
+
+    The set is built once and can be iterated (in order) as many times as
+    needed.
+
+    Example:
+
+    ::
+
+        domains = CompactDomainSet.from_iterable(["b.example.org", "a.example.org"])
+
+        "a.example.org" in domains
+        list(domains)
+
+    :param key:
+        The sorting key to order the domains with.
+    """
+
+    key: Optional[Callable[[str], Any]] = None
+
+    _data: Optional[bytearray] = None
+    _offsets: Optional[array] = None
+    _length: int = 0
+
+    _block: Optional[List[bytes]] = None
+    _last: Optional[str] = None
+
+    def __init__(self, *, key: Optional[Callable[[str], Any]] = None) -> None:
+        self.key = key or get_best_sorting_key()
+
+        self._data = bytearray()
+        self._offsets = array(OFFSET_TYPECODE)
+        self._length = 0
+
+        self._block = []
+
+    def __len__(self) -> int:
+        return self._length + len(self._block)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} entries={len(self)} bytes={self.nbytes}>"
+
+    def __iter__(self) -> Generator[str, None, None]:
+        for block in range(len(self._offsets)):
+            for entry in self._decode_block(block):
+                yield entry.decode("utf-8")
+
+        for entry in self._block:
+            yield entry.decode("utf-8")
+
+    def __contains__(self, subject: str) -> bool:
+        return self.contains(subject)
+
+    @classmethod
+    def from_sorted(
+        cls, subjects: Iterable[str], *, key: Optional[Callable[[str], Any]] = None
+    ) -> "CompactDomainSet":
+        """
+        Builds a set from the given subjects - which are already sorted (see
+        :py:meth:`get_order`). Duplicates are removed.
+
+        :param subjects:
+            The (sorted) subjects to add.
+        :param key:
+            The sorting key the subjects were sorted with.
+        """
+
+        result = cls(key=key)
+
+        for subject in subjects:
+            result.append(subject)
+
+        return result.freeze()
+
+    @classmethod
+    def from_iterable(
+        cls, subjects: Iterable[str], *, key: Optional[Callable[[str], Any]] = None
+    ) -> "CompactDomainSet":
+        """
+        Builds a set from the given (unsorted) subjects.
+
+        .. warning::
+            The subjects are sorted in memory as :py:class:`str`. Use it for
+            a single input source and :py:meth:`merge` the resulting sets.
+
+        :param subjects:
+            The subjects to add.
+        :param key:
+            The sorting key to order the subjects with.
+        """
+
+        result = cls(key=key)
+
+        for subject in sorted(
+            {x.strip() for x in subjects if x.strip()}, key=result.get_order
+        ):
+            result.append(subject)
+
+        return result.freeze()
+
+    @classmethod
+    def merge(
+        cls,
+        *sets: "CompactDomainSet",
+        key: Optional[Callable[[str], Any]] = None,
+    ) -> "CompactDomainSet":
+        """
+        Merges the given sets - sorted with the same key - into a new one.
+
+        :param sets:
+            The sets to merge.
+        :param key:
+            The sorting key the sets were sorted with.
+        """
+
+        result = cls(key=key)
+
+        for subject in heapq.merge(*sets, key=result.get_order):
+            result.append(subject)
+
+        return result.freeze()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Provides the number of bytes used by the encoded domains.
+        """
+
+        return (
+            sys.getsizeof(self._data)
+            + self._offsets.buffer_info()[1] * self._offsets.itemsize
+        )
+
+    def get_order(self, subject: str) -> Tuple[Any, str]:
+        """
+        Provides the position of the given subject into the set.
+
+        :param subject:
+            The subject to locate.
+        """
+
+        return self.key(subject), subject
+
+    def append(self, subject: str) -> None:
+        """
+        Appends the given subject. It has to be sorted after (see
+        :py:meth:`get_order`) the latest appended one. Duplicates are ignored.
+
+        :param subject:
+            The subject to append.
+        """
+
+        subject = subject.strip()
+
+        if not subject or subject == self._last:
+            return
+
+        self._last = subject
+
+        self._block.append(subject.encode("utf-8"))
+
+        if len(self._block) >= ENTRIES_PER_BLOCK:
+            self._flush_block()
+
+    def freeze(self) -> "CompactDomainSet":
+        """
+        Finishes the construction of the set. Nothing can be appended
+        afterwards.
+        """
+
+        self._flush_block()
+
+        self._last = None
+
+        return self
+
+    def _flush_block(self) -> None:
+        """
+        Encodes the pending entries into a new block.
+        """
+
+        if not self._block:
+            return
+
+        self._offsets.append(len(self._data))
+        self._data += encode_block(self._block)
+        self._length += len(self._block)
+
+        self._block = []
+
+    def _get_block_head(self, block: int) -> str:
+        """
+        Provides the first entry of the given block.
+        """
+
+        length, position = decode_varint(self._data, self._offsets[block])
+
+        return self._data[position : position + length].decode("utf-8")
+
+    def _decode_block(self, block: int) -> Generator[bytes, None, None]:
+        """
+        Decodes all entries of the given block.
+        """
+
+        position = self._offsets[block]
+        end = (
+            self._offsets[block + 1]
+            if block + 1 < len(self._offsets)
+            else len(self._data)
+        )
+
+        length, position = decode_varint(self._data, position)
+        previous = bytes(self._data[position : position + length])
+        position += length
+
+        yield previous
+
+        while position < end:
+            shared, position = decode_varint(self._data, position)
+            length, position = decode_varint(self._data, position)
+
+            previous = previous[:shared] + self._data[position : position + length]
+            position += length
+
+            yield previous
+
+    def _find_block(self, subject_order: Tuple[Any, str]) -> int:
+        """
+        Provides the number of blocks whose first entry is ordered before (or
+        is) the given position.
+        """
+
+        low, high = 0, len(self._offsets)
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self.get_order(self._get_block_head(middle)) <= subject_order:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def get_position(self, subject: str) -> int:
+        """
+        Provides the number of entries of the (frozen) set which are ordered
+        before the given subject.
+
+        :param subject:
+            The subject to locate.
+        """
+
+        subject_order = self.get_order(subject.strip())
+        block = self._find_block(subject_order)
+
+        if not block:
+            return 0
+
+        position = (block - 1) * ENTRIES_PER_BLOCK
+
+        for entry in self._decode_block(block - 1):
+            if self.get_order(entry.decode("utf-8")) >= subject_order:
+                break
+
+            position += 1
+
+        return position
+
+    def patch(self, added: Iterable[str], removed: Iterable[str]) -> "CompactDomainSet":
+        """
+        Provides a new set with the given changes applied to this (frozen)
+        one.
+
+        The sorting key is only computed for the added subjects and the
+        entries they are compared with while being located - not for the
+        whole set.
+
+        :param added:
+            The subjects to add.
+        :param removed:
+            The subjects to remove.
+        """
+
+        result = type(self)(key=self.key)
+
+        removed = {x.strip() for x in removed}
+        insertions = sorted({x.strip() for x in added if x.strip()}, key=self.get_order)
+        positions = [self.get_position(x) for x in insertions]
+
+        pending = 0
+
+        for position, subject in enumerate(self):
+            while pending < len(insertions) and positions[pending] == position:
+                result.append(insertions[pending])
+                pending += 1
+
+            if subject not in removed:
+                result.append(subject)
+
+        for subject in insertions[pending:]:
+            result.append(subject)
+
+        return result.freeze()
+
+    def contains(self, subject: str) -> bool:
+        """
+        Checks if the given subject is part of the set.
+
+        :param subject:
+            The subject to look for.
+        """
+
+        subject = subject.strip()
+        low = self._find_block(self.get_order(subject))
+
+        if low:
+            needle = subject.encode("utf-8")
+
+            for entry in self._decode_block(low - 1):
+                if entry == needle:
+                    return True
+
+        return subject in (x.decode("utf-8") for x in self._block)
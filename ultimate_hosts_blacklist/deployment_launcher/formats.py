@@ -0,0 +1,313 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+Provides the registry of our output formats.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ultimate_hosts_blacklist.deployment_launcher.defaults import outputs
+
+#: The datasets a format can be generated from.
+DOMAINS_DATASET: str = "domains"
+COLLAPSED_DOMAINS_DATASET: str = "collapsed_domains"
+IPS_DATASET: str = "ips"
+PLAIN_IPS_DATASET: str = "plain_ips"
+HOSTS_DENY_IPS_DATASET: str = "hosts_deny_ips"
+
+
+class OutputFormat(NamedTuple):
+    """
+    Describes an output format.
+    """
+
+    #: The name of the format.
+    name: str
+    #: The directory to write into.
+    directory: str
+    #: The (incomplete) filename of the chunks.
+    filename: str
+    #: The format to apply to each subject. A format can span multiple lines.
+    line_format: str
+    #: The datasets to read, in order. Formats matching the subdomains of their
+    #: entries should read the collapsed domains.
+    datasets: Tuple[str, ...]
+    #: The filename of the template to write before the first line.
+    template: Optional[str] = None
+    #: The placeholder of the template to replace with the number of subjects.
+    count_placeholder: Optional[str] = None
+    #: The last line to write.
+    endline: Optional[str] = None
+    #: The line ending to write: :code:`lf` or :code:`crlf`.
+    write_mode: str = "lf"
+    #: The maximum size of a chunk. :py:data:`None` means
+    #: :py:data:`outputs.MAX_FILE_SIZE_IN_BYTES`. :code:`0` means that the
+    #: format can't be split.
+    max_file_size_in_bytes: Optional[int] = None
+    #: The number of subjects to write per line.
+    entries_per_line: int = 1
+    #: The maximum number of subjects the consumers of the format read per line.
+    max_entries_per_line: Optional[int] = None
+
+
+FORMATS: Dict[str, OutputFormat] = {}
+
+
+def register(output_format: OutputFormat) -> OutputFormat:
+    """
+    Registers the given output format.
+
+    :param output_format:
+        The format to register.
+
+    :raise ValueError:
+        When a format with the same name is already registered.
+    """
+
+    if output_format.name in FORMATS:
+        raise ValueError(
+            f"<output_format> ({output_format.name!r}) already registered."
+        )
+
+    FORMATS[output_format.name] = output_format
+
+    return output_format
+
+
+def get_formats(
+    names: List[str], *, entries_per_line: Optional[int] = None
+) -> List[OutputFormat]:
+    """
+    Provides the registered formats behind the given names.
+
+    :param names:
+        The names of the formats to provide.
+    :param entries_per_line:
+        The number of subjects to write per line into the formats which
+        write multiple subjects per line. It is capped at their
+        :code:`max_entries_per_line`.
+
+    :raise ValueError:
+        When one of the given names is not registered.
+    """
+
+    result = []
+
+    for name in names:
+        if name not in FORMATS:
+            raise ValueError(f"<names> ({name!r}) is not a registered format.")
+
+        output_format = FORMATS[name]
+
+        if entries_per_line and output_format.entries_per_line > 1:
+            output_format = output_format._replace(
+                entries_per_line=min(
+                    entries_per_line,
+                    output_format.max_entries_per_line or entries_per_line,
+                )
+            )
+
+        result.append(output_format)
+
+    return result
+
+
+register(
+    OutputFormat(
+        name="domains-dotted-format",
+        directory=outputs.DOTTED_DIR,
+        filename=outputs.INCOMPLETE_DOTTED_FILENAME,
+        line_format=".{0}",
+        datasets=(COLLAPSED_DOMAINS_DATASET, IPS_DATASET),
+    )
+)
+register(
+    OutputFormat(
+        name="domains",
+        directory=outputs.DOMAINS_DIR,
+        filename=outputs.INCOMPLETE_PLAIN_FILENAME,
+        line_format="{0}",
+        datasets=(DOMAINS_DATASET,),
+    )
+)
+register(
+    OutputFormat(
+        name="ips",
+        directory=outputs.IPS_DIR,
+        filename=outputs.INCOMPLETE_IPS_FILENAME,
+        line_format="{0}",
+        datasets=(PLAIN_IPS_DATASET,),
+    )
+)
+register(
+    OutputFormat(
+        name="hosts.deny",
+        directory=outputs.HOSTS_DENY_DIR,
+        filename=outputs.INCOMPLETE_HOSTS_DENY_FILENAME,
+        line_format="ALL: {0}",
+        datasets=(HOSTS_DENY_IPS_DATASET,),
+        template=outputs.HOSTS_DENY_TEMPLATE_FILENAME,
+        count_placeholder="%%lenIP%%",
+        endline="# ##### END hosts.deny Block List # DO NOT EDIT #####",
+    )
+)
+register(
+    OutputFormat(
+        name="superhosts.deny",
+        directory=outputs.SUPER_HOSTS_DENY_DIR,
+        filename=outputs.INCOMPLETE_SUPER_HOSTS_DENY_FILENAME,
+        line_format="ALL: {0}",
+        datasets=(DOMAINS_DATASET, HOSTS_DENY_IPS_DATASET),
+        template=outputs.SUPER_HOSTS_DENY_TEMPLATE_FILENAME,
+        count_placeholder="%%lenIPHosts%%",
+        endline="# ##### END Super hosts.deny Block List # DO NOT EDIT #####",
+    )
+)
+register(
+    OutputFormat(
+        name="hosts",
+        directory=outputs.UNIX_HOSTS_DIR,
+        filename=outputs.INCOMPLETE_UNIX_HOSTS_FILENAME,
+        line_format="0.0.0.0 {0}",
+        datasets=(DOMAINS_DATASET,),
+        template=outputs.UNIX_HOSTS_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="# END HOSTS LIST ### DO NOT EDIT THIS LINE AT ALL ###",
+    )
+)
+register(
+    OutputFormat(
+        name="hosts.windows",
+        directory=outputs.WINDOWS_HOSTS_DIR,
+        filename=outputs.INCOMPLETE_WINDOWS_HOSTS_FILENAME,
+        line_format="127.0.0.1 {0}",
+        datasets=(DOMAINS_DATASET,),
+        template=outputs.WINDOWS_HOSTS_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="# END HOSTS LIST ### DO NOT EDIT THIS LINE AT ALL ###",
+        write_mode="crlf",
+    )
+)
+register(
+    OutputFormat(
+        name="hosts.compact",
+        directory=outputs.COMPACT_UNIX_HOSTS_DIR,
+        filename=outputs.INCOMPLETE_COMPACT_UNIX_HOSTS_FILENAME,
+        line_format="0.0.0.0 {0}",
+        datasets=(DOMAINS_DATASET,),
+        template=outputs.UNIX_HOSTS_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="# END HOSTS LIST ### DO NOT EDIT THIS LINE AT ALL ###",
+        entries_per_line=outputs.WINDOWS_HOSTS_MAX_ENTRIES_PER_LINE,
+    )
+)
+register(
+    OutputFormat(
+        name="hosts.windows.compact",
+        directory=outputs.COMPACT_WINDOWS_HOSTS_DIR,
+        filename=outputs.INCOMPLETE_COMPACT_WINDOWS_HOSTS_FILENAME,
+        line_format="127.0.0.1 {0}",
+        datasets=(DOMAINS_DATASET,),
+        template=outputs.WINDOWS_HOSTS_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="# END HOSTS LIST ### DO NOT EDIT THIS LINE AT ALL ###",
+        write_mode="crlf",
+        entries_per_line=outputs.WINDOWS_HOSTS_MAX_ENTRIES_PER_LINE,
+        max_entries_per_line=outputs.WINDOWS_HOSTS_MAX_ENTRIES_PER_LINE,
+    )
+)
+register(
+    OutputFormat(
+        name="dnsmasq",
+        directory=outputs.DNSMASQ_DIR,
+        filename=outputs.INCOMPLETE_DNSMASQ_FILENAME,
+        line_format="local=/{0}/",
+        datasets=(COLLAPSED_DOMAINS_DATASET,),
+        template=outputs.DNSMASQ_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="# END dnsmasq Block List # DO NOT EDIT #####",
+    )
+)
+register(
+    OutputFormat(
+        name="unbound",
+        directory=outputs.UNBOUND_DIR,
+        filename=outputs.INCOMPLETE_UNBOUND_FILENAME,
+        line_format='    local-zone: "{0}." always_nxdomain',
+        datasets=(COLLAPSED_DOMAINS_DATASET,),
+        template=outputs.UNBOUND_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="# END unbound Block List # DO NOT EDIT #####",
+    )
+)
+register(
+    OutputFormat(
+        name="rpz",
+        directory=outputs.RPZ_DIR,
+        filename=outputs.INCOMPLETE_RPZ_FILENAME,
+        line_format="{0} CNAME .\n*.{0} CNAME .",
+        datasets=(COLLAPSED_DOMAINS_DATASET,),
+        template=outputs.RPZ_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="; END RPZ Block List # DO NOT EDIT #####",
+        # A zone can't be split: only its first chunk would have a SOA.
+        max_file_size_in_bytes=0,
+    )
+)
+register(
+    OutputFormat(
+        name="adguard",
+        directory=outputs.ADGUARD_DIR,
+        filename=outputs.INCOMPLETE_ADGUARD_FILENAME,
+        line_format="||{0}^",
+        datasets=(COLLAPSED_DOMAINS_DATASET,),
+        template=outputs.ADGUARD_TEMPLATE_FILENAME,
+        count_placeholder="%%lenHosts%%",
+        endline="! END AdGuard Block List # DO NOT EDIT #####",
+    )
+)
+
+#: The formats we always generate.
+DEFAULT_FORMATS: List[str] = [
+    "domains-dotted-format",
+    "domains",
+    "ips",
+    "hosts.deny",
+    "superhosts.deny",
+    "hosts",
+    "hosts.windows",
+]
+
+#: The formats writing multiple domains per line.
+COMPACT_HOSTS_FORMATS: List[str] = ["hosts.compact", "hosts.windows.compact"]
+
+#: The resolver-native formats we can additionally generate.
+EXTRA_FORMATS: List[str] = ["dnsmasq", "unbound", "rpz", "adguard"]
@@ -32,300 +32,786 @@ License:
     SOFTWARE.
 """
 
+import concurrent.futures
+import contextlib
+import hashlib
+import itertools
 import json
 import logging
 import os
-from typing import List, Optional
+import shutil
+import tempfile
+import time
+import zlib
+from typing import Any, Dict, Generator, Iterable, List, Optional, TextIO, Tuple, Union
 
 from PyFunceble.helpers.directory import DirectoryHelper
 from PyFunceble.helpers.file import FileHelper
 
+from ultimate_hosts_blacklist.deployment_launcher import bloom, formats, index
 from ultimate_hosts_blacklist.deployment_launcher.defaults import (
     infrastructure,
     outputs,
 )
 
+FILE_BUFFER_SIZE: int = 64 * 1024
 
-def generate_next_file(
-    directory_path: str,
-    filename: str,
-    format_to_apply: str,
-    input_files: List[str],
-    template: Optional[str] = None,
-    endline: Optional[str] = None,
-    write_mode: Optional[str] = "lf",
-) -> None:
+
+def read_input(input_file: Union[str, Iterable[str]]) -> Generator[str, None, None]:
+    """
+    Provides each line of the given input.
+
+    :param input_file:
+        The file to read or - in memory mode - the (re-iterable) subjects to
+        provide. As example, a
+        :py:class:`~ultimate_hosts_blacklist.deployment_launcher.domainset.CompactDomainSet`.
     """
-    A general function which write into the next file.
+
+    if isinstance(input_file, str):
+        with open(input_file, "r", encoding="utf-8") as file_stream:
+            yield from file_stream
+    else:
+        yield from input_file
+
+
+def iter_lines(
+    input_files: List[Union[str, Iterable[str]]],
+) -> Generator[str, None, None]:
+    """
+    Provides each non-empty (stripped) line of the given inputs, in order.
+
+    :param input_files:
+        The inputs to read. See :py:func:`read_input`.
+    """
+
+    for input_file in input_files:
+        for line in read_input(input_file):
+            line = line.strip()
+
+            if line:
+                yield line
+
+
+def get_chunk_files(directory_path: str, filename: str) -> List[str]:
+    """
+    Provides the (existing) chunks of a previously generated file, in order.
 
     :param directory_path:
-        The path of the directory to write into.
+        The path of the directory to read from.
     :param filename:
-        The path of the filename.
-    :param format_to_apply:
-        The format to apply to each line.
-    :param input_file:
-        The input file to read
-    :param template:
-        The template to write before starting to write each lines.
-    :param endline:
-        The last line to write.
+        The (incomplete) filename of the chunks.
     """
 
-    windows_lf = "\r\n"
-    unix_lf = "\n"
+    result = []
 
-    if write_mode.lower() == "lf":
-        line_ending = unix_lf
+    while True:
+        destination = os.path.join(directory_path, filename.format(len(result)))
 
-        if template:
-            template = template.replace(windows_lf, unix_lf)
-    elif write_mode.lower() == "crlf":
-        line_ending = windows_lf
+        if not FileHelper(destination).exists():
+            break
 
-        if template:
-            template = template.replace(unix_lf, windows_lf)
-    else:
-        raise ValueError("<write_mode> not supported.")
+        result.append(destination)
 
-    dir_helper = DirectoryHelper(directory_path)
+    return result
 
-    if dir_helper.exists():
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                FileHelper(os.path.join(root, file)).delete()
-    else:
-        dir_helper.create()
 
-    i = 0
-    destination = None
-    template_written = False
+def is_chunk_boundary(
+    size: int,
+    rolling_hash: int,
+    *,
+    chunking_mode: str = "fixed",
+    max_file_size_in_bytes: Optional[int] = None,
+) -> bool:
+    """
+    Checks if the current chunk should be closed.
+
+    :param size:
+        The current size (in bytes) of the chunk.
+    :param rolling_hash:
+        The rolling hash of the latest written entries.
+    :param chunking_mode:
+        The chunking mode. See :py:class:`ChunkedWriter`.
+    :param max_file_size_in_bytes:
+        The maximum size of a chunk. :py:data:`None` means
+        :py:data:`outputs.MAX_FILE_SIZE_IN_BYTES`. :code:`0` means that the
+        chunk can't be split.
+    """
+
+    if max_file_size_in_bytes is None:
+        max_file_size_in_bytes = outputs.MAX_FILE_SIZE_IN_BYTES
 
-    for input_file in input_files:
-        with open(input_file, "r", encoding="utf-8") as file_stream:
-            for line in file_stream:
-                line = line.strip()
-                destination = os.path.join(directory_path, filename.format(i))
+    if max_file_size_in_bytes == 0:
+        return False
+
+    if size >= max_file_size_in_bytes:
+        return True
 
-                if not FileHelper(destination).exists():
-                    logging.info("Started Generation of %r", destination)
+    if chunking_mode.lower() == "content":
+        return (
+            size >= outputs.MIN_CHUNK_SIZE_IN_BYTES
+            and rolling_hash & outputs.CHUNK_BOUNDARY_MASK == 0
+        )
 
-                with open(
-                    destination, "a+", encoding="utf-8", newline=line_ending
-                ) as destination_file_stream:
-                    if i == 0 and template and not template_written:
-                        logging.debug("Writting template:\n%s", template)
-                        destination_file_stream.write(template)
+    return False
+
+
+def get_file_hash(file_path: str, file_hashes: Optional[Dict[str, str]] = None) -> str:
+    """
+    Provides the SHA-256 hash of the given file.
+
+    :param file_path:
+        The path of the file to hash.
+    :param file_hashes:
+        The hashes of the files of the current generation - by path. The
+        hash of the given file is read from - or recorded into - it. Files
+        can therefore be hashed ahead of time - e.g. while the others are
+        being generated.
+
+        .. warning::
+            It has to be scoped to a single generation: the files are
+            expected to be left untouched - except by
+            :py:func:`sync_directory`, which keeps it up to date.
+    """
 
-                        template_written = True
+    file_path = os.path.abspath(file_path)
 
-                    destination_file_stream.write(
-                        f"{format_to_apply.format(line)}{line_ending}"
-                    )
+    if file_hashes is not None and file_path in file_hashes:
+        return file_hashes[file_path]
 
-                    if destination_file_stream.tell() >= outputs.MAX_FILE_SIZE_IN_BYTES:
-                        logging.info(
-                            "Finished Generation of %r",
-                            destination,
-                        )
+    hasher = hashlib.sha256()
 
-                        i += 1
-                        continue
+    with open(file_path, "rb") as file_stream:
+        for block in iter(lambda: file_stream.read(FILE_BUFFER_SIZE), b""):
+            hasher.update(block)
 
-    if destination and endline:
-        with open(destination, "a+", encoding="utf-8") as destination_file_stream:
-            logging.debug("Writting last line:\n%r", endline)
-            destination_file_stream.write(endline + "\n")
+    if file_hashes is not None:
+        file_hashes[file_path] = hasher.hexdigest()
 
+    return hasher.hexdigest()
 
-def dotted(*args: List[str]) -> None:
+
+def is_same_file(
+    first: str, second: str, file_hashes: Optional[Dict[str, str]] = None
+) -> bool:
+    """
+    Checks if the two given files have the same content.
+
+    :param first:
+        The path of the first file.
+    :param second:
+        The path of the second file.
+    :param file_hashes:
+        The hashes of the files of the current generation - by path. See
+        :py:func:`get_file_hash`.
     """
-    Generates the dotted formatted file.
 
-    :param args:
-        The files to read and convert.
+    if os.path.getsize(first) != os.path.getsize(second):
+        return False
+
+    return get_file_hash(first, file_hashes) == get_file_hash(second, file_hashes)
+
+
+def sync_directory(
+    source_dir: str,
+    destination_dir: str,
+    file_hashes: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    Synchronizes the destination directory with the given (staging) source
+    directory.
+
+    Files which differ are atomically replaced, files which are not present
+    into the source directory are deleted and identical files are left
+    untouched.
+
+    :param source_dir:
+        The (staging) directory to read from.
+    :param destination_dir:
+        The directory to update.
+    :param file_hashes:
+        The hashes of the files of the current generation - by path. See
+        :py:func:`get_file_hash`.
+
+    :return:
+        The number of files which actually changed.
     """
 
-    generate_next_file(
-        outputs.DOTTED_DIR, outputs.INCOMPLETE_DOTTED_FILENAME, ".{0}", args
-    )
+    changed = 0
+    expected_files = set()
+
+    for file in os.listdir(source_dir):
+        source = os.path.join(source_dir, file)
+        destination = os.path.join(destination_dir, file)
+
+        expected_files.add(destination)
+
+        if FileHelper(destination).exists() and is_same_file(
+            source, destination, file_hashes
+        ):
+            logging.debug("Unchanged: %r", destination)
+            continue
+
+        logging.info("Updating %r", destination)
+        os.replace(source, destination)
+        changed += 1
+
+        if file_hashes is not None:
+            source, destination = os.path.abspath(source), os.path.abspath(destination)
+
+            if source in file_hashes:
+                file_hashes[destination] = file_hashes.pop(source)
+            else:
+                file_hashes.pop(destination, None)
+
+    for root, _, files in os.walk(destination_dir):
+        for file in files:
+            destination = os.path.join(root, file)
+
+            if destination not in expected_files:
+                logging.info("Deleting %r", destination)
+                FileHelper(destination).delete()
+                changed += 1
 
+                if file_hashes is not None:
+                    file_hashes.pop(os.path.abspath(destination), None)
 
-def plain_text_domain(*args: List[str]) -> None:
+    return changed
+
+
+@contextlib.contextmanager
+def staging_directory(directory_path: str) -> Generator[str, None, None]:
     """
-    Generates the plain text domain formatted file.
+    Provides a temporary staging directory next to the given (output)
+    directory. Files written into it can then be atomically moved into the
+    output directory with :py:func:`sync_directory`.
 
-    :param args:
-        The files to read and convert.
+    :param directory_path:
+        The path of the output directory.
     """
 
-    generate_next_file(
-        outputs.DOMAINS_DIR, outputs.INCOMPLETE_PLAIN_FILENAME, "{0}", args
+    DirectoryHelper(directory_path).create()
+
+    staging_dir = tempfile.mkdtemp(
+        prefix=f".{os.path.basename(directory_path)}.",
+        dir=os.path.dirname(directory_path),
     )
 
+    try:
+        yield staging_dir
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
 
-def plain_text_ip(*args: List[str]) -> None:
+class ChunkedWriter:
     """
-    Generates the plain text IP formatted file.
+    Writes the subjects of a single output format into its chunks.
 
-    :param args:
-        The files to read and convert.
+    :param output_format:
+        The format to write.
+    :param staging_dir:
+        The directory to write the chunks into.
+    :param template:
+        The (already filled) template to write before the first line.
+    :param hasher:
+        The executor to hash the chunks with, as soon as they are complete.
+        See :py:func:`get_file_hash`.
+    :param file_hashes:
+        Where the hashes of our chunks are recorded - by path.
+    :param chunking_mode:
+        The way we split the output into chunks.
+
+        - :code:`fixed`: a new chunk is started once the current one reaches
+          the maximum size of the format.
+        - :code:`content`: a new chunk is started when the rolling hash of the
+          latest entries hits our boundary mask (and the current chunk is
+          larger than :py:data:`outputs.MIN_CHUNK_SIZE_IN_BYTES`). Inserting or
+          removing an entry then only moves the boundaries around it.
     """
 
-    generate_next_file(outputs.IPS_DIR, outputs.INCOMPLETE_IPS_FILENAME, "{0}", args)
+    output_format: Optional[formats.OutputFormat] = None
+    staging_dir: Optional[str] = None
+    template: Optional[str] = None
+    chunking_mode: str = "fixed"
+    hasher: Optional[concurrent.futures.Executor] = None
+    hashes: Optional[List[concurrent.futures.Future]] = None
+    file_hashes: Optional[Dict[str, str]] = None
+    line_ending: str = "\n"
+
+    _index: int = 0
+    _destination: Optional[str] = None
+    _destination_file_stream: Optional[TextIO] = None
+    _rolling_hash: int = 0
+    _pending: Optional[List[str]] = None
+
+    def __init__(
+        self,
+        output_format: formats.OutputFormat,
+        staging_dir: str,
+        *,
+        template: Optional[str] = None,
+        chunking_mode: str = "fixed",
+        hasher: Optional[concurrent.futures.Executor] = None,
+        file_hashes: Optional[Dict[str, str]] = None,
+    ) -> None:
+        windows_lf = "\r\n"
+        unix_lf = "\n"
+
+        if output_format.write_mode.lower() == "lf":
+            self.line_ending = unix_lf
+
+            if template:
+                template = template.replace(windows_lf, unix_lf)
+        elif output_format.write_mode.lower() == "crlf":
+            self.line_ending = windows_lf
+
+            if template:
+                template = template.replace(unix_lf, windows_lf)
+        else:
+            raise ValueError("<write_mode> not supported.")
+
+        if chunking_mode.lower() not in outputs.CHUNKING_MODES:
+            raise ValueError("<chunking_mode> not supported.")
+
+        if output_format.entries_per_line < 1:
+            raise ValueError("<entries_per_line> should be a positive integer.")
+
+        self.output_format = output_format
+        self.staging_dir = staging_dir
+        self.template = template
+        self.chunking_mode = chunking_mode.lower()
+        self.hasher = hasher
+        self.hashes = []
+        self.file_hashes = file_hashes
+
+        self._pending = []
+
+    def write(self, subject: str) -> None:
+        """
+        Writes the given subject.
+
+        :param subject:
+            The subject to write.
+        """
+
+        self._pending.append(subject)
+
+        if len(self._pending) >= self.output_format.entries_per_line:
+            self._write_line(" ".join(self._pending))
+            self._pending = []
+
+    def _write_line(self, line: str) -> None:
+        """
+        Writes the given (formatted) line into the current chunk.
+        """
+
+        if self.chunking_mode == "content":
+            self._rolling_hash = (
+                (self._rolling_hash << 1) + zlib.crc32(line.encode("utf-8"))
+            ) & 0xFFFFFFFF
+
+        if self._destination_file_stream is None:
+            if self._destination:
+                # The previous chunk is complete.
+                self.hash_chunk(self._destination)
+
+            self._destination = os.path.join(
+                self.staging_dir, self.output_format.filename.format(self._index)
+            )
+
+            logging.info("Started Generation of %r", self._destination)
+
+            self._destination_file_stream = open(
+                self._destination, "w", encoding="utf-8", newline=self.line_ending
+            )
+
+            if self._index == 0 and self.template:
+                logging.debug("Writting template:\n%s", self.template)
+                self._destination_file_stream.write(self.template)
+
+        self._destination_file_stream.write(
+            f"{self.output_format.line_format.format(line)}{self.line_ending}"
+        )
+
+        if is_chunk_boundary(
+            self._destination_file_stream.tell(),
+            self._rolling_hash,
+            chunking_mode=self.chunking_mode,
+            max_file_size_in_bytes=self.output_format.max_file_size_in_bytes,
+        ):
+            self._destination_file_stream.close()
+            self._destination_file_stream = None
+
+            logging.info("Finished Generation of %r", self._destination)
+
+            self._index += 1
+
+    def close(self) -> None:
+        """
+        Writes the pending subjects and the last line, then closes the
+        current chunk.
+        """
+
+        if self._pending:
+            self._write_line(" ".join(self._pending))
+            self._pending = []
+
+        if self._destination_file_stream is not None:
+            self._destination_file_stream.close()
+            self._destination_file_stream = None
+
+        if self._destination and self.output_format.endline:
+            with open(
+                self._destination, "a+", encoding="utf-8"
+            ) as destination_file_stream:
+                logging.debug("Writting last line:\n%r", self.output_format.endline)
+                destination_file_stream.write(self.output_format.endline + "\n")
+
+        if self._destination:
+            self.hash_chunk(self._destination)
+
+    def hash_chunk(self, chunk_file: str) -> None:
+        """
+        Hashes the given (complete) chunk in the background - if we have a
+        hasher. See :py:attr:`hashes`.
+        """
+
+        if self.hasher is not None:
+            self.hashes.append(
+                self.hasher.submit(get_file_hash, chunk_file, self.file_hashes)
+            )
+
+    def abort(self) -> None:
+        """
+        Closes the current chunk without writing anything else.
+        """
+
+        if self._destination_file_stream is not None:
+            self._destination_file_stream.close()
+            self._destination_file_stream = None
+
+
+def get_template(
+    output_format: formats.OutputFormat, subjects_count: int
+) -> Optional[str]:
+    """
+    Provides the (filled) template of the given format - if it has one.
+
+    :param output_format:
+        The format to get the template of.
+    :param subjects_count:
+        The number of subjects the format will contain.
+    """
+
+    if not output_format.template:
+        return None
 
+    with open(
+        os.path.join(outputs.TEMPLATE_DIR, output_format.template),
+        "r",
+        encoding="utf-8",
+    ) as file_stream:
+        template = file_stream.read()
+
+    template = template.replace("%%version%%", infrastructure.VERSION)
+    template = template.replace(
+        "%%serial%%", infrastructure.CURRENT_DATETIME.strftime("%Y%m%d%H")
+    )
 
-def hosts_deny(*args: List[str]) -> None:
+    if output_format.count_placeholder:
+        template = template.replace(
+            output_format.count_placeholder, f"{subjects_count:,d}"
+        )
+
+    return template
+
+
+def get_datasets_order(output_formats: List[formats.OutputFormat]) -> List[str]:
     """
-    Generates the hosts deny file.
+    Provides the order to read the datasets of the given formats in, so that
+    each dataset is read once and each format still gets its datasets in
+    order.
 
-    :param args:
-        The files to read and convert.
+    :param output_formats:
+        The formats to generate.
+
+    :raise ValueError:
+        When the datasets of the given formats can't be ordered.
     """
 
-    template_file = os.path.join(
-        outputs.TEMPLATE_DIR, outputs.HOSTS_DENY_TEMPLATE_FILENAME
-    )
+    result = []
 
-    with open(template_file, "r", encoding="utf-8") as file_stream:
-        template = file_stream.read()
+    for output_format in output_formats:
+        for dataset in output_format.datasets:
+            if dataset not in result:
+                result.append(dataset)
 
-    subjects_count = 0
+    for output_format in output_formats:
+        positions = [result.index(x) for x in output_format.datasets]
 
-    for file in args:
-        with open(file, "r", encoding="utf-8") as file_stream:
-            for line in file_stream:
-                if not line.strip():
-                    continue
+        if positions != sorted(positions):
+            raise ValueError(
+                f"<output_formats> ({output_format.name!r}) can't be generated "
+                "with the others in a single pass."
+            )
 
-                subjects_count += 1
+    return result
 
-    template = template.replace("%%version%%", infrastructure.VERSION)
-    template = template.replace("%%lenIP%%", f"{subjects_count:,d}")
-
-    generate_next_file(
-        outputs.HOSTS_DENY_DIR,
-        outputs.INCOMPLETE_HOSTS_DENY_FILENAME,
-        "ALL: {0}",
-        args,
-        template=template,
-        endline="# ##### END hosts.deny Block List # DO NOT EDIT #####",
-    )
 
+def get_input_key(inputs: List[Union[str, Iterable[str]]]) -> Tuple[Any, ...]:
+    """
+    Provides what identifies the given files (or in-memory subjects): their
+    resolved paths - or their identity.
 
-def superhosts_deny(*args: List[str]) -> None:
+    :param inputs:
+        The files (or in-memory subjects) to identify.
     """
-    Generates the superhosts deny file.
 
-    :param args:
-        The files to read and convert.
+    return tuple(os.path.realpath(x) if isinstance(x, str) else id(x) for x in inputs)
+
+
+def get_reading_order(
+    output_formats: List[formats.OutputFormat],
+    datasets: Dict[str, List[Union[str, Iterable[str]]]],
+) -> List[List[str]]:
+    """
+    Provides the order to read the datasets of the given formats in - see
+    :py:func:`get_datasets_order` - grouped by input: the datasets reading the
+    same files (or in-memory subjects) are read once, together.
+
+    :param output_formats:
+        The formats to generate.
+    :param datasets:
+        The files (or in-memory subjects) of each dataset.
     """
 
-    template_file = os.path.join(
-        outputs.TEMPLATE_DIR, outputs.SUPER_HOSTS_DENY_TEMPLATE_FILENAME
-    )
+    datasets_order = get_datasets_order(output_formats)
+    keys = {x: get_input_key(datasets[x]) for x in datasets_order}
 
-    with open(template_file, "r", encoding="utf-8") as file_stream:
-        template = file_stream.read()
+    # A group is read at the position of its last dataset: the formats
+    # reading its other datasets may expect other datasets first.
+    last_positions = {keys[x]: index for index, x in enumerate(datasets_order)}
 
-    subjects_count = 0
+    result = [
+        [y for y in datasets_order if keys[y] == keys[x]]
+        for index, x in enumerate(datasets_order)
+        if last_positions[keys[x]] == index
+    ]
 
-    for file in args:
-        with open(file, "r", encoding="utf-8") as file_stream:
-            for line in file_stream:
-                if not line.strip():
-                    continue
+    group_positions = {y: index for index, x in enumerate(result) for y in x}
 
-                subjects_count += 1
+    for output_format in output_formats:
+        positions = [group_positions[x] for x in output_format.datasets]
 
-    template = template.replace("%%version%%", infrastructure.VERSION)
-    template = template.replace("%%lenIPHosts%%", f"{subjects_count:,d}")
-
-    generate_next_file(
-        outputs.SUPER_HOSTS_DENY_DIR,
-        outputs.INCOMPLETE_SUPER_HOSTS_DENY_FILENAME,
-        "ALL: {0}",
-        args,
-        template=template,
-        endline="# ##### END Super hosts.deny Block List # DO NOT EDIT #####",
-    )
+        if any(x >= y for x, y in zip(positions, positions[1:])):
+            logging.debug(
+                "Can't group the datasets of %r: reading them one by one.",
+                output_format.name,
+            )
+            return [[x] for x in datasets_order]
 
+    return result
 
-def unix_hosts(*args: List[str]) -> None:
+
+def generate_formats(
+    output_formats: List[formats.OutputFormat],
+    datasets: Dict[str, List[Union[str, Iterable[str]]]],
+    *,
+    chunking_mode: str = "fixed",
+    file_hashes: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    Generates all the given formats in a single streaming pass: each input -
+    even when shared by multiple datasets - is read once and each of its
+    subjects is written into all the formats reading it. See
+    :py:func:`get_reading_order`.
+
+    The chunks are first written into a staging directory. Only the chunks
+    which differ from the ones already present in the output directory are
+    then moved into it. The others are left untouched - so is their mtime.
+
+    The chunks - the new and the already present ones - are hashed by a pool
+    of threads while we are still writing. See :py:func:`get_file_hash`.
+
+    :param output_formats:
+        The formats to generate.
+    :param datasets:
+        The files (or in-memory subjects) of each dataset. See
+        :py:func:`read_input`.
+    :param chunking_mode:
+        The chunking mode to apply. See :py:class:`ChunkedWriter`.
+    :param file_hashes:
+        The hashes of the files of the current generation - by path. See
+        :py:func:`get_file_hash`.
+
+    :return:
+        The number of files which actually changed.
     """
-    Generates the UNIX hosts file.
 
-    :param args:
-        The files to read and convert.
+    reading_order = get_reading_order(output_formats, datasets)
+
+    subjects_counts = {}
+
+    for group in reading_order:
+        inputs = datasets[group[0]]
+
+        if all(not isinstance(x, str) for x in inputs):
+            subjects_count = sum(len(x) for x in inputs)
+        else:
+            subjects_count = sum(1 for _ in iter_lines(inputs))
+
+        subjects_counts.update((x, subjects_count) for x in group)
+
+    with contextlib.ExitStack() as stack:
+        hasher = stack.enter_context(concurrent.futures.ThreadPoolExecutor())
+        hashes = []
+        writers = {}
+
+        for output_format in output_formats:
+            if os.path.isdir(output_format.directory):
+                for file in os.listdir(output_format.directory):
+                    file = os.path.join(output_format.directory, file)
+
+                    if os.path.isfile(file):
+                        hashes.append(hasher.submit(get_file_hash, file, file_hashes))
+
+            writers[output_format.name] = ChunkedWriter(
+                output_format,
+                stack.enter_context(staging_directory(output_format.directory)),
+                template=get_template(
+                    output_format,
+                    sum(subjects_counts[x] for x in output_format.datasets),
+                ),
+                chunking_mode=chunking_mode,
+                hasher=hasher,
+                file_hashes=file_hashes,
+            )
+            stack.callback(writers[output_format.name].abort)
+
+        for group in reading_order:
+            group_writers = [
+                writers[x.name]
+                for x in output_formats
+                if any(y in x.datasets for y in group)
+            ]
+
+            logging.info(
+                "Started to write %r into %r",
+                group,
+                [x.output_format.name for x in group_writers],
+            )
+
+            for line in iter_lines(datasets[group[0]]):
+                for writer in group_writers:
+                    writer.write(line)
+
+        for output_format in output_formats:
+            writers[output_format.name].close()
+            hashes.extend(writers[output_format.name].hashes)
+
+        concurrent.futures.wait(hashes)
+
+        changed_files = 0
+
+        for output_format in output_formats:
+            changed_files += sync_directory(
+                writers[output_format.name].staging_dir,
+                output_format.directory,
+                file_hashes,
+            )
+
+        return changed_files
+
+
+def binary_index(*args: List[str], file_hashes: Optional[Dict[str, str]] = None) -> int:
     """
+    Generates the memory-mappable binary index of our domains and IPs.
 
-    template_file = os.path.join(
-        outputs.TEMPLATE_DIR, outputs.UNIX_HOSTS_TEMPLATE_FILENAME
-    )
+    :param args:
+        The files (or in-memory subjects) to read and convert.
+    :param file_hashes:
+        The hashes of the files of the current generation - by path. See
+        :py:func:`get_file_hash`.
 
-    with open(template_file, "r", encoding="utf-8") as file_stream:
-        template = file_stream.read()
+    :return:
+        The number of files which actually changed.
+    """
 
-    subjects_count = 0
+    with staging_directory(outputs.BINARY_INDEX_DIR) as staging_dir:
+        destination = os.path.join(staging_dir, outputs.BINARY_INDEX_FILENAME)
 
-    for file in args:
-        with open(file, "r", encoding="utf-8") as file_stream:
-            for line in file_stream:
-                if not line.strip():
-                    continue
+        logging.info("Started Generation of %r", destination)
 
-                subjects_count += 1
+        entries_count, size = index.write(
+            destination, iter_lines(args), version=infrastructure.VERSION
+        )
 
-    template = template.replace("%%version%%", infrastructure.VERSION)
-    template = template.replace("%%lenHosts%%", f"{subjects_count:,d}")
-
-    generate_next_file(
-        outputs.UNIX_HOSTS_DIR,
-        outputs.INCOMPLETE_UNIX_HOSTS_FILENAME,
-        "0.0.0.0 {0}",
-        args,
-        template=template,
-        endline="# END HOSTS LIST ### DO NOT EDIT THIS LINE AT ALL ###",
-    )
+        logging.info(
+            "Finished Generation of %r (entries: %s, bytes: %s)",
+            destination,
+            f"{entries_count:,d}",
+            f"{size:,d}",
+        )
 
+        return sync_directory(staging_dir, outputs.BINARY_INDEX_DIR, file_hashes)
 
-def windows_hosts(*args: List[str]) -> None:
+
+def bloom_filter(
+    *args: List[str],
+    false_positive_rate: float = outputs.BLOOM_FILTER_FALSE_POSITIVE_RATE,
+    file_hashes: Optional[Dict[str, str]] = None,
+) -> int:
     """
-    Generates the Windows hosts file.
+    Generates the Bloom filter of our domains.
 
     :param args:
-        The files to read and convert.
+        The files (or in-memory subjects) to read and convert.
+    :param false_positive_rate:
+        The wanted false positive rate.
+    :param file_hashes:
+        The hashes of the files of the current generation - by path. See
+        :py:func:`get_file_hash`.
+
+    :return:
+        The number of files which actually changed.
     """
 
-    template_file = os.path.join(
-        outputs.TEMPLATE_DIR, outputs.WINDOWS_HOSTS_TEMPLATE_FILENAME
-    )
+    subjects_count = sum(1 for _ in iter_lines(args))
 
-    with open(template_file, "r", encoding="utf-8") as file_stream:
-        template = file_stream.read()
+    with staging_directory(outputs.BLOOM_FILTER_DIR) as staging_dir:
+        destination = os.path.join(staging_dir, outputs.BLOOM_FILTER_FILENAME)
 
-    subjects_count = 0
+        logging.info("Started Generation of %r", destination)
 
-    for file in args:
-        with open(file, "r", encoding="utf-8") as file_stream:
-            for line in file_stream:
-                if not line.strip():
-                    continue
+        start_time = time.perf_counter()
+        bloom_filter_obj = bloom.BloomFilter(subjects_count, false_positive_rate)
 
-                subjects_count += 1
+        for line in iter_lines(args):
+            bloom_filter_obj.add(line)
 
-    template = template.replace("%%version%%", infrastructure.VERSION)
-    template = template.replace("%%lenHosts%%", f"{subjects_count:,d}")
-
-    generate_next_file(
-        outputs.WINDOWS_HOSTS_DIR,
-        outputs.INCOMPLETE_WINDOWS_HOSTS_FILENAME,
-        "127.0.0.1 {0}",
-        args,
-        template=template,
-        endline="# END HOSTS LIST ### DO NOT EDIT THIS LINE AT ALL ###",
-        write_mode="crlf",
-    )
+        size = bloom_filter_obj.dump(destination, version=infrastructure.VERSION)
+        build_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        lookups_count = 0
+
+        for line in itertools.islice(iter_lines(args), 100_000):
+            bloom_filter_obj.might_contain(line)
+            lookups_count += 1
+
+        lookup_time = time.perf_counter() - start_time
+
+        logging.info(
+            "Finished Generation of %r (entries: %s, bytes: %s, hash functions: %d, "
+            "build time: %.3fs, lookups: %s/s)",
+            destination,
+            f"{subjects_count:,d}",
+            f"{size:,d}",
+            bloom_filter_obj.hash_count,
+            build_time,
+            f"{lookups_count / lookup_time if lookup_time else 0:,.0f}",
+        )
+
+        return sync_directory(staging_dir, outputs.BLOOM_FILTER_DIR, file_hashes)
 
 
 def readme_md(
@@ -335,7 +821,7 @@ def readme_md(
     Generates the Windows hosts file.
 
     :param args:
-        The files to read and convert.
+        The files (or in-memory subjects) to read and convert.
     """
 
     destination = os.path.join(outputs.CURRENT_DIRECTORY, outputs.README_FILENAME)
@@ -346,24 +832,8 @@ def readme_md(
     with open(template_file, "r", encoding="utf-8") as file_stream:
         template = file_stream.read()
 
-    domains_count = 0
-    ips_count = 0
-
-    for file in domains_files:
-        with open(file, "r", encoding="utf-8") as file_stream:
-            for line in file_stream:
-                if not line.strip():
-                    continue
-
-                domains_count += 1
-
-    for file in ip_files:
-        with open(file, "r", encoding="utf-8") as file_stream:
-            for line in file_stream:
-                if not line.strip():
-                    continue
-
-                ips_count += 1
+    domains_count = sum(1 for _ in iter_lines(domains_files))
+    ips_count = sum(1 for _ in iter_lines(ip_files))
 
     data = []
 
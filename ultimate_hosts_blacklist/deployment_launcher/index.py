@@ -0,0 +1,385 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides our memory-mappable binary index and its
+lookup API.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import mmap
+import os
+import struct
+from typing import BinaryIO, Generator, Iterable, List, Optional, Tuple
+
+MAGIC: bytes = b"UHBINDEX"
+FORMAT_VERSION: int = 1
+ENTRIES_PER_BLOCK: int = 16
+
+#: magic, format version, entries per block, release version, number of
+#: entries, number of blocks, offset of the offset table, offset of the string
+#: block.
+HEADER_FORMAT: str = "<8sHH32sQQQQ"
+HEADER_SIZE: int = struct.calcsize(HEADER_FORMAT)
+OFFSET_FORMAT: str = "<Q"
+OFFSET_SIZE: int = struct.calcsize(OFFSET_FORMAT)
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Encodes the given (unsigned) integer as a LEB128 varint.
+
+    :param value:
+        The value to encode.
+    """
+
+    result = bytearray()
+
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+
+        if value:
+            result.append(byte | 0x80)
+        else:
+            result.append(byte)
+            return bytes(result)
+
+
+def decode_varint(buffer: bytes, position: int) -> Tuple[int, int]:
+    """
+    Decodes the LEB128 varint at the given position.
+
+    :param buffer:
+        The buffer to read from.
+    :param position:
+        The position to start reading at.
+
+    :return:
+        The decoded value and the position right after it.
+    """
+
+    result = 0
+    shift = 0
+
+    while True:
+        byte = buffer[position]
+        position += 1
+
+        result |= (byte & 0x7F) << shift
+
+        if not byte & 0x80:
+            return result, position
+
+        shift += 7
+
+
+def normalize(subject: str) -> bytes:
+    """
+    Provides the representation of the given subject as stored into the index.
+
+    :param subject:
+        The domain or IP to normalize.
+    """
+
+    return subject.strip().lower().rstrip(".").encode("utf-8")
+
+
+def encode_block(entries: List[bytes]) -> bytes:
+    """
+    Front-codes the given sorted entries into a single block.
+
+    The first entry is stored as is, the others are stored as the length of
+    the prefix they share with the previous entry followed by their suffix.
+
+    :param entries:
+        The sorted entries to encode.
+    """
+
+    result = bytearray()
+    previous = b""
+
+    for index, entry in enumerate(entries):
+        if index == 0:
+            result += encode_varint(len(entry))
+            result += entry
+        else:
+            shared = 0
+            max_shared = min(len(previous), len(entry))
+
+            while shared < max_shared and previous[shared] == entry[shared]:
+                shared += 1
+
+            result += encode_varint(shared)
+            result += encode_varint(len(entry) - shared)
+            result += entry[shared:]
+
+        previous = entry
+
+    return bytes(result)
+
+
+def write(
+    destination: str, entries: Iterable[str], *, version: str = ""
+) -> Tuple[int, int]:
+    """
+    Writes the binary index of the given entries.
+
+    :param destination:
+        The file to write.
+    :param entries:
+        The entries (domains or IPs) to index. They don't need to be sorted
+        nor unique.
+    :param version:
+        The release version to store into the header.
+
+    :return:
+        The number of indexed entries and the number of written bytes.
+    """
+
+    sorted_entries = sorted({normalize(x) for x in entries if x.strip()})
+
+    offsets = []
+    strings = bytearray()
+
+    for start in range(0, len(sorted_entries), ENTRIES_PER_BLOCK):
+        offsets.append(len(strings))
+        strings += encode_block(sorted_entries[start : start + ENTRIES_PER_BLOCK])
+
+    offsets_position = HEADER_SIZE
+    strings_position = offsets_position + len(offsets) * OFFSET_SIZE
+
+    with open(destination, "wb") as file_stream:
+        file_stream.write(
+            struct.pack(
+                HEADER_FORMAT,
+                MAGIC,
+                FORMAT_VERSION,
+                ENTRIES_PER_BLOCK,
+                version.encode("utf-8")[:32],
+                len(sorted_entries),
+                len(offsets),
+                offsets_position,
+                strings_position,
+            )
+        )
+
+        for offset in offsets:
+            file_stream.write(struct.pack(OFFSET_FORMAT, offset))
+
+        file_stream.write(strings)
+
+        return len(sorted_entries), file_stream.tell()
+
+
+class BlocklistIndex:
+    """
+    Provides the lookup API on top of a binary index. The index is directly
+    used from :py:mod:`mmap` - there is no parsing step.
+
+    Example:
+
+    ::
+
+        with BlocklistIndex("blocklist.idx") as index:
+            "example.org" in index
+            index.find_suffix("ads.example.org")
+
+    :param path:
+        The path of the binary index to open.
+    """
+
+    version: Optional[str] = None
+    entries_count: int = 0
+    blocks_count: int = 0
+    entries_per_block: int = ENTRIES_PER_BLOCK
+
+    _file_stream: Optional[BinaryIO] = None
+    _buffer: Optional[mmap.mmap] = None
+    _offsets_position: int = 0
+    _strings_position: int = 0
+
+    def __init__(self, path: str) -> None:
+        self._file_stream = open(path, "rb")
+
+        if os.fstat(self._file_stream.fileno()).st_size < HEADER_SIZE:
+            self._file_stream.close()
+            raise ValueError(f"<path> ({path!r}) is not a valid index.")
+
+        self._buffer = mmap.mmap(self._file_stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            format_version,
+            self.entries_per_block,
+            version,
+            self.entries_count,
+            self.blocks_count,
+            self._offsets_position,
+            self._strings_position,
+        ) = struct.unpack_from(HEADER_FORMAT, self._buffer, 0)
+
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"<path> ({path!r}) is not a supported index.")
+
+        self.version = version.rstrip(b"\x00").decode("utf-8")
+
+    def __enter__(self) -> "BlocklistIndex":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.entries_count
+
+    def __contains__(self, subject: str) -> bool:
+        return self.contains(subject)
+
+    def __iter__(self) -> Generator[str, None, None]:
+        for block in range(self.blocks_count):
+            for entry in self._decode_block(block):
+                yield entry.decode("utf-8")
+
+    def close(self) -> None:
+        """
+        Closes the underlying mapping and file.
+        """
+
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+        if self._file_stream is not None:
+            self._file_stream.close()
+            self._file_stream = None
+
+    def _get_block_position(self, block: int) -> int:
+        """
+        Provides the position of the given block into the buffer.
+        """
+
+        return (
+            self._strings_position
+            + struct.unpack_from(
+                OFFSET_FORMAT,
+                self._buffer,
+                self._offsets_position + block * OFFSET_SIZE,
+            )[0]
+        )
+
+    def _get_block_head(self, block: int) -> bytes:
+        """
+        Provides the first entry of the given block.
+        """
+
+        length, position = decode_varint(self._buffer, self._get_block_position(block))
+
+        return self._buffer[position : position + length]
+
+    def _decode_block(self, block: int) -> Generator[bytes, None, None]:
+        """
+        Decodes all entries of the given block.
+        """
+
+        position = self._get_block_position(block)
+        entries_count = min(
+            self.entries_per_block,
+            self.entries_count - block * self.entries_per_block,
+        )
+
+        length, position = decode_varint(self._buffer, position)
+        previous = self._buffer[position : position + length]
+        position += length
+
+        yield previous
+
+        for _ in range(entries_count - 1):
+            shared, position = decode_varint(self._buffer, position)
+            length, position = decode_varint(self._buffer, position)
+
+            previous = previous[:shared] + self._buffer[position : position + length]
+            position += length
+
+            yield previous
+
+    def contains(self, subject: str) -> bool:
+        """
+        Checks if the given subject is listed.
+
+        :param subject:
+            The domain or IP to look for.
+        """
+
+        if not self.blocks_count:
+            return False
+
+        needle = normalize(subject)
+
+        low, high = 0, self.blocks_count
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._get_block_head(middle) <= needle:
+                low = middle + 1
+            else:
+                high = middle
+
+        if not low:
+            return False
+
+        for entry in self._decode_block(low - 1):
+            if entry == needle:
+                return True
+
+            if entry > needle:
+                break
+
+        return False
+
+    def find_suffix(self, subject: str) -> Optional[str]:
+        """
+        Provides the most specific listed entry covering the given domain,
+        that is the domain itself or one of its parents.
+
+        :param subject:
+            The domain to look for.
+        """
+
+        labels = normalize(subject).decode("utf-8").split(".")
+
+        for index in range(len(labels)):
+            candidate = ".".join(labels[index:])
+
+            if self.contains(candidate):
+                return candidate
+
+        return None
@@ -0,0 +1,190 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides the manifest of our releases: the path, size
+and hash of each of our output files.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import concurrent.futures
+import itertools
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from PyFunceble.helpers.file import FileHelper
+
+from ultimate_hosts_blacklist.deployment_launcher import generator
+from ultimate_hosts_blacklist.deployment_launcher.defaults import outputs
+
+
+def get_manifest_file(directory: str = outputs.CURRENT_DIRECTORY) -> str:
+    """
+    Provides the path of the manifest of the given (output) directory.
+    """
+
+    return os.path.join(directory, outputs.MANIFEST_FILENAME)
+
+
+def is_safe_path(path: str) -> bool:
+    """
+    Checks that the given manifest path stays into the directory it is
+    relative to.
+    """
+
+    parts = path.split("/")
+
+    return (
+        bool(path)
+        and not path.startswith("/")
+        and ".." not in parts
+        and "" not in parts
+    )
+
+
+def build(
+    paths: Iterable[str],
+    *,
+    version: str,
+    root: str = outputs.CURRENT_DIRECTORY,
+    file_hashes: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the manifest of the given files. The files are hashed by a pool of
+    threads - the ones we hashed while generating them are not hashed again.
+    See :py:func:`~ultimate_hosts_blacklist.deployment_launcher.generator.get_file_hash`.
+
+    :param paths:
+        The files and directories (read recursively) to describe.
+    :param version:
+        The version of the release.
+    :param root:
+        The directory the paths of the manifest are relative to.
+    :param file_hashes:
+        The hashes of the files we just generated - by path.
+    """
+
+    files = []
+
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+        elif os.path.isdir(path):
+            for directory, _, filenames in os.walk(path):
+                files.extend(os.path.join(directory, x) for x in filenames)
+
+    files.sort()
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        hashes = executor.map(
+            generator.get_file_hash, files, itertools.repeat(file_hashes)
+        )
+
+        return {
+            "version": version,
+            "files": {
+                os.path.relpath(file, root).replace(os.sep, "/"): {
+                    "size": os.path.getsize(file),
+                    "sha256": file_hash,
+                }
+                for file, file_hash in zip(files, hashes)
+            },
+        }
+
+
+def load(manifest_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Provides the content of the given manifest.
+
+    :return:
+        :py:data:`None` if the manifest does not exist or can't be decoded.
+    """
+
+    if FileHelper(manifest_file).exists():
+        with open(manifest_file, "r", encoding="utf-8") as file_stream:
+            try:
+                return json.load(file_stream)
+            except json.decoder.JSONDecodeError:
+                logging.critical("Could not decode (manifest): %s", manifest_file)
+
+    return None
+
+
+def save(manifest: Dict[str, Any], manifest_file: str) -> None:
+    """
+    Saves the given manifest.
+    """
+
+    with open(manifest_file, "w", encoding="utf-8") as file_stream:
+        json.dump(manifest, file_stream, indent=4)
+        file_stream.write("\n")
+
+
+def diff(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Provides the difference between two manifests: the files which were
+    added or changed and the ones which were deleted.
+
+    :param previous:
+        The previous manifest. :py:data:`None` means that every file changed.
+    :param current:
+        The current manifest.
+    """
+
+    previous_files = previous["files"] if previous else {}
+
+    return {
+        "version": current["version"],
+        "previous_version": previous["version"] if previous else None,
+        "changed": {
+            path: details
+            for path, details in current["files"].items()
+            if previous_files.get(path) != details
+        },
+        "deleted": sorted(set(previous_files) - set(current["files"])),
+    }
+
+
+def apply_diff(
+    previous: Dict[str, Any], manifest_diff: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Provides the manifest we get by applying the given difference to the given
+    (previous) manifest.
+    """
+
+    files = dict(previous["files"])
+    files.update(manifest_diff["changed"])
+
+    for path in manifest_diff["deleted"]:
+        files.pop(path, None)
+
+    return {"version": manifest_diff["version"], "files": dict(sorted(files.items()))}
@@ -0,0 +1,208 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides the reference client which keeps a mirror in
+sync with our releases.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import concurrent.futures
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import requests
+from PyFunceble.helpers.directory import DirectoryHelper
+from PyFunceble.helpers.file import FileHelper
+
+from ultimate_hosts_blacklist.deployment_launcher import manifest
+from ultimate_hosts_blacklist.deployment_launcher.defaults import (
+    infrastructure,
+    outputs,
+)
+
+
+def download(
+    session: requests.Session,
+    url: str,
+    destination: str,
+    *,
+    size: int,
+    sha256: str,
+) -> int:
+    """
+    Downloads the given file and atomically moves it into its destination
+    - once its size and hash are checked.
+
+    :raise ValueError:
+        When the downloaded file does not match the given size or hash.
+
+    :return:
+        The number of downloaded bytes.
+    """
+
+    DirectoryHelper(os.path.dirname(destination)).create()
+
+    hasher = hashlib.sha256()
+    downloaded = 0
+
+    with session.get(
+        url, stream=True, timeout=infrastructure.DEPLOYMENT_REQUEST_TIMEOUT
+    ) as response:
+        response.raise_for_status()
+
+        with tempfile.NamedTemporaryFile(
+            "wb",
+            dir=os.path.dirname(destination),
+            prefix=f".{os.path.basename(destination)}.",
+            delete=False,
+        ) as file_stream:
+            try:
+                for block in response.iter_content(chunk_size=64 * 1024):
+                    hasher.update(block)
+                    file_stream.write(block)
+                    downloaded += len(block)
+            except BaseException:
+                FileHelper(file_stream.name).delete()
+                raise
+
+    if downloaded != size or hasher.hexdigest() != sha256:
+        FileHelper(file_stream.name).delete()
+        raise ValueError(f"{url!r} does not match our manifest.")
+
+    os.replace(file_stream.name, destination)
+
+    return downloaded
+
+
+def sync(
+    base_url: str,
+    directory: str,
+    *,
+    manifest_diff: Optional[Dict[str, Any]] = None,
+    max_workers: int = 8,
+) -> Dict[str, int]:
+    """
+    Brings the given (mirror) directory to the latest release published under
+    the given URL.
+
+    Only the files which differ from the ones described by the local manifest
+    are downloaded. Our manifest is saved last, so an interrupted
+    synchronization is simply restarted.
+
+    :param base_url:
+        The URL our releases are published under.
+    :param directory:
+        The directory to synchronize.
+    :param manifest_diff:
+        The difference sent with the deployment request. It is used - instead
+        of downloading the whole manifest - when it starts from our local
+        release.
+    :param max_workers:
+        The number of files to download at once.
+
+    :raise ValueError:
+        When the published manifest contains an unsafe path or when a
+        downloaded file does not match it.
+
+    :return:
+        The number of downloaded files and bytes and the number of deleted
+        files.
+    """
+
+    base_url = base_url.rstrip("/")
+    manifest_file = manifest.get_manifest_file(directory)
+    local_manifest = manifest.load(manifest_file)
+
+    with requests.Session() as session:
+        session.headers["User-Agent"] = infrastructure.DEPLOYMENT_USER_AGENT
+
+        if (
+            manifest_diff
+            and local_manifest
+            and manifest_diff["previous_version"] == local_manifest["version"]
+        ):
+            new_manifest = manifest.apply_diff(local_manifest, manifest_diff)
+        else:
+            response = session.get(
+                f"{base_url}/{outputs.MANIFEST_FILENAME}",
+                timeout=infrastructure.DEPLOYMENT_REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()
+
+            new_manifest = response.json()
+
+        changes = manifest.diff(local_manifest, new_manifest)
+
+        for path in list(changes["changed"]) + changes["deleted"]:
+            if not manifest.is_safe_path(path):
+                raise ValueError(f"Unsafe path into the manifest: {path!r}")
+
+        logging.info(
+            "Started to sync %r to %r (changed: %d, deleted: %d).",
+            directory,
+            new_manifest["version"],
+            len(changes["changed"]),
+            len(changes["deleted"]),
+        )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            downloaded = sum(
+                executor.map(
+                    lambda item: download(
+                        session,
+                        f"{base_url}/{item[0]}",
+                        os.path.join(directory, *item[0].split("/")),
+                        size=item[1]["size"],
+                        sha256=item[1]["sha256"],
+                    ),
+                    changes["changed"].items(),
+                )
+            )
+
+    for path in changes["deleted"]:
+        FileHelper(os.path.join(directory, *path.split("/"))).delete()
+
+    manifest.save(new_manifest, manifest_file)
+
+    logging.info(
+        "Finished to sync %r to %r (bytes downloaded: %s).",
+        directory,
+        new_manifest["version"],
+        f"{downloaded:,d}",
+    )
+
+    return {
+        "downloaded": len(changes["changed"]),
+        "bytes": downloaded,
+        "deleted": len(changes["deleted"]),
+    }
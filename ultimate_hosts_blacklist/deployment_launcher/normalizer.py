@@ -0,0 +1,213 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+Provides the normalization of the fetched data.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import logging
+import os
+import socket
+import time
+from typing import List, Tuple
+
+#: The (approximate) number of characters we read and normalize at once.
+BATCH_SIZE: int = 4_194_304
+
+
+def canonicalize_ipv6(subject: str) -> str:
+    """
+    Provides the canonical (RFC 5952) representation of the given IPv6 or
+    IPv6 network. Anything else is returned as is.
+
+    :param subject:
+        The subject to canonicalize.
+    """
+
+    address, separator, prefix_length = subject.partition("/")
+
+    try:
+        address = socket.inet_ntop(
+            socket.AF_INET6, socket.inet_pton(socket.AF_INET6, address)
+        )
+    except (OSError, ValueError):
+        return subject
+
+    return f"{address}{separator}{prefix_length}"
+
+
+def to_idna(subject: str) -> str:
+    """
+    Provides the punycode representation of the given (Unicode) domain.
+    Anything which can't be converted is returned as is.
+
+    :param subject:
+        The domain to convert.
+    """
+
+    try:
+        return subject.encode("idna").decode("ascii")
+    except UnicodeError:
+        return subject
+
+
+def normalize_batch(lines: List[str]) -> List[str]:
+    """
+    Normalizes the given lines: strips them, lowercases them, removes their
+    trailing dots, converts IDNs to punycode and canonicalizes the IPv6.
+    Empty lines are dropped.
+
+    Only :code:`\\n` ends a line - unlike :py:meth:`str.splitlines`.
+
+    The lowercasing is applied once on the whole batch. Only the lines which
+    need it go through the (slow) IDNA and IPv6 conversions.
+
+    :param lines:
+        The lines to normalize.
+    """
+
+    result = []
+
+    for line in "".join(lines).lower().split("\n"):
+        line = line.strip().rstrip(".")
+
+        if not line:
+            continue
+
+        if not line.isascii():
+            line = to_idna(line)
+        elif ":" in line:
+            line = canonicalize_ipv6(line)
+
+        result.append(line)
+
+    return result
+
+
+def decode_batch(lines: List[bytes]) -> Tuple[List[str], int]:
+    """
+    Decodes the given (UTF-8) lines. The ones which can't be decoded are
+    dropped.
+
+    :param lines:
+        The lines to decode.
+
+    :return:
+        The decoded lines and the number of dropped ones.
+    """
+
+    try:
+        return [b"".join(lines).decode("utf-8")], 0
+    except UnicodeDecodeError:
+        pass
+
+    result = []
+    dropped_count = 0
+
+    for line in lines:
+        try:
+            result.append(line.decode("utf-8"))
+        except UnicodeDecodeError:
+            dropped_count += 1
+
+    return result, dropped_count
+
+
+def normalize_file(file: str) -> Tuple[int, int]:
+    """
+    Normalizes (see :py:func:`normalize_batch`) and dedupes the given file.
+    The file is rewritten in place and the order of the first occurrences is
+    kept. The lines which aren't valid UTF-8 are dropped.
+
+    :param file:
+        The file to normalize.
+
+    :return:
+        The number of read lines and the number of written ones.
+    """
+
+    logging.info("Started normalization of %r.", file)
+
+    start_time = time.perf_counter()
+
+    seen = set()
+    read_count = 0
+    written_count = 0
+    duplicates_count = 0
+    undecodable_count = 0
+
+    temporary_file = f"{file}.{os.getpid()}.normalizing"
+
+    with open(file, "rb") as file_stream, open(
+        temporary_file, "w", encoding="utf-8"
+    ) as destination_file_stream:
+        while True:
+            lines = file_stream.readlines(BATCH_SIZE)
+
+            if not lines:
+                break
+
+            read_count += len(lines)
+
+            lines, dropped_count = decode_batch(lines)
+            undecodable_count += dropped_count
+
+            for line in normalize_batch(lines):
+                if line in seen:
+                    duplicates_count += 1
+                    continue
+
+                seen.add(line)
+                destination_file_stream.write(f"{line}\n")
+                written_count += 1
+
+    os.replace(temporary_file, file)
+
+    elapsed = time.perf_counter() - start_time
+
+    if undecodable_count:
+        logging.warning(
+            "Dropped %s line(s) of %r which aren't valid UTF-8.",
+            f"{undecodable_count:,d}",
+            file,
+        )
+
+    logging.info(
+        "Finished normalization of %r (read: %s, written: %s, "
+        "duplicates removed: %s, time: %.3fs, %s lines/s).",
+        file,
+        f"{read_count:,d}",
+        f"{written_count:,d}",
+        f"{duplicates_count:,d}",
+        elapsed,
+        f"{read_count / elapsed if elapsed else 0:,.0f}",
+    )
+
+    return read_count, written_count
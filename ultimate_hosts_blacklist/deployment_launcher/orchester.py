@@ -35,12 +35,23 @@ License:
 import concurrent.futures
 import contextlib
 import heapq
+import io
+import itertools
 import logging
 import os
-import secrets
 import tempfile
 import time
-from typing import Dict, Generator, List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import PyFunceble.facility
 import PyFunceble.storage
@@ -50,14 +61,35 @@ from PyFunceble.checker.syntax.ip import IPSyntaxChecker
 from PyFunceble.cli.continuous_integration.base import ContinuousIntegrationBase
 from PyFunceble.cli.continuous_integration.exceptions import StopExecution
 from PyFunceble.cli.continuous_integration.utils import ci_object
-from PyFunceble.cli.processes.file_sorter import FileSorterProcessesManager
 from PyFunceble.helpers.download import DownloadHelper
 from PyFunceble.helpers.exceptions import UnableToDownload
 from PyFunceble.helpers.file import FileHelper
 from ultimate_hosts_blacklist.whitelist.core import Core as WhitelistCore
 
-from ultimate_hosts_blacklist.deployment_launcher import deployer, generator
-from ultimate_hosts_blacklist.deployment_launcher.defaults import hubgit, infrastructure
+from ultimate_hosts_blacklist.deployment_launcher import (
+    cache,
+    delta,
+    deployer,
+    distributed,
+    domainset,
+    formats,
+    generator,
+    manifest,
+    normalizer,
+    profiling,
+    provenance,
+    reducer,
+    segment,
+    sorter,
+    store,
+    telemetry,
+    workspace,
+)
+from ultimate_hosts_blacklist.deployment_launcher.defaults import (
+    hubgit,
+    infrastructure,
+    outputs,
+)
 
 
 class Orchestration:
@@ -68,15 +100,116 @@ class Orchestration:
     ci_engine: Optional[ContinuousIntegrationBase] = None
     github_api: Optional[Github] = None
 
-    temp_dirs: Dict[str, tempfile.TemporaryDirectory] = dict()
-    temp_files: Dict[str, tempfile.NamedTemporaryFile] = dict()
-
     commit_message: Optional[str] = None
     debug: Optional[bool] = None
-
-    def __init__(self, *, debug: bool = False) -> None:
+    chunking_mode: Optional[str] = None
+    bloom_false_positive_rate: Optional[float] = None
+    aggregate_ips: Optional[bool] = None
+    in_memory: Optional[bool] = None
+    sorting_mode: Optional[str] = None
+    sorting_key: Optional[Callable[[str], Any]] = None
+    compact_hosts: Optional[int] = None
+    extra_formats: Optional[List[str]] = None
+    provenance_index: Optional[str] = None
+    entry_store: Optional[str] = None
+    update_sources: Optional[List[str]] = None
+    transport: Optional[str] = None
+    nodes: Optional[List[str]] = None
+    telemetry_report: Optional[str] = None
+    prometheus_textfile: Optional[str] = None
+    profiler: Optional[profiling.Profiler] = None
+    workspace: Optional["workspace.Workspace"] = None
+    info_dir: Optional[str] = None
+
+    stages: List[Tuple[str, Dict[str, Any]]] = list()
+    resume_point: Optional[str] = None
+    sources: List[str] = list()
+    executor: Optional[concurrent.futures.Executor] = None
+    mirror_deployment: Optional[concurrent.futures.Future] = None
+    manifest_diff: Optional[Dict[str, Any]] = None
+    timings: Dict[str, float] = dict()
+    telemetry: Optional["telemetry.Telemetry"] = None
+    datasets: Dict[str, Union[str, Any]] = dict()
+
+    def __init__(
+        self,
+        *,
+        debug: bool = False,
+        chunking_mode: str = "fixed",
+        bloom_false_positive_rate: float = outputs.BLOOM_FILTER_FALSE_POSITIVE_RATE,
+        aggregate_ips: bool = False,
+        in_memory: bool = False,
+        sorting_mode: str = "standard",
+        compact_hosts: int = 0,
+        extra_formats: Optional[List[str]] = None,
+        provenance_index: Optional[str] = None,
+        entry_store: Optional[str] = None,
+        update_sources: Optional[List[str]] = None,
+        transport: str = "file",
+        nodes: Optional[List[str]] = None,
+        telemetry_report: Optional[str] = None,
+        prometheus_textfile: Optional[str] = None,
+        profiler: Optional[profiling.Profiler] = None,
+        github_api: Optional[Github] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+        workspace_dir: Optional[str] = None,
+        resume: bool = False,
+        hot_dir: Optional[str] = None,
+        workspace_quota: int = 0,
+    ) -> None:
         self.commit_message = f"[{infrastructure.VERSION}]"
         self.debug = debug
+        self.chunking_mode = chunking_mode
+        self.bloom_false_positive_rate = bloom_false_positive_rate
+        self.aggregate_ips = aggregate_ips
+        self.in_memory = in_memory
+        self.sorting_mode = sorting_mode
+        self.sorting_key = sorter.get_domain_sorting_key(sorting_mode)
+        self.compact_hosts = compact_hosts
+        self.extra_formats = list(extra_formats or [])
+        self.provenance_index = provenance_index
+        self.entry_store = entry_store
+        self.update_sources = list(update_sources or [])
+
+        if self.update_sources:
+            if not self.entry_store:
+                raise ValueError("<update_sources> requires an <entry_store>.")
+
+            # The datasets are loaded from the entry store.
+            self.in_memory = True
+
+        if resume and not workspace_dir:
+            raise ValueError("<resume> requires a <workspace_dir>.")
+
+        if transport not in outputs.TRANSPORTS:
+            raise ValueError("<transport> not supported.")
+
+        if transport == "shared_memory" and workspace_dir:
+            raise ValueError(
+                "<transport> 'shared_memory' can't be checkpointed into a "
+                "<workspace_dir>."
+            )
+
+        if transport == "shared_memory" and nodes:
+            raise ValueError("<transport> 'shared_memory' can't be used with <nodes>.")
+
+        self.transport = transport
+        self.nodes = list(nodes or [])
+        self.telemetry_report = telemetry_report
+        self.prometheus_textfile = prometheus_textfile
+        self.profiler = profiler
+
+        self.workspace = workspace.Workspace(
+            workspace_dir, resume=resume, hot_dir=hot_dir, quota=workspace_quota
+        )
+        self.info_dir = self.workspace.info_dir
+
+        logging.info("Workspace: %r", self.workspace.directory)
+        logging.info("Hot directory: %r", self.workspace.hot_dir)
+
+        self.sources = []
+        self.stages = []
+        self.resume_point = None
 
         self.ci_engine = ci_object(
             commit_message=self.commit_message,
@@ -89,30 +222,35 @@ class Orchestration:
         if self.ci_engine.authorized:
             self.ci_engine.init()
 
-        self.github_api = Github(hubgit.GITHUB_TOKEN)
-
-        self.temp_dirs = {
-            "ip": tempfile.TemporaryDirectory(),
-            "domain": tempfile.TemporaryDirectory(),
-            "info": tempfile.TemporaryDirectory(),
-        }
+        self.github_api = github_api or Github(hubgit.GITHUB_TOKEN)
+        self.executor = executor
+        self.timings = {}
+        self.telemetry = telemetry.Telemetry()
 
-        self.temp_files = {
-            "ip": tempfile.NamedTemporaryFile("w", delete=False),
-            "domain": tempfile.NamedTemporaryFile("w", delete=False),
+        self.datasets = {
+            "ip": self.workspace.create_file(),
+            "domain": self.workspace.create_file(),
         }
 
-        logging.info("Temporary IP directory: %r", self.temp_dirs["ip"].name)
-        logging.info("Temporary domain directory: %r", self.temp_dirs["domain"].name)
-        logging.info("Temporary IP file: %r", self.temp_files["ip"].name)
-        logging.info("Temporary domain file: %r", self.temp_files["domain"].name)
+        logging.info("Temporary IP file: %r", self.datasets["ip"])
+        logging.info("Temporary domain file: %r", self.datasets["domain"])
 
     def __del__(self) -> None:
-        for directory in self.temp_dirs.values():
-            directory.cleanup()
+        if self.workspace is not None:
+            self.workspace.close()
+
+    def delete_intermediate_file(self, file: Union[str, segment.LineSegment]) -> None:
+        """
+        Deletes the given intermediate file - unless it is kept into our
+        (persistent) workspace for a later resume.
+        """
 
-        for file in self.temp_files.values():
-            FileHelper(file.name).delete()
+        if isinstance(file, segment.LineSegment):
+            file.unlink()
+        elif not self.workspace.persistent or not file.startswith(
+            self.workspace.directory + os.sep
+        ):
+            FileHelper(file).delete()
 
     def get_repositories(self) -> Generator[None, str, None]:
         """
@@ -127,11 +265,92 @@ class Orchestration:
             yield repository.name
 
     @staticmethod
-    def fetch_data(repo_name: str, info_dir: str) -> Tuple[str]:
+    def is_valid_repository_name(repo_name: str) -> bool:
+        """
+        Checks if the given repository (source) name is valid. See
+        :py:data:`hubgit.REPOSITORY_NAME_PATTERN`.
+
+        :param repo_name:
+            The name to check.
+        """
+
+        return isinstance(repo_name, str) and bool(
+            hubgit.REPOSITORY_NAME_PATTERN.fullmatch(repo_name)
+        )
+
+    @staticmethod
+    def get_download_helper(url: str) -> DownloadHelper:
+        """
+        Provides the (process-wide) download helper - and therefore its HTTP
+        session - set to the given URL.
+
+        :param url:
+            The URL to download.
+        """
+
+        return cache.get("download_helper", DownloadHelper).set_url(url)
+
+    @staticmethod
+    def whitelist_file(file: str) -> None:
+        """
+        Whitelists the given file in place. The official whitelist is
+        downloaded and parsed once per process (and refreshed every
+        :py:data:`infrastructure.WARM_CACHE_TTL` seconds) instead of once per
+        file.
+
+        :param file:
+            The file to whitelist.
+        """
+
+        lines = cache.get(
+            "whitelist",
+            lambda: WhitelistCore(use_official=True),
+            ttl=infrastructure.WARM_CACHE_TTL,
+        ).filter(file=file, already_formatted=True)
+
+        with open(file, "w", encoding="utf-8") as file_stream:
+            file_stream.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def fetch_data(
+        repo_name: str,
+        info_dir: str,
+        output_dir: Optional[str] = None,
+        download_dir: Optional[str] = None,
+        transport: str = "file",
+        counters: Optional[Dict[str, int]] = None,
+    ) -> Tuple[Union[str, segment.LineSegment]]:
         """
         Fetches the data of the given input source.
+
+        :param repo_name:
+            The name of the source to fetch.
+        :param info_dir:
+            The directory to download the information of the source into.
+        :param output_dir:
+            The directory to write the fetched files into. Defaults to the
+            temporary directory.
+        :param download_dir:
+            The directory to download the (short-lived) raw files into.
+            Defaults to the temporary directory.
+        :param transport:
+            The way to hand the fetched data over. See
+            :py:data:`outputs.TRANSPORTS`.
+        :param counters:
+            Receives the number of bytes and of entries read and written. See
+            :py:data:`telemetry.COUNTERS`.
+
+        :return:
+            The fetched domains and IPs - as files or as shared memory
+            segments.
+
+        :raise ValueError:
+            When the given name is not a valid repository name.
         """
 
+        if not Orchestration.is_valid_repository_name(repo_name):
+            raise ValueError(f"<repo_name> ({repo_name!r}) is not a valid repository.")
+
         logging.info("Let's fetch the data behind %r", repo_name)
 
         url_base = hubgit.PARTIAL_RAW_URL % repo_name
@@ -147,17 +366,30 @@ class Orchestration:
         ip_found = False
         whitelisted_found = False
 
-        ip_file_to_deliver = None
-        domain_file_to_deliver = None
-
-        download_info_file = os.path.join(info_dir, secrets.token_hex(8))
-        downloaded_ip_file = tempfile.NamedTemporaryFile("r", delete=False)
-        downloaded_domain_file = tempfile.NamedTemporaryFile("r", delete=False)
-        downloaded_clean_file = tempfile.NamedTemporaryFile("r", delete=False)
-        downloaded_whitelisted_file = tempfile.NamedTemporaryFile("r", delete=False)
+        download_info_file = os.path.join(info_dir, f"{repo_name}.json")
+        downloaded_ip_file = tempfile.NamedTemporaryFile(
+            "r", delete=False, dir=download_dir
+        )
+        downloaded_domain_file = tempfile.NamedTemporaryFile(
+            "r", delete=False, dir=download_dir
+        )
+        downloaded_clean_file = tempfile.NamedTemporaryFile(
+            "r", delete=False, dir=download_dir
+        )
+        downloaded_whitelisted_file = tempfile.NamedTemporaryFile(
+            "r", delete=False, dir=download_dir
+        )
 
-        output_ip_file = tempfile.NamedTemporaryFile("w", delete=False)
-        output_domain_file = tempfile.NamedTemporaryFile("w", delete=False)
+        if transport == "shared_memory":
+            output_ip_file = io.StringIO()
+            output_domain_file = io.StringIO()
+        else:
+            output_ip_file = tempfile.NamedTemporaryFile(
+                "w", delete=False, dir=output_dir
+            )
+            output_domain_file = tempfile.NamedTemporaryFile(
+                "w", delete=False, dir=output_dir
+            )
 
         try:
             logging.info(
@@ -167,7 +399,9 @@ class Orchestration:
                 download_info_file,
             )
 
-            DownloadHelper(info_url).download_text(destination=download_info_file)
+            Orchestration.get_download_helper(info_url).download_text(
+                destination=download_info_file
+            )
 
             logging.info(
                 "[%r] Finished to download %r into %r",
@@ -191,7 +425,7 @@ class Orchestration:
                 downloaded_domain_file.name,
             )
 
-            DownloadHelper(domain_url).download_text(
+            Orchestration.get_download_helper(domain_url).download_text(
                 destination=downloaded_domain_file.name
             )
 
@@ -218,7 +452,7 @@ class Orchestration:
                 downloaded_clean_file.name,
             )
 
-            DownloadHelper(clean_url).download_text(
+            Orchestration.get_download_helper(clean_url).download_text(
                 destination=downloaded_clean_file.name
             )
 
@@ -245,7 +479,9 @@ class Orchestration:
                 downloaded_ip_file.name,
             )
 
-            DownloadHelper(ip_url).download_text(destination=downloaded_ip_file.name)
+            Orchestration.get_download_helper(ip_url).download_text(
+                destination=downloaded_ip_file.name
+            )
 
             logging.info(
                 "[%r] Finished to download %r into %r",
@@ -270,7 +506,7 @@ class Orchestration:
                 downloaded_whitelisted_file.name,
             )
 
-            DownloadHelper(whitelisted_url).download_text(
+            Orchestration.get_download_helper(whitelisted_url).download_text(
                 destination=downloaded_whitelisted_file.name
             )
 
@@ -289,26 +525,37 @@ class Orchestration:
                 downloaded_whitelisted_file.name,
             )
 
+        bytes_in = sum(
+            os.path.getsize(x)
+            for x in (
+                download_info_file,
+                downloaded_ip_file.name,
+                downloaded_domain_file.name,
+                downloaded_clean_file.name,
+                downloaded_whitelisted_file.name,
+            )
+            if os.path.isfile(x)
+        )
+        entries_in = entries_out = 0
+
         downloaded_domain_file.seek(0)
         downloaded_clean_file.seek(0)
         downloaded_ip_file.seek(0)
         downloaded_whitelisted_file.seek(0)
 
         if whitelisted_found:
-            domain_file_to_read = (
-                domain_file_to_deliver
-            ) = downloaded_whitelisted_file.name
+            domain_file_to_read = downloaded_whitelisted_file.name
         elif clean_found:
-            domain_file_to_read = domain_file_to_deliver = downloaded_clean_file.name
+            domain_file_to_read = downloaded_clean_file.name
         elif domain_found:
-            domain_file_to_read = domain_file_to_deliver = downloaded_domain_file.name
+            domain_file_to_read = downloaded_domain_file.name
         else:
-            domain_file_to_read = domain_file_to_deliver = None
+            domain_file_to_read = None
 
         if ip_found:
-            ip_file_to_read = ip_file_to_deliver = downloaded_ip_file.name
+            ip_file_to_read = downloaded_ip_file.name
         else:
-            ip_file_to_read = ip_file_to_deliver = None
+            ip_file_to_read = None
 
         logging.info(
             "[%r] Using %r as (domain) file to read and deliver.",
@@ -322,16 +569,15 @@ class Orchestration:
         )
 
         if domain_file_to_read:
+            normalizer.normalize_file(domain_file_to_read)
+
             logging.info(
                 "[%r] Starting to whitelist content of %r",
                 repo_name,
                 domain_file_to_read,
             )
 
-            WhitelistCore(
-                output_file=domain_file_to_read,
-                use_official=True,
-            ).filter(file=domain_file_to_read, already_formatted=True)
+            Orchestration.whitelist_file(domain_file_to_read)
 
             logging.info(
                 "[%r] Finished to whitelist content of %r",
@@ -347,24 +593,27 @@ class Orchestration:
                     if not line.strip():
                         continue
 
+                    entries_in += 1
+
                     if DomainSyntaxChecker(line.strip()).is_valid():
                         output_domain_file.write(line)
+                        entries_out += 1
                     elif IPSyntaxChecker(line.strip()).is_valid():
                         output_ip_file.write(line)
+                        entries_out += 1
 
             logging.info(
                 "[%r] Finished to filter content of %r", repo_name, domain_file_to_read
             )
 
         if ip_file_to_read:
+            normalizer.normalize_file(ip_file_to_read)
+
             logging.info(
                 "[%r] Starting to whitelist content of %r", repo_name, ip_file_to_read
             )
 
-            WhitelistCore(
-                output_file=ip_file_to_read,
-                use_official=True,
-            ).filter(file=ip_file_to_read, already_formatted=True)
+            Orchestration.whitelist_file(ip_file_to_read)
 
             logging.info(
                 "[%r] Finished to whitelist content of %r", repo_name, ip_file_to_read
@@ -379,10 +628,14 @@ class Orchestration:
                     if not line.strip():
                         continue
 
+                    entries_in += 1
+
                     if DomainSyntaxChecker(line.strip()).is_valid():
                         output_domain_file.write(line)
+                        entries_out += 1
                     elif IPSyntaxChecker(line.strip()).is_valid():
                         output_ip_file.write(line)
+                        entries_out += 1
 
             logging.info(
                 "[%r] Finished to filter content of %r", repo_name, ip_file_to_read
@@ -393,74 +646,413 @@ class Orchestration:
         downloaded_clean_file.close()
         downloaded_whitelisted_file.close()
 
-        if downloaded_ip_file.name != ip_file_to_deliver:
-            FileHelper(downloaded_ip_file.name).delete()
+        # Their (filtered) content is now into our output files.
+        FileHelper(downloaded_ip_file.name).delete()
+        FileHelper(downloaded_domain_file.name).delete()
+        FileHelper(downloaded_whitelisted_file.name).delete()
+        FileHelper(downloaded_clean_file.name).delete()
+
+        if transport == "shared_memory":
+            result = (
+                segment.LineSegment.create(
+                    output_domain_file.getvalue().encode("utf-8")
+                ),
+                segment.LineSegment.create(output_ip_file.getvalue().encode("utf-8")),
+            )
+            bytes_out = sum(x.size for x in result)
+        else:
+            output_domain_file.close()
+            output_ip_file.close()
+
+            result = (output_domain_file.name, output_ip_file.name)
+            bytes_out = sum(os.path.getsize(x) for x in result)
+
+        if counters is not None:
+            counters.update(
+                bytes_in=bytes_in,
+                bytes_out=bytes_out,
+                entries_in=entries_in,
+                entries_out=entries_out,
+            )
 
-        if downloaded_domain_file.name != domain_file_to_deliver:
-            FileHelper(downloaded_domain_file.name).delete()
+        return result
 
-        if downloaded_whitelisted_file.name != domain_file_to_deliver:
-            FileHelper(downloaded_whitelisted_file.name).delete()
+    @staticmethod
+    def fetch_and_measure(
+        repo_name: str, *args, profiler: Optional[profiling.Profiler] = None
+    ) -> Tuple[Tuple[Union[str, segment.LineSegment]], Dict[str, Any]]:
+        """
+        Fetches the data of the given input source - see :py:meth:`fetch_data`
+        - and measures it.
 
-        if downloaded_clean_file.name != domain_file_to_deliver:
-            FileHelper(downloaded_clean_file.name).delete()
+        :param profiler:
+            The profiler of the :code:`fetch` stage - if any.
 
-        output_domain_file.seek(0)
-        output_ip_file.seek(0)
+        :return:
+            The fetched files and the telemetry record of the fetching.
+        """
 
-        output_domain_file.seek(0)
-        output_ip_file.seek(0)
+        with profiling.profile(profiler, "fetch"), telemetry.Telemetry().measure(
+            repo_name
+        ) as record:
+            result = Orchestration.fetch_data(repo_name, *args, counters=record)
 
-        return output_domain_file.name, output_ip_file.name
+        return result, record
 
-    def fetch_and_get_files(self) -> List[Tuple[str, str]]:
+    def fetch_and_get_files(
+        self, repositories: Optional[List[str]] = None
+    ) -> List[Tuple[str, str]]:
         """
-        Starts the fetching of all files and return them.
+        Starts the fetching of all files and return them. In distributed mode,
+        the repositories are fetched - and sorted - by our worker nodes. See
+        :py:attr:`nodes`.
+
+        :param repositories:
+            The repositories to fetch. Defaults to all of them.
         """
 
         result_files = list()
 
-        with concurrent.futures.ProcessPoolExecutor(max_workers=None) as executor:
-            submitted_tasks: List[concurrent.futures.Future] = list()
+        if self.transport == "shared_memory":
+            segment.share_resource_tracker()
 
-            for repo_name in self.get_repositories():
-                task = executor.submit(
-                    self.fetch_data, repo_name, self.temp_dirs["info"].name
+        with contextlib.ExitStack() as stack:
+            if self.nodes:
+                node_pool = stack.enter_context(distributed.NodePool(self.nodes))
+                executor = stack.enter_context(
+                    concurrent.futures.ThreadPoolExecutor(max_workers=node_pool.size)
+                )
+            elif self.executor is not None:
+                executor = self.executor
+            else:
+                executor = stack.enter_context(
+                    concurrent.futures.ProcessPoolExecutor(max_workers=None)
                 )
 
-                submitted_tasks.append(task)
+            submitted_tasks: Dict[concurrent.futures.Future, str] = dict()
+
+            for repo_name in repositories or self.get_repositories():
+                if self.nodes:
+                    task = executor.submit(
+                        node_pool.fetch,
+                        repo_name,
+                        info_dir=self.info_dir,
+                        output_dir=self.workspace.files_dir,
+                        sorting_mode=self.sorting_mode,
+                    )
+                else:
+                    task = executor.submit(
+                        self.fetch_and_measure,
+                        repo_name,
+                        self.info_dir,
+                        self.workspace.files_dir,
+                        self.workspace.hot_dir,
+                        self.transport,
+                        profiler=self.profiler,
+                    )
+
+                submitted_tasks[task] = repo_name
 
             for task in concurrent.futures.as_completed(submitted_tasks):
                 if task.exception():
                     raise task.exception()
 
-                result_files.append(task.result())
+                files, record = task.result()
+
+                result_files.append(files)
+                self.sources.append(submitted_tasks[task])
+                self.telemetry.add_source(submitted_tasks[task], record)
+
+                self.workspace.check_quota()
 
                 continue
 
         return result_files
 
+    def write_provenance_index(
+        self,
+        fetched_files: List[Tuple[str, str]],
+        entry_store: Optional[store.EntryStore] = None,
+    ) -> None:
+        """
+        Writes the provenance index of the fetched files - or of the given
+        entry store: which sources list each of our entries.
+        """
+
+        directory = os.path.dirname(self.provenance_index)
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if entry_store is not None:
+            entry_store.export(self.provenance_index, version=infrastructure.VERSION)
+        else:
+            provenance.write(
+                self.provenance_index,
+                [(x, list(y)) for x, y in zip(self.sources, fetched_files)],
+                version=infrastructure.VERSION,
+            )
+
+    def rebuild_entry_store(self, fetched_files: List[Tuple[str, str]]) -> None:
+        """
+        Rebuilds our entry store from the fetched files.
+        """
+
+        with store.EntryStore(self.entry_store) as entry_store:
+            entry_store.rebuild(
+                [(x, list(y)) for x, y in zip(self.sources, fetched_files)],
+                version=infrastructure.VERSION,
+            )
+            entry_store.save_info(self.info_dir)
+
+    def update_entry_store(
+        self, fetched_files: List[Tuple[str, str]]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Applies the fetched files of the sources to update to our entry store.
+        The fetched files are deleted once applied.
+
+        :return:
+            The entries added and the ones removed since the previous release.
+            See :py:meth:`load_updated_entry_store`.
+        """
+
+        with store.EntryStore(self.entry_store) as entry_store:
+            added = set()
+            removed = set()
+
+            for source, (domain_file, ip_file) in zip(self.sources, fetched_files):
+                source_added, source_removed = entry_store.apply_source(
+                    source, [domain_file, ip_file], version=infrastructure.VERSION
+                )
+
+                added.update(source_added)
+                removed.update(source_removed)
+
+                self.delete_intermediate_file(domain_file)
+                self.delete_intermediate_file(ip_file)
+
+            entry_store.save_info(self.info_dir)
+
+            return (
+                sorted(x for x in added if x in entry_store),
+                sorted(x for x in removed if x not in entry_store),
+            )
+
+    def load_updated_entry_store(self, added: List[str], removed: List[str]) -> None:
+        """
+        Loads our in-memory datasets from our (updated) entry store.
+
+        :param added:
+            The entries added since the previous release.
+        :param removed:
+            The entries removed since the previous release.
+        """
+
+        with store.EntryStore(self.entry_store) as entry_store:
+            entry_store.load_info(self.info_dir)
+
+            if self.provenance_index:
+                self.write_provenance_index([], entry_store)
+
+            self.load_entry_store(entry_store, added, removed)
+
+    def load_entry_store(
+        self, entry_store: store.EntryStore, added: List[str], removed: List[str]
+    ) -> None:
+        """
+        Loads our in-memory datasets from the given entry store.
+
+        The domains of the previous release are patched with the given changes
+        so that only the added domains have to be sorted. The whole store is
+        sorted when the previous release can't be used.
+
+        :param entry_store:
+            The entry store to load.
+        :param added:
+            The entries added since the previous release.
+        :param removed:
+            The entries removed since the previous release.
+        """
+
+        logging.info("Started to load the entry store into memory.")
+
+        start_time = time.perf_counter()
+
+        domains_count = 0
+        ips = []
+
+        for entry in entry_store:
+            if sorter.is_ip(entry):
+                ips.append(entry)
+            else:
+                domains_count += 1
+
+        self.datasets["ip"] = sorter.PackedIPSet([ips])
+
+        domains = None
+
+        if (delta.load_index()["sorting_mode"] or "standard") == self.sorting_mode:
+            domains = domainset.CompactDomainSet.from_sorted(
+                generator.iter_lines(
+                    generator.get_chunk_files(
+                        outputs.DOMAINS_DIR, outputs.INCOMPLETE_PLAIN_FILENAME
+                    )
+                ),
+                key=self.sorting_key,
+            ).patch(
+                [x for x in added if not sorter.is_ip(x)],
+                [x for x in removed if not sorter.is_ip(x)],
+            )
+
+            if len(domains) != domains_count:
+                logging.critical(
+                    "The previous release does not match the entry store "
+                    "(expected: %s domains, got: %s). Sorting the whole store.",
+                    f"{domains_count:,d}",
+                    f"{len(domains):,d}",
+                )
+                domains = None
+
+        if domains is None:
+            domains = domainset.CompactDomainSet.from_iterable(
+                (x for x in entry_store if not sorter.is_ip(x)), key=self.sorting_key
+            )
+
+        self.datasets["domain"] = domains
+
+        logging.info(
+            "Finished to load the entry store into memory (domains: %s, "
+            "IPs: %s, time: %.3fs).",
+            f"{len(self.datasets['domain']):,d}",
+            f"{len(self.datasets['ip']):,d}",
+            time.perf_counter() - start_time,
+        )
+
     def merge_fetched_filed(
         self, fetched_files: List[Tuple[str, str]]
     ) -> Tuple[List[str], List[str]]:
         """
         Sorts the fetched files and respectively returns the list file containing the
         domains and the one with the IPS.
+
+        In distributed mode, the fetched files are already sorted - and
+        deduplicated - by our worker nodes. They are merged into their final
+        order, so :py:meth:`sort_unique_files` is not needed.
         """
 
-        with contextlib.ExitStack() as stack:
-            domain_files = [stack.enter_context(open(x)) for x, _ in fetched_files]
-            ip_files = [stack.enter_context(open(y)) for _, y in fetched_files]
+        domain_files = [generator.read_input(x) for x, _ in fetched_files]
+        ip_files = [generator.read_input(y) for _, y in fetched_files]
+
+        if self.nodes:
+            domains = (
+                f"{x}\n"
+                for x in sorter.merge_unique(
+                    domain_files, sorter.get_domain_order(self.sorting_mode)
+                )
+            )
+            ips = (f"{x}\n" for x in sorter.merge_unique(ip_files, sorter.get_ip_order))
+        else:
+            domains = heapq.merge(*domain_files)
+            ips = heapq.merge(*ip_files)
 
-            self.temp_files["domain"].seek(0)
-            self.temp_files["domain"].writelines(heapq.merge(*domain_files))
-            self.temp_files["domain"].seek(0)
+        with open(self.datasets["domain"], "w") as file_stream:
+            file_stream.writelines(domains)
 
-            self.temp_files["ip"].seek(0)
-            self.temp_files["ip"].writelines(heapq.merge(*ip_files))
-            self.temp_files["ip"].seek(0)
+        with open(self.datasets["ip"], "w") as file_stream:
+            file_stream.writelines(ips)
 
-            return domain_files, ip_files
+        return domain_files, ip_files
+
+    def load_datasets(self, fetched_files: List[Tuple[str, str]]) -> None:
+        """
+        Merges, sorts and dedupes the fetched files into our compact in-memory
+        datasets. The fetched files are deleted once loaded.
+        """
+
+        logging.info("Started to load the fetched files into memory.")
+
+        start_time = time.perf_counter()
+
+        if self.nodes:
+            # Our worker nodes already sorted them.
+            self.datasets["domain"] = domainset.CompactDomainSet.from_sorted(
+                sorter.merge_unique(
+                    [x for x, _ in fetched_files],
+                    sorter.get_domain_order(self.sorting_mode),
+                ),
+                key=self.sorting_key,
+            )
+
+            for domain_file, _ in fetched_files:
+                self.delete_intermediate_file(domain_file)
+        else:
+            domain_sets = []
+
+            for domain_file, _ in fetched_files:
+                domain_sets.append(
+                    domainset.CompactDomainSet.from_iterable(
+                        generator.iter_lines([domain_file]), key=self.sorting_key
+                    )
+                )
+                self.delete_intermediate_file(domain_file)
+
+            self.datasets["domain"] = domainset.CompactDomainSet.merge(
+                *domain_sets, key=self.sorting_key
+            )
+            del domain_sets
+
+        self.datasets["ip"] = sorter.PackedIPSet([y for _, y in fetched_files])
+
+        for _, ip_file in fetched_files:
+            self.delete_intermediate_file(ip_file)
+
+        domains_count = len(self.datasets["domain"])
+        set_size = domainset.get_set_size(self.datasets["domain"])
+
+        logging.info(
+            "Finished to load the fetched files into memory (domains: %s, "
+            "bytes: %s [%.1f/entry], as set: %s bytes [%.1f/entry], IPs: %s, "
+            "bytes: %s, time: %.3fs).",
+            f"{domains_count:,d}",
+            f"{self.datasets['domain'].nbytes:,d}",
+            self.datasets["domain"].nbytes / domains_count if domains_count else 0,
+            f"{set_size:,d}",
+            set_size / domains_count if domains_count else 0,
+            f"{len(self.datasets['ip']):,d}",
+            f"{self.datasets['ip'].nbytes:,d}",
+            time.perf_counter() - start_time,
+        )
+
+    def get_datasets(self) -> List[Union[str, Any]]:
+        """
+        Provides our datasets - as files or in-memory objects.
+        """
+
+        return list(self.datasets.values())
+
+    def create_dataset(
+        self, name: str, factory: Callable[[], Any] = list
+    ) -> Union[str, Any]:
+        """
+        Creates a new (empty) dataset to write into.
+
+        :param name:
+            The name of the dataset.
+        :param factory:
+            The factory of the in-memory object to create in memory mode.
+
+        :return:
+            The path of a new temporary file or - in memory mode - the created
+            object.
+        """
+
+        if self.in_memory:
+            self.datasets[name] = factory()
+        else:
+            self.datasets[name] = self.workspace.create_file()
+
+        return self.datasets[name]
 
     def sort_unique_files(self) -> None:
         """
@@ -477,57 +1069,348 @@ class Orchestration:
                     "ci": {
                         "commit_message": self.commit_message,
                         "end_commit_message": self.commit_message,
-                    }
+                    },
+                    "sorting_mode": {
+                        "standard": self.sorting_mode == "standard",
+                        "hierarchical": self.sorting_mode == "hierarchical",
+                    },
                 },
             }
         ).start()
 
         logging.info("Started to sort files.")
-        sorter_process = FileSorterProcessesManager(
+        sorter_process = sorter.ProfiledFileSorterProcessesManager(
             daemon=True,
             max_worker=3,
             generate_input_queue=True,
             generate_output_queue=False,
+            profiler=self.profiler,
         )
 
-        files = [self.temp_files["domain"].name, self.temp_files["ip"].name]
-
-        for file in files:
-            sorter_process.add_to_input_queue(
-                {"file": file, "write_header": False, "remove_duplicates": True},
-                worker_name="uhb_controller",
-            )
-            logging.info("Added %s into the sorting queue.", file)
+        sorter_process.add_to_input_queue(
+            {
+                "file": self.datasets["domain"],
+                "write_header": False,
+                "remove_duplicates": True,
+            },
+            worker_name="uhb_controller",
+        )
+        logging.info("Added %s into the sorting queue.", self.datasets["domain"])
 
         sorter_process.start()
+
+        # The IPs are sorted numerically (from their packed form) while the
+        # domains are being sorted by the PyFunceble workers.
+        sorter.sort_unique_ips(self.datasets["ip"])
+
         sorter_process.send_stop_signal(worker_name="uhb_controller")
         sorter_process.wait()
         logging.info("Finished to sort files.")
 
         local_temp_dir.cleanup()
 
+    def reduce_files(self) -> None:
+        """
+        Reduces our sorted files into the datasets used by the formats which
+        can express them in fewer lines.
+        """
+
+        reducer.collapse_subdomains(
+            [self.datasets["domain"]],
+            self.create_dataset(
+                "collapsed_domain",
+                lambda: domainset.CompactDomainSet(key=self.sorting_key),
+            ),
+        )
+
+        if self.aggregate_ips:
+            reducer.aggregate_ips(
+                [self.datasets["ip"]],
+                {
+                    reducer.CIDR_NOTATION: self.create_dataset("aggregated_ip"),
+                    reducer.TCP_WRAPPERS_NOTATION: self.create_dataset(
+                        "aggregated_ip_tcp_wrappers"
+                    ),
+                },
+            )
+
+    def generate_deltas(self) -> None:
+        """
+        Generates the patch files against the previous release.
+
+        .. warning::
+            This has to be called before :py:meth:`generate_files` because the
+            previous release is read from our output directories.
+        """
+
+        delta.generate(
+            previous_files={
+                "domains": generator.get_chunk_files(
+                    outputs.DOMAINS_DIR, outputs.INCOMPLETE_PLAIN_FILENAME
+                ),
+                "ips": generator.get_chunk_files(
+                    outputs.IPS_DIR, outputs.INCOMPLETE_IPS_FILENAME
+                ),
+            },
+            current_files={
+                "domains": [self.datasets["domain"]],
+                "ips": [self.get_ip_files()[0]],
+            },
+            keys={
+                "domains": self.sorting_key,
+                "ips": sorter.get_ip_sorting_key,
+            },
+            sorting_mode=self.sorting_mode,
+            ip_format=delta.get_ip_format(self.aggregate_ips),
+        )
+
+    def get_ip_files(self) -> Tuple[Union[str, Any], Union[str, Any]]:
+        """
+        Provides the IP files (or in-memory datasets) to use for the plain
+        text IP format and the ones to use for the hosts deny formats.
+        """
+
+        if self.aggregate_ips:
+            return (
+                self.datasets["aggregated_ip"],
+                self.datasets["aggregated_ip_tcp_wrappers"],
+            )
+
+        return self.datasets["ip"], self.datasets["ip"]
+
     def generate_files(self) -> None:
         """
         Generates our output files.
         """
 
-        domains_file = self.temp_files["domain"].name
-        ip_file = self.temp_files["ip"].name
+        domains_file = self.datasets["domain"]
+        ip_file = self.datasets["ip"]
+        collapsed_domains_file = self.datasets["collapsed_domain"]
+        plain_ip_file, hosts_deny_ip_file = self.get_ip_files()
+
+        output_formats = list(formats.DEFAULT_FORMATS)
+
+        if self.compact_hosts:
+            output_formats.extend(formats.COMPACT_HOSTS_FORMATS)
+
+        output_formats.extend(self.extra_formats)
+        output_formats = formats.get_formats(
+            output_formats, entries_per_line=self.compact_hosts
+        )
+
+        # The hashes of our files - for this generation only.
+        file_hashes = {}
+
+        changed_files = generator.generate_formats(
+            output_formats,
+            {
+                formats.DOMAINS_DATASET: [domains_file],
+                formats.COLLAPSED_DOMAINS_DATASET: [collapsed_domains_file],
+                formats.IPS_DATASET: [ip_file],
+                formats.PLAIN_IPS_DATASET: [plain_ip_file],
+                formats.HOSTS_DENY_IPS_DATASET: [hosts_deny_ip_file],
+            },
+            chunking_mode=self.chunking_mode,
+            file_hashes=file_hashes,
+        )
+
+        changed_files += generator.binary_index(
+            domains_file, ip_file, file_hashes=file_hashes
+        )
+        changed_files += generator.bloom_filter(
+            domains_file,
+            false_positive_rate=self.bloom_false_positive_rate,
+            file_hashes=file_hashes,
+        )
+
+        logging.info("Number of output files which actually changed: %d", changed_files)
 
-        generator.dotted(domains_file, ip_file)
-        generator.plain_text_domain(domains_file)
-        generator.plain_text_ip(ip_file)
-        generator.hosts_deny(ip_file)
-        generator.superhosts_deny(domains_file, ip_file)
-        generator.unix_hosts(domains_file)
-        generator.windows_hosts(domains_file)
         generator.readme_md(
             domains_files=(domains_file,),
             ip_files=(ip_file,),
             info_files=[
-                os.path.join(self.temp_dirs["info"].name, x)
-                for x in os.listdir(self.temp_dirs["info"].name)
+                os.path.join(self.info_dir, x) for x in os.listdir(self.info_dir)
+            ],
+        )
+
+        self.generate_manifest(
+            [x.directory for x in output_formats], file_hashes=file_hashes
+        )
+
+    def generate_manifest(
+        self, directories: List[str], file_hashes: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Generates the manifest of our release and its difference with the
+        previous one. See :py:attr:`manifest_diff`.
+
+        :param directories:
+            The directories of the generated formats.
+        :param file_hashes:
+            The hashes of the files we just generated - by path. See
+            :py:func:`generator.get_file_hash`.
+        """
+
+        manifest_file = manifest.get_manifest_file()
+
+        logging.info("Started Generation of %r", manifest_file)
+
+        previous_manifest = manifest.load(manifest_file)
+        current_manifest = manifest.build(
+            directories
+            + [
+                outputs.BINARY_INDEX_DIR,
+                outputs.BLOOM_FILTER_DIR,
+                outputs.DELTAS_DIR,
+                os.path.join(outputs.CURRENT_DIRECTORY, outputs.README_FILENAME),
             ],
+            version=infrastructure.VERSION,
+            file_hashes=file_hashes,
+        )
+        manifest.save(current_manifest, manifest_file)
+
+        self.manifest_diff = manifest.diff(previous_manifest, current_manifest)
+
+        logging.info(
+            "Finished Generation of %r (files: %d, changed: %d, deleted: %d)",
+            manifest_file,
+            len(current_manifest["files"]),
+            len(self.manifest_diff["changed"]),
+            len(self.manifest_diff["deleted"]),
+        )
+
+    def record_mirror_deployment(self, future: concurrent.futures.Future) -> None:
+        """
+        Records the response time of the deployment request sent to our
+        mirror. See :py:attr:`mirror_deployment`.
+        """
+
+        if not future.exception():
+            self.timings["mirror"] = future.result()["response_time"]
+
+    @contextlib.contextmanager
+    def measure(
+        self,
+        phase: str,
+        *,
+        inputs: Iterable[Any] = (),
+        outputs: Optional[Callable[[], Iterable[Any]]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Measures the time spent into the given phase of the workflow - along
+        with the peak disk usage of our workspace and the telemetry of the
+        phase - and profiles it. See :py:attr:`timings`,
+        :py:attr:`workspace.Workspace.peak_usage`, :py:attr:`telemetry` and
+        :py:attr:`profiler`.
+
+        :param phase:
+            The name of the phase.
+        :param inputs:
+            The files or datasets read by the phase.
+        :param outputs:
+            Provides the files or datasets written by the phase.
+        """
+
+        start_time = time.perf_counter()
+
+        try:
+            with self.workspace.track(phase), self.telemetry.measure(
+                phase, inputs=inputs, outputs=outputs
+            ) as record, profiling.profile(self.profiler, phase):
+                yield record
+        finally:
+            self.timings[phase] = time.perf_counter() - start_time
+
+            if phase in self.telemetry.stages:
+                self.telemetry.stages[phase]["peak_disk_usage"] = (
+                    self.workspace.peak_usage.get(phase, 0)
+                )
+
+    def get_stages(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Provides the (checkpointed) stages of our run - in order - along with
+        the options which affect their outputs.
+        """
+
+        stages = [
+            (
+                workspace.FETCHED_STAGE,
+                {"version": infrastructure.VERSION, "sources": self.update_sources},
+            )
+        ]
+
+        if self.update_sources:
+            stages.append((workspace.MERGED_STAGE, {"entry_store": self.entry_store}))
+        elif not self.in_memory:
+            stages.append(
+                (
+                    workspace.MERGED_STAGE,
+                    {
+                        "provenance_index": self.provenance_index,
+                        "entry_store": self.entry_store,
+                        # In distributed mode, the merge is already sorted.
+                        "sorting_mode": self.sorting_mode if self.nodes else None,
+                    },
+                )
+            )
+            stages.append((workspace.SORTED_STAGE, {"sorting_mode": self.sorting_mode}))
+
+        stages.append(
+            (
+                workspace.GENERATED_STAGE,
+                {
+                    "in_memory": self.in_memory,
+                    "sorting_mode": self.sorting_mode,
+                    "chunking_mode": self.chunking_mode,
+                    "bloom_false_positive_rate": self.bloom_false_positive_rate,
+                    "aggregate_ips": self.aggregate_ips,
+                    "compact_hosts": self.compact_hosts,
+                    "extra_formats": self.extra_formats,
+                    "provenance_index": self.provenance_index,
+                    "entry_store": self.entry_store,
+                },
+            )
+        )
+        stages.append((workspace.DEPLOYED_STAGE, {}))
+
+        return stages
+
+    def must_run(self, stage: str) -> bool:
+        """
+        Checks whether the given stage has to run - or if we resume after it.
+        See :py:attr:`resume_point`.
+        """
+
+        if self.resume_point is None:
+            return True
+
+        names = [x for x, _ in self.stages]
+
+        return names.index(stage) > names.index(self.resume_point)
+
+    def complete_stage(
+        self, stage: str, *, files: Iterable[str] = (), data: Any = None
+    ) -> None:
+        """
+        Records the completion of the given stage into our workspace - if it
+        is persistent.
+        """
+
+        if not self.workspace.persistent:
+            return
+
+        names = [x for x, _ in self.stages]
+        position = names.index(stage)
+
+        self.workspace.complete(
+            stage,
+            self.workspace.get_inputs_key(
+                stage,
+                names[position - 1] if position else None,
+                **self.stages[position][1],
+            ),
+            files=files,
+            data=data,
         )
 
     def start(self) -> "Orchestration":
@@ -537,22 +1420,187 @@ class Orchestration:
 
         try:
             _ = self.ci_engine.bypass()
-            fetched_files = self.fetch_and_get_files()
 
-            domain_files, ip_files = self.merge_fetched_filed(fetched_files)
+            self.stages = self.get_stages()
+
+            if self.workspace.persistent:
+                self.resume_point = self.workspace.get_resume_point(self.stages)
+
+                if self.resume_point:
+                    logging.info("Resuming after the %r stage.", self.resume_point)
+
+            if self.must_run(workspace.FETCHED_STAGE):
+                with self.measure("fetch") as record:
+                    fetched_files = self.fetch_and_get_files(
+                        self.update_sources or None
+                    )
+
+                    record.update(self.telemetry.sum_sources())
+
+                self.complete_stage(
+                    workspace.FETCHED_STAGE,
+                    files=[x for y in fetched_files for x in y]
+                    + [
+                        os.path.join(self.info_dir, x)
+                        for x in os.listdir(self.info_dir)
+                    ],
+                    data={"sources": self.sources, "files": fetched_files},
+                )
+            else:
+                data = self.workspace.get_data(workspace.FETCHED_STAGE)
+
+                self.sources = data["sources"]
+                fetched_files = [tuple(x) for x in data["files"]]
+
+            if self.update_sources:
+                if self.must_run(workspace.MERGED_STAGE):
+                    with self.measure(
+                        "entry_store", inputs=itertools.chain(*fetched_files)
+                    ):
+                        added, removed = self.update_entry_store(fetched_files)
+
+                    self.complete_stage(
+                        workspace.MERGED_STAGE,
+                        data={"added": added, "removed": removed},
+                    )
+                elif self.must_run(workspace.GENERATED_STAGE):
+                    data = self.workspace.get_data(workspace.MERGED_STAGE)
+                    added, removed = data["added"], data["removed"]
+            elif not self.in_memory:
+                if self.must_run(workspace.MERGED_STAGE):
+                    if self.provenance_index:
+                        with self.measure(
+                            "provenance",
+                            inputs=itertools.chain(*fetched_files),
+                            outputs=lambda: [self.provenance_index],
+                        ):
+                            self.write_provenance_index(fetched_files)
+
+                    if self.entry_store:
+                        with self.measure(
+                            "entry_store", inputs=itertools.chain(*fetched_files)
+                        ):
+                            self.rebuild_entry_store(fetched_files)
+
+                    with self.measure(
+                        "merge",
+                        inputs=itertools.chain(*fetched_files),
+                        outputs=self.get_datasets,
+                    ):
+                        self.merge_fetched_filed(fetched_files)
+
+                        for file in itertools.chain(*fetched_files):
+                            self.delete_intermediate_file(file)
+
+                    self.complete_stage(
+                        workspace.MERGED_STAGE,
+                        files=[self.datasets["domain"], self.datasets["ip"]],
+                        data={
+                            "domain": self.datasets["domain"],
+                            "ip": self.datasets["ip"],
+                        },
+                    )
+                elif self.must_run(workspace.GENERATED_STAGE):
+                    self.datasets.update(self.workspace.get_data(self.resume_point))
+
+                if self.must_run(workspace.SORTED_STAGE):
+                    if not self.nodes:
+                        # In distributed mode, the merge already sorted them.
+                        with self.measure(
+                            "sort",
+                            inputs=self.get_datasets(),
+                            outputs=self.get_datasets,
+                        ):
+                            self.sort_unique_files()
+
+                    self.complete_stage(
+                        workspace.SORTED_STAGE,
+                        files=[self.datasets["domain"], self.datasets["ip"]],
+                        data={
+                            "domain": self.datasets["domain"],
+                            "ip": self.datasets["ip"],
+                        },
+                    )
+
+            if self.must_run(workspace.GENERATED_STAGE):
+                if self.update_sources:
+                    with self.measure("load", outputs=self.get_datasets):
+                        self.load_updated_entry_store(added, removed)
+                elif self.in_memory:
+                    if self.provenance_index:
+                        with self.measure(
+                            "provenance",
+                            inputs=itertools.chain(*fetched_files),
+                            outputs=lambda: [self.provenance_index],
+                        ):
+                            self.write_provenance_index(fetched_files)
+
+                    if self.entry_store:
+                        with self.measure(
+                            "entry_store", inputs=itertools.chain(*fetched_files)
+                        ):
+                            self.rebuild_entry_store(fetched_files)
+
+                    with self.measure(
+                        "load",
+                        inputs=itertools.chain(*fetched_files),
+                        outputs=self.get_datasets,
+                    ):
+                        self.load_datasets(fetched_files)
+
+                with self.measure(
+                    "reduce", inputs=self.get_datasets(), outputs=self.get_datasets
+                ):
+                    self.reduce_files()
+
+                with self.measure("deltas"):
+                    self.generate_deltas()
+
+                with self.measure("generate", inputs=self.get_datasets()) as record:
+                    self.generate_files()
+
+                    record["bytes_out"] = sum(
+                        x["size"] for x in self.manifest_diff["changed"].values()
+                    )
+                    record["files_out"] = len(self.manifest_diff["changed"])
+
+                self.complete_stage(
+                    workspace.GENERATED_STAGE,
+                    files=[manifest.get_manifest_file()],
+                    data=self.manifest_diff,
+                )
+            else:
+                self.manifest_diff = self.workspace.get_data(workspace.GENERATED_STAGE)
 
-            for file in domain_files:
-                self.temp_files[secrets.token_hex(6)] = file
+            if self.ci_engine.authorized and self.must_run(workspace.DEPLOYED_STAGE):
+                with self.measure("deploy"):
+                    deployer.github(self.ci_engine)
 
-            for file in ip_files:
-                self.temp_files[secrets.token_hex(6)] = file
+                self.complete_stage(workspace.DEPLOYED_STAGE)
+                self.workspace.prune()
 
-            self.sort_unique_files()
-            self.generate_files()
+                with self.measure("publish"):
+                    deployer.wait_for_github(self.ci_engine)
 
-            if self.ci_engine.authorized:
-                deployer.github(self.ci_engine)
-                time.sleep(60)
-                deployer.hosts_ubuntu101_co_za()
+                self.mirror_deployment = deployer.hosts_ubuntu101_co_za(
+                    self.manifest_diff
+                )
+                self.mirror_deployment.add_done_callback(self.record_mirror_deployment)
         except StopExecution:
             logging.info("Stopping because release has been already done.")
+        finally:
+            report = self.telemetry.get_report(version=infrastructure.VERSION)
+
+            telemetry.log_report(report)
+
+            if self.telemetry_report:
+                telemetry.write_json(report, self.telemetry_report)
+
+            if self.prometheus_textfile:
+                telemetry.write_prometheus(report, self.prometheus_textfile)
+
+            if self.profiler is not None:
+                self.profiler.merge()
+
+            # Our intermediate files are not needed anymore.
+            self.workspace.close()
@@ -0,0 +1,333 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+Provides the profiling of our runs - in the main process and in our worker
+processes.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import collections
+import contextlib
+import cProfile
+import io
+import linecache
+import logging
+import multiprocessing
+import os
+import pstats
+import tempfile
+import threading
+import tracemalloc
+from typing import ContextManager, Dict, Generator, List, Optional, Tuple
+
+from ultimate_hosts_blacklist.deployment_launcher.defaults import outputs
+
+#: The number of functions - and allocation sites - listed by our report.
+TOP_COUNT: int = 30
+
+#: The interval (in seconds) between two checks of the traced memory.
+SNAPSHOT_SAMPLING_INTERVAL: float = 0.5
+
+#: The growth of the traced memory which triggers a new snapshot.
+SNAPSHOT_GROWTH: float = 1.25
+
+#: The extension of our cProfile files.
+CPU_PROFILE_EXTENSION: str = ".prof"
+
+#: The extension of our tracemalloc snapshots.
+MEMORY_PROFILE_EXTENSION: str = ".tracemalloc"
+
+#: The name of our aggregated report.
+REPORT_FILENAME: str = "report.txt"
+
+#: The traces we leave out of our report.
+SNAPSHOT_FILTERS: List[tracemalloc.Filter] = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+#: The (cumulative) cProfile profiles of each stage, per process.
+_profiles: Dict[Tuple[int, str], cProfile.Profile] = {}
+
+#: The traced memory of the latest snapshot of each stage, per process.
+_peaks: Dict[Tuple[int, str], int] = {}
+
+
+def get_worker_name() -> str:
+    """
+    Provides the name of the current process - as written in the name of our
+    profile files.
+    """
+
+    return f"{multiprocessing.current_process().name}-{os.getpid()}"
+
+
+def disable_inherited_profiles() -> None:
+    """
+    Stops the profiles inherited from our parent process - when we were forked
+    while it was profiling.
+    """
+
+    for key in [x for x in _profiles if x[0] != os.getpid()]:
+        _profiles.pop(key).disable()
+        _peaks.pop(key, None)
+
+
+def get_allocations(files: List[str]) -> List[Tuple[int, int, str, int]]:
+    """
+    Provides the allocation sites of the given snapshots - from the largest
+    one.
+
+    :param files:
+        The tracemalloc snapshots to merge.
+
+    :return:
+        The size, the number of blocks, the file and the line of each site.
+    """
+
+    sizes = collections.Counter()
+    counts = collections.Counter()
+
+    for file in files:
+        snapshot = tracemalloc.Snapshot.load(file).filter_traces(SNAPSHOT_FILTERS)
+
+        for statistic in snapshot.statistics("lineno"):
+            frame = statistic.traceback[0]
+
+            sizes[(frame.filename, frame.lineno)] += statistic.size
+            counts[(frame.filename, frame.lineno)] += statistic.count
+
+    return [(y, counts[x], *x) for x, y in sizes.most_common()]
+
+
+def write_allocations(files: List[str], stream: io.TextIOBase) -> None:
+    """
+    Writes the top allocation sites of the given snapshots into the given
+    stream.
+    """
+
+    stream.write(f"Top {TOP_COUNT} allocation sites (at the peak of each process):\n\n")
+    stream.write(f"{'KiB':>12} {'blocks':>10}  site\n")
+
+    for size, count, filename, lineno in get_allocations(files)[:TOP_COUNT]:
+        stream.write(
+            f"{size / 1024:12,.1f} {count:10,d}  {filename}:{lineno}  "
+            f"{linecache.getline(filename, lineno).strip()}\n"
+        )
+
+    stream.write("\n")
+
+
+class Profiler:
+    """
+    Profiles the stages of our runs - with cProfile and/or tracemalloc - in
+    the main process and in every worker process it is handed over to.
+
+    Each process writes its own (cumulative) profile files - per stage - into
+    :py:attr:`directory`. They are merged into a single report by
+    :py:meth:`merge`.
+
+    :param directory:
+        The directory to write the profile files into. Defaults to a new
+        temporary directory.
+    :param mode:
+        What we profile. See :py:data:`outputs.PROFILE_MODES`.
+
+        - :code:`cpu`: the time spent into each function - with cProfile.
+        - :code:`memory`: the memory allocated by each line - around the peak
+          of each process - with tracemalloc.
+        - :code:`all`: both.
+
+    :raise ValueError:
+        When the given mode is not supported.
+    """
+
+    directory: Optional[str] = None
+    cpu: bool = True
+    memory: bool = True
+
+    def __init__(self, directory: Optional[str] = None, *, mode: str = "all") -> None:
+        if mode not in outputs.PROFILE_MODES:
+            raise ValueError("<mode> not supported.")
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+            self.directory = directory
+        else:
+            self.directory = tempfile.mkdtemp(prefix="uhb-profile-")
+
+        self.cpu = mode in ("cpu", "all")
+        self.memory = mode in ("memory", "all")
+
+    def get_path(self, stage: str, extension: str) -> str:
+        """
+        Provides the path of the profile file of the given stage - for the
+        current process.
+        """
+
+        return os.path.join(self.directory, f"{stage}.{get_worker_name()}{extension}")
+
+    @contextlib.contextmanager
+    def profile(self, stage: str) -> Generator[None, None, None]:
+        """
+        Profiles the given stage - into the profile files of the current
+        process.
+
+        :param stage:
+            The name of the stage.
+        """
+
+        disable_inherited_profiles()
+
+        key = (os.getpid(), stage)
+
+        if self.cpu:
+            profile = _profiles.setdefault(key, cProfile.Profile())
+            profile.enable()
+
+        if self.memory:
+            started = not tracemalloc.is_tracing()
+
+            if started:
+                tracemalloc.start()
+
+            stopped = threading.Event()
+            peak = {"size": _peaks.get(key, 0), "snapshot": None}
+
+            def sample() -> None:
+                size = tracemalloc.get_traced_memory()[0]
+
+                if size > peak["size"] * SNAPSHOT_GROWTH:
+                    peak["size"], peak["snapshot"] = size, tracemalloc.take_snapshot()
+
+            def sample_periodically() -> None:
+                while not stopped.wait(SNAPSHOT_SAMPLING_INTERVAL):
+                    sample()
+
+            sampler = threading.Thread(target=sample_periodically, daemon=True)
+            sampler.start()
+
+        try:
+            yield
+        finally:
+            if self.cpu:
+                profile.disable()
+
+            if self.memory:
+                stopped.set()
+                sampler.join()
+
+                sample()
+
+                if started:
+                    tracemalloc.stop()
+
+                if peak["snapshot"] is not None:
+                    _peaks[key] = peak["size"]
+                    peak["snapshot"].dump(
+                        self.get_path(stage, MEMORY_PROFILE_EXTENSION)
+                    )
+
+            if self.cpu:
+                profile.dump_stats(self.get_path(stage, CPU_PROFILE_EXTENSION))
+
+    def get_files(self) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Provides our profile files - per stage and per extension.
+        """
+
+        result = collections.defaultdict(lambda: collections.defaultdict(list))
+
+        for file in sorted(os.listdir(self.directory)):
+            extension = os.path.splitext(file)[1]
+
+            if extension in (CPU_PROFILE_EXTENSION, MEMORY_PROFILE_EXTENSION):
+                result[file.split(".")[0]][extension].append(
+                    os.path.join(self.directory, file)
+                )
+
+        return result
+
+    def merge(self) -> str:
+        """
+        Merges the profile files of all our processes into a single report:
+        the top functions by cumulative time and the top allocation sites -
+        per stage and for the whole run.
+
+        :return:
+            The path of the report.
+        """
+
+        files = self.get_files()
+        files["all stages"] = {
+            x: [z for y in list(files.values()) for z in y[x]]
+            for x in (CPU_PROFILE_EXTENSION, MEMORY_PROFILE_EXTENSION)
+        }
+
+        stream = io.StringIO()
+
+        for stage, stage_files in files.items():
+            stream.write(f"{'=' * 79}\n[{stage}]\n{'=' * 79}\n\n")
+
+            if stage_files[CPU_PROFILE_EXTENSION]:
+                stream.write(f"Processes: {len(stage_files[CPU_PROFILE_EXTENSION])}\n")
+
+                pstats.Stats(
+                    *stage_files[CPU_PROFILE_EXTENSION], stream=stream
+                ).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_COUNT)
+
+            if stage_files[MEMORY_PROFILE_EXTENSION]:
+                write_allocations(stage_files[MEMORY_PROFILE_EXTENSION], stream)
+
+        report = os.path.join(self.directory, REPORT_FILENAME)
+
+        with open(report, "w", encoding="utf-8") as file_stream:
+            file_stream.write(stream.getvalue())
+
+        logging.info("Profile report: %r", report)
+
+        return report
+
+
+def profile(profiler: Optional[Profiler], stage: str) -> ContextManager:
+    """
+    Profiles the given stage with the given profiler - if any. See
+    :py:meth:`Profiler.profile`.
+    """
+
+    if profiler is None:
+        return contextlib.nullcontext()
+
+    return profiler.profile(stage)
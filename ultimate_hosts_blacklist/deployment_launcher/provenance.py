@@ -0,0 +1,504 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides our memory-mappable provenance index: which
+input sources list each of our entries.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import array
+import heapq
+import itertools
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+from typing import Generator, Iterable, List, Optional, Tuple
+
+from ultimate_hosts_blacklist.deployment_launcher import generator, index
+
+MAGIC: bytes = b"UHBPROV\x00"
+FORMAT_VERSION: int = 1
+
+#: magic, format version, entries per block, size of a bitset, release
+#: version, number of sources, number of entries, number of blocks, offset of
+#: the string block, offset of the offset table, offset of the bitsets, offset
+#: of the source names.
+HEADER_FORMAT: str = "<8sHHH32sQQQQQQQ"
+HEADER_SIZE: int = struct.calcsize(HEADER_FORMAT)
+
+
+def get_bitset_size(sources_count: int) -> int:
+    """
+    Provides the size (in bytes) of the bitset of a single entry.
+
+    :param sources_count:
+        The number of sources to represent.
+    """
+
+    return max(1, (sources_count + 7) // 8)
+
+
+def sort_source(input_files: List[str], destination: str) -> int:
+    """
+    Writes the sorted and unique (normalized) entries of a single source.
+
+    :param input_files:
+        The files of the source.
+    :param destination:
+        The file to write.
+
+    :return:
+        The number of written entries.
+    """
+
+    entries = sorted({index.normalize(x) for x in generator.iter_lines(input_files)})
+
+    with open(destination, "wb") as file_stream:
+        file_stream.writelines(x + b"\n" for x in entries)
+
+    return len(entries)
+
+
+def read_source(
+    source_file: str, position: int
+) -> Generator[Tuple[bytes, int], None, None]:
+    """
+    Provides each entry of the given sorted source file along with the
+    position of its source.
+    """
+
+    with open(source_file, "rb") as file_stream:
+        for line in file_stream:
+            yield line.rstrip(b"\n"), position
+
+
+def merge_sources(
+    source_files: List[str],
+) -> Generator[Tuple[bytes, int], None, None]:
+    """
+    Merges the given sorted source files.
+
+    :param source_files:
+        The sorted files of each source. See :py:func:`sort_source`.
+
+    :return:
+        Each unique entry along with the bitset of the sources listing it.
+    """
+
+    for entry, group in itertools.groupby(
+        heapq.merge(*(read_source(x, y) for y, x in enumerate(source_files))),
+        key=lambda x: x[0],
+    ):
+        bitset = 0
+
+        for _, position in group:
+            bitset |= 1 << position
+
+        yield entry, bitset
+
+
+def write_entries(
+    destination: str,
+    source_names: List[str],
+    entries: Iterable[Tuple[bytes, int]],
+    *,
+    version: str = "",
+) -> Tuple[int, int]:
+    """
+    Writes the given entries into a provenance index: each entry is written
+    (front-coded, as into our binary index) along with a fixed-size bitset of
+    the sources listing it.
+
+    :param destination:
+        The file to write.
+    :param source_names:
+        The name of each source, by position into the bitsets.
+    :param entries:
+        The sorted and unique (normalized) entries, along with their bitset.
+    :param version:
+        The release version to store into the header.
+
+    :return:
+        The number of indexed entries and the number of written bytes.
+    """
+
+    logging.info("Started to write the provenance index into %r.", destination)
+
+    start_time = time.perf_counter()
+    bitset_size = get_bitset_size(len(source_names))
+
+    entries_count = 0
+    offsets = array.array("Q")
+
+    with tempfile.TemporaryFile("w+b") as bitsets_stream, open(
+        destination, "wb"
+    ) as file_stream:
+        file_stream.write(b"\x00" * HEADER_SIZE)
+        strings_position = file_stream.tell()
+
+        block = []
+
+        for entry, bitset in entries:
+            bitsets_stream.write(bitset.to_bytes(bitset_size, "little"))
+            block.append(entry)
+            entries_count += 1
+
+            if len(block) == index.ENTRIES_PER_BLOCK:
+                offsets.append(file_stream.tell() - strings_position)
+                file_stream.write(index.encode_block(block))
+                block = []
+
+        if block:
+            offsets.append(file_stream.tell() - strings_position)
+            file_stream.write(index.encode_block(block))
+
+        offsets_position = file_stream.tell()
+        file_stream.write(offsets.tobytes())
+
+        bitsets_position = file_stream.tell()
+        bitsets_stream.seek(0)
+        shutil.copyfileobj(bitsets_stream, file_stream)
+
+        sources_position = file_stream.tell()
+        file_stream.write("\n".join(source_names).encode("utf-8"))
+
+        written = file_stream.tell()
+
+        file_stream.seek(0)
+        file_stream.write(
+            struct.pack(
+                HEADER_FORMAT,
+                MAGIC,
+                FORMAT_VERSION,
+                index.ENTRIES_PER_BLOCK,
+                bitset_size,
+                version.encode("utf-8")[:32],
+                len(source_names),
+                entries_count,
+                len(offsets),
+                strings_position,
+                offsets_position,
+                bitsets_position,
+                sources_position,
+            )
+        )
+
+    logging.info(
+        "Finished to write the provenance index into %r (sources: %d, "
+        "entries: %s, bytes: %s, time: %.3fs).",
+        destination,
+        len(source_names),
+        f"{entries_count:,d}",
+        f"{written:,d}",
+        time.perf_counter() - start_time,
+    )
+
+    return entries_count, written
+
+
+def write(
+    destination: str,
+    sources: List[Tuple[str, List[str]]],
+    *,
+    version: str = "",
+) -> Tuple[int, int]:
+    """
+    Writes the provenance index of the given sources. Each source is first
+    sorted on its own, then all of them are merged.
+
+    :param destination:
+        The file to write.
+    :param sources:
+        The name and the files (domains and IPs) of each source.
+    :param version:
+        The release version to store into the header.
+
+    :return:
+        The number of indexed entries and the number of written bytes.
+    """
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_files = []
+
+        for position, (_, input_files) in enumerate(sources):
+            source_files.append(os.path.join(temp_dir, str(position)))
+            sort_source(input_files, source_files[-1])
+
+        return write_entries(
+            destination,
+            [x for x, _ in sources],
+            merge_sources(source_files),
+            version=version,
+        )
+
+
+class ProvenanceIndex(index.BlocklistIndex):
+    """
+    Provides the lookup API on top of a provenance index. As our binary index,
+    it is directly used from :py:mod:`mmap`.
+
+    Example:
+
+    ::
+
+        with ProvenanceIndex("provenance.idx") as provenance:
+            provenance.get_sources("example.org")
+            list(provenance.get_exclusive_entries("my-source"))
+
+    :param path:
+        The path of the provenance index to open.
+    """
+
+    sources: Optional[List[str]] = None
+    bitset_size: int = 1
+
+    _bitsets_position: int = 0
+
+    def __init__(self, path: str) -> None:
+        self._file_stream = open(path, "rb")
+
+        if os.fstat(self._file_stream.fileno()).st_size < HEADER_SIZE:
+            self._file_stream.close()
+            raise ValueError(f"<path> ({path!r}) is not a valid provenance index.")
+
+        self._buffer = mmap.mmap(self._file_stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            format_version,
+            self.entries_per_block,
+            self.bitset_size,
+            version,
+            sources_count,
+            self.entries_count,
+            self.blocks_count,
+            self._strings_position,
+            self._offsets_position,
+            self._bitsets_position,
+            sources_position,
+        ) = struct.unpack_from(HEADER_FORMAT, self._buffer, 0)
+
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"<path> ({path!r}) is not a supported provenance index.")
+
+        self.version = version.rstrip(b"\x00").decode("utf-8")
+
+        if sources_count:
+            self.sources = self._buffer[sources_position:].decode("utf-8").split("\n")
+        else:
+            self.sources = []
+
+    def __enter__(self) -> "ProvenanceIndex":
+        return self
+
+    def _get_bitset(self, position: int) -> bytes:
+        """
+        Provides the (raw) bitset of the entry at the given position.
+        """
+
+        start = self._bitsets_position + position * self.bitset_size
+
+        return self._buffer[start : start + self.bitset_size]
+
+    def _get_source_names(self, bitset: bytes) -> List[str]:
+        """
+        Provides the names of the sources set into the given (raw) bitset.
+        """
+
+        bitset = int.from_bytes(bitset, "little")
+
+        return [x for y, x in enumerate(self.sources) if bitset >> y & 1]
+
+    def _get_source_position(self, source: str) -> int:
+        """
+        Provides the position of the given source.
+
+        :raise ValueError:
+            When the given source is unknown.
+        """
+
+        try:
+            return self.sources.index(source)
+        except ValueError as exception:
+            raise ValueError(f"<source> ({source!r}) is unknown.") from exception
+
+    def find(self, subject: str) -> Optional[int]:
+        """
+        Provides the position of the given subject into the index.
+
+        :param subject:
+            The domain or IP to look for.
+        """
+
+        if not self.blocks_count:
+            return None
+
+        needle = index.normalize(subject)
+
+        low, high = 0, self.blocks_count
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._get_block_head(middle) <= needle:
+                low = middle + 1
+            else:
+                high = middle
+
+        if not low:
+            return None
+
+        for position, entry in enumerate(
+            self._decode_block(low - 1), start=(low - 1) * self.entries_per_block
+        ):
+            if entry == needle:
+                return position
+
+            if entry > needle:
+                break
+
+        return None
+
+    def get_sources(self, subject: str) -> List[str]:
+        """
+        Provides the names of the sources listing the given subject.
+
+        :param subject:
+            The domain or IP to look for.
+        """
+
+        position = self.find(subject)
+
+        if position is None:
+            return []
+
+        return self._get_source_names(self._get_bitset(position))
+
+    def get_bitset(self, subject: str) -> int:
+        """
+        Provides the bitset of the sources listing the given subject.
+
+        :param subject:
+            The domain or IP to look for.
+        """
+
+        position = self.find(subject)
+
+        if position is None:
+            return 0
+
+        return int.from_bytes(self._get_bitset(position), "little")
+
+    def iter_bitsets(self) -> Generator[Tuple[bytes, bytes], None, None]:
+        """
+        Provides each (normalized) entry along with its (raw) bitset, in a
+        single scan.
+        """
+
+        position = 0
+
+        for block in range(self.blocks_count):
+            for entry in self._decode_block(block):
+                yield entry, self._get_bitset(position)
+                position += 1
+
+    def get_exclusive_entries(self, source: str) -> Generator[str, None, None]:
+        """
+        Provides the entries which are only listed by the given source - in
+        other words, the entries we lose if we drop it.
+
+        :param source:
+            The name of the source.
+
+        :raise ValueError:
+            When the given source is unknown.
+        """
+
+        expected = (1 << self._get_source_position(source)).to_bytes(
+            self.bitset_size, "little"
+        )
+
+        for entry, bitset in self.iter_bitsets():
+            if bitset == expected:
+                yield entry.decode("utf-8")
+
+
+def lookup(
+    subjects: Iterable[str],
+    *,
+    path: str,
+    drop_source: Optional[str] = None,
+) -> int:
+    """
+    Prints the sources listing each of the given subjects or - when a source
+    to drop is given - the entries only listed by it.
+
+    :param subjects:
+        The subjects to look for.
+    :param path:
+        The provenance index to read.
+    :param drop_source:
+        The source to report the exclusive entries of.
+
+    :return:
+        The number of printed subjects.
+    """
+
+    printed = 0
+
+    with ProvenanceIndex(path) as provenance:
+        start_time = time.perf_counter()
+
+        if drop_source:
+            for entry in provenance.get_exclusive_entries(drop_source):
+                printed += 1
+                print(entry)
+        else:
+            for subject in subjects:
+                subject = subject.strip()
+
+                if not subject or subject.startswith("#"):
+                    continue
+
+                printed += 1
+                print(
+                    subject, " ".join(provenance.get_sources(subject)) or "NOT_LISTED"
+                )
+
+        elapsed = time.perf_counter() - start_time
+
+    logging.info("Printed %s subjects in %.3fs.", f"{printed:,d}", elapsed)
+
+    return printed
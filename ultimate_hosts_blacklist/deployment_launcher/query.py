@@ -0,0 +1,667 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides the lookup of subjects into our generated
+artifacts.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import logging
+import mmap
+import os
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from PyFunceble.cli.utils.sort import get_best_sorting_key
+
+from ultimate_hosts_blacklist.deployment_launcher import formats, sorter
+from ultimate_hosts_blacklist.deployment_launcher.defaults import outputs
+
+DOMAIN_KIND: str = "domain"
+IP_KIND: str = "ip"
+MIXED_KIND: str = "mixed"
+
+
+def get_kind(subject: str) -> str:
+    """
+    Provides the kind of the given subject. Networks (CIDR or TCP wrappers
+    notation) are considered as IPs.
+
+    :param subject:
+        The subject to check.
+    """
+
+    if sorter.get_ip_range(subject) is not None:
+        return IP_KIND
+    return DOMAIN_KIND
+
+
+class SortedChunk:
+    """
+    Provides the lookup into a single (memory-mapped) chunk of a generated
+    artifact.
+
+    :param path:
+        The path of the chunk to open.
+    :param line_format:
+        The format each subject was written with. See
+        :py:attr:`formats.OutputFormat.line_format`.
+    :param entries_per_line:
+        The (maximum) number of subjects written per line.
+    :param lines_to_skip:
+        The number of (template) lines to skip at the beginning of the chunk.
+    :param key:
+        The sorting key the subjects were sorted with.
+
+    .. note::
+        The IPs are numerically sorted. Therefore, the chunks containing only
+        IPs are looked up by range: an IP is found if it is part of one of
+        the (non-overlapping) networks of the chunk.
+    """
+
+    path: Optional[str] = None
+    line_formats: List[Tuple[bytes, bytes]] = []
+    entries_per_line: int = 1
+    key: Optional[Callable[[str], Any]] = None
+
+    kind: Optional[str] = None
+    first: Optional[str] = None
+    last: Optional[str] = None
+    first_key: Any = None
+    last_key: Any = None
+    first_range: Optional[Tuple[int, int, int]] = None
+    last_range: Optional[Tuple[int, int, int]] = None
+
+    _file_stream: Optional[BinaryIO] = None
+    _buffer: Optional[mmap.mmap] = None
+    _data_start: int = 0
+    _data_end: int = 0
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        line_format: str = "{0}",
+        entries_per_line: int = 1,
+        lines_to_skip: int = 0,
+        key: Optional[Callable[[str], Any]] = None,
+    ) -> None:
+        self.path = path
+        # The prefix and suffix of each line a subject is written into - the
+        # most specific first: e.g. "*.{0} CNAME ." before "{0} CNAME .".
+        self.line_formats = sorted(
+            (
+                tuple(x.encode("utf-8") for x in line.split("{0}", 1))
+                for line in line_format.split("\n")
+            ),
+            key=lambda x: len(x[0]) + len(x[1]),
+            reverse=True,
+        )
+        self.entries_per_line = entries_per_line
+        self.key = key or get_best_sorting_key()
+
+        self._file_stream = open(path, "rb")
+
+        if not os.fstat(self._file_stream.fileno()).st_size:
+            return
+
+        self._buffer = mmap.mmap(self._file_stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._data_start, self._data_end = self._get_data_boundaries(lines_to_skip)
+
+        if self._data_start >= self._data_end:
+            return
+
+        self.first = self._get_subjects(*self._get_line(self._data_start))[0]
+        self.last = self._get_subjects(
+            *self._get_line(
+                self._buffer.rfind(b"\n", self._data_start, self._data_end - 1) + 1
+                or self._data_start
+            )
+        )[-1]
+
+        if get_kind(self.first) == get_kind(self.last):
+            self.kind = get_kind(self.first)
+        else:
+            self.kind = MIXED_KIND
+
+        if self.kind == IP_KIND:
+            self.key = sorter.get_ip_sorting_key
+            self.first_range = sorter.get_ip_range(self.first)
+            self.last_range = sorter.get_ip_range(self.last)
+
+        self.first_key = self.key(self.first)
+        self.last_key = self.key(self.last)
+
+    def close(self) -> None:
+        """
+        Closes the underlying mapping and file.
+        """
+
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+        if self._file_stream is not None:
+            self._file_stream.close()
+            self._file_stream = None
+
+    def _get_line(self, start: int) -> Tuple[int, int]:
+        """
+        Provides the boundaries of the line starting at the given position.
+        """
+
+        end = self._buffer.find(b"\n", start)
+
+        if end < 0:
+            end = len(self._buffer)
+
+        return start, end
+
+    def _get_subjects(self, start: int, end: int) -> Optional[List[str]]:
+        """
+        Provides the subjects written into the given line - if any.
+        """
+
+        line = self._buffer[start:end].rstrip(b"\r\n")
+
+        if line.startswith(b"#"):
+            return None
+
+        for prefix, suffix in self.line_formats:
+            if (
+                len(line) >= len(prefix) + len(suffix)
+                and line.startswith(prefix)
+                and line.endswith(suffix)
+            ):
+                subjects = line[len(prefix) : len(line) - len(suffix)].strip()
+                break
+        else:
+            return None
+
+        if not subjects:
+            return None
+
+        if self.entries_per_line > 1:
+            return subjects.decode("utf-8").split()
+
+        return [subjects.decode("utf-8")]
+
+    def _get_subject(self, start: int, end: int) -> Optional[str]:
+        """
+        Provides the (first) subject written into the given line - if any.
+        """
+
+        subjects = self._get_subjects(start, end)
+
+        return subjects[0] if subjects else None
+
+    def _get_data_boundaries(self, lines_to_skip: int) -> Tuple[int, int]:
+        """
+        Provides the boundaries of the (sorted) data of the chunk: without the
+        template, the leading empty subjects and the trailing comments.
+        """
+
+        start = 0
+
+        for _ in range(lines_to_skip):
+            start = self._get_line(start)[1] + 1
+
+        while start < len(self._buffer):
+            line_start, line_end = self._get_line(start)
+
+            if self._get_subjects(line_start, line_end) is not None:
+                break
+
+            start = line_end + 1
+
+        end = len(self._buffer)
+
+        while end > start:
+            line_start = self._buffer.rfind(b"\n", start, end - 1) + 1 or start
+
+            if self._get_subjects(line_start, end) is not None:
+                break
+
+            end = line_start
+
+        return start, end
+
+    def _linear_find(self, subject: str) -> bool:
+        """
+        Looks for the given subject by scanning the whole chunk.
+        """
+
+        if self.entries_per_line > 1:
+            position = self._data_start
+
+            while position < self._data_end:
+                line_start, line_end = self._get_line(position)
+
+                if subject in (
+                    self._get_subjects(line_start, min(line_end, self._data_end)) or []
+                ):
+                    return True
+
+                position = line_end + 1
+
+            return False
+
+        prefix, suffix = self.line_formats[0]
+        needle = prefix + subject.encode("utf-8") + suffix
+        position = self._buffer.find(needle, self._data_start, self._data_end)
+
+        while position >= 0:
+            end = position + len(needle)
+
+            if (position == 0 or self._buffer[position - 1] == 0x0A) and (
+                end >= self._data_end or self._buffer[end] in (0x0A, 0x0D)
+            ):
+                return True
+
+            position = self._buffer.find(needle, end, self._data_end)
+
+        return False
+
+    def _scan_around(
+        self, subject: str, subject_key: Any, start: int, end: int
+    ) -> bool:
+        """
+        Looks for the given subject into the lines surrounding the given one
+        while they share the same sorting key.
+        """
+
+        position = start
+
+        while position > self._data_start:
+            line_start = (
+                self._buffer.rfind(b"\n", self._data_start, position - 1) + 1
+                or self._data_start
+            )
+            current = self._get_subjects(line_start, position - 1)
+
+            if current is None or self.key(current[-1]) != subject_key:
+                break
+
+            if subject in current:
+                return True
+
+            position = line_start
+
+        position = end + 1
+
+        while position < self._data_end:
+            line_start, line_end = self._get_line(position)
+            current = self._get_subjects(line_start, line_end)
+
+            if current is None or self.key(current[0]) != subject_key:
+                break
+
+            if subject in current:
+                return True
+
+            position = line_end + 1
+
+        return False
+
+    def _find_network(self, subject_range: Tuple[int, int, int]) -> bool:
+        """
+        Looks for the network containing the given range: the last line
+        sorted before (or at) its first address.
+        """
+
+        candidate = None
+        low, high = self._data_start, self._data_end
+
+        while low < high:
+            middle = (low + high) // 2
+            start = self._buffer.rfind(b"\n", low, middle) + 1 or low
+            start, end = self._get_line(start)
+            end = min(end, high)
+
+            current = self._get_subject(start, end)
+            current_range = sorter.get_ip_range(current) if current else None
+
+            if current_range is None:
+                # Should not happen into the data part. Stay safe.
+                return any(
+                    self._contains_range(x, subject_range) for x in self._iter_ranges()
+                )
+
+            if current_range[:2] <= subject_range[:2]:
+                candidate = current_range
+                low = end + 1
+            else:
+                high = start
+
+        return candidate is not None and self._contains_range(candidate, subject_range)
+
+    def _iter_ranges(self) -> Iterable[Tuple[int, int, int]]:
+        """
+        Provides the range of each (parsable) line of the chunk.
+        """
+
+        position = self._data_start
+
+        while position < self._data_end:
+            line_start, line_end = self._get_line(position)
+            current = self._get_subject(line_start, min(line_end, self._data_end))
+
+            if current is not None:
+                current_range = sorter.get_ip_range(current)
+
+                if current_range is not None:
+                    yield current_range
+
+            position = line_end + 1
+
+    @staticmethod
+    def _contains_range(
+        network_range: Tuple[int, int, int], subject_range: Tuple[int, int, int]
+    ) -> bool:
+        """
+        Checks if the given subject range is part of the given network range.
+        """
+
+        return (
+            network_range[0] == subject_range[0]
+            and network_range[1] <= subject_range[1]
+            and subject_range[2] <= network_range[2]
+        )
+
+    def may_contain(self, kind: str, subject_key: Any) -> bool:
+        """
+        Checks if a subject of the given kind and sorting key can be part of
+        the chunk.
+
+        :param kind:
+            The kind of the subject.
+        :param subject_key:
+            The sorting key of the subject. Its range
+            (see :py:func:`~ultimate_hosts_blacklist.deployment_launcher.sorter.get_ip_range`)
+            for IPs.
+        """
+
+        if self.kind is None:
+            return False
+
+        if self.kind == MIXED_KIND:
+            return True
+
+        if kind != self.kind:
+            return False
+
+        if self.kind == IP_KIND:
+            return (
+                self.first_range[:2]
+                <= subject_key[:2]
+                <= (self.last_range[0], self.last_range[2])
+            )
+
+        return self.first_key <= subject_key <= self.last_key
+
+    def contains(
+        self,
+        subject: str,
+        *,
+        kind: Optional[str] = None,
+        subject_key: Any = None,
+    ) -> bool:
+        """
+        Checks if the given subject is part of the chunk.
+
+        :param subject:
+            The subject to look for.
+        :param kind:
+            The (already computed) kind of the subject.
+        :param subject_key:
+            The (already computed) sorting key of the subject.
+        """
+
+        if kind is None:
+            kind = get_kind(subject)
+
+        if self.kind == IP_KIND:
+            if kind != IP_KIND:
+                return False
+
+            subject_range = sorter.get_ip_range(subject)
+
+            if not self.may_contain(kind, subject_range):
+                return False
+
+            return self._find_network(subject_range)
+
+        if subject_key is None:
+            subject_key = self.key(subject)
+
+        if not self.may_contain(kind, subject_key):
+            return False
+
+        if self.kind == MIXED_KIND:
+            return self._linear_find(subject)
+
+        low, high = self._data_start, self._data_end
+
+        while low < high:
+            middle = (low + high) // 2
+            start = self._buffer.rfind(b"\n", low, middle) + 1 or low
+            start, end = self._get_line(start)
+            end = min(end, high)
+
+            current = self._get_subjects(start, end)
+
+            if current is None:
+                # Should not happen into the data part. Stay safe.
+                return self._linear_find(subject)
+
+            if subject in current:
+                return True
+
+            first_key = self.key(current[0])
+            last_key = self.key(current[-1]) if len(current) > 1 else first_key
+
+            if first_key <= subject_key <= last_key:
+                return self._scan_around(subject, subject_key, start, end)
+
+            if last_key < subject_key:
+                low = end + 1
+            else:
+                high = start
+
+        return False
+
+
+class ArtifactsQuery:
+    """
+    Provides the lookup of subjects into all our generated artifacts.
+
+    :param output_dir:
+        The directory containing our generated artifacts.
+    :param key:
+        The sorting key the subjects were sorted with.
+    """
+
+    chunks: Dict[str, List[SortedChunk]] = {}
+    key: Optional[Callable[[str], Any]] = None
+
+    def __init__(
+        self,
+        output_dir: str = outputs.CURRENT_DIRECTORY,
+        *,
+        key: Optional[Callable[[str], Any]] = None,
+    ) -> None:
+        self.chunks = {}
+        self.key = key or get_best_sorting_key()
+
+        for output_format in formats.FORMATS.values():
+            if output_format.template:
+                with open(
+                    os.path.join(outputs.TEMPLATE_DIR, output_format.template),
+                    "r",
+                    encoding="utf-8",
+                ) as file_stream:
+                    template_lines = len(file_stream.read().splitlines())
+            else:
+                template_lines = 0
+
+            dirname = os.path.relpath(
+                output_format.directory, outputs.CURRENT_DIRECTORY
+            )
+
+            self.chunks[output_format.name] = []
+            index = 0
+
+            while True:
+                path = os.path.join(
+                    output_dir, dirname, output_format.filename.format(index)
+                )
+
+                if not os.path.isfile(path):
+                    break
+
+                self.chunks[output_format.name].append(
+                    SortedChunk(
+                        path,
+                        line_format=output_format.line_format,
+                        entries_per_line=output_format.entries_per_line,
+                        lines_to_skip=template_lines if index == 0 else 0,
+                        key=self.key,
+                    )
+                )
+
+                index += 1
+
+    def __enter__(self) -> "ArtifactsQuery":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes all opened chunks.
+        """
+
+        for chunks in self.chunks.values():
+            for chunk in chunks:
+                chunk.close()
+
+    def query(self, subject: str) -> Dict[str, List[str]]:
+        """
+        Provides the chunks containing the given subject, indexed by the
+        name of their format. An empty result means that the subject is not
+        blocked.
+
+        :param subject:
+            The subject to look for.
+        """
+
+        result = {}
+
+        kind = get_kind(subject)
+        subject_key = self.key(subject)
+
+        for name, chunks in self.chunks.items():
+            found = [
+                x.path
+                for x in chunks
+                if x.contains(subject, kind=kind, subject_key=subject_key)
+            ]
+
+            if found:
+                result[name] = found
+
+        return result
+
+
+def query(
+    subjects: Iterable[str],
+    *,
+    output_dir: str = outputs.CURRENT_DIRECTORY,
+    sorting_mode: str = "standard",
+) -> Tuple[int, int]:
+    """
+    Looks for the given subjects into our generated artifacts and prints the
+    result of each lookup.
+
+    :param subjects:
+        The subjects to look for.
+    :param output_dir:
+        The directory containing our generated artifacts.
+    :param sorting_mode:
+        The sorting mode the artifacts were generated with.
+
+    :return:
+        The number of checked subjects and the number of blocked ones.
+    """
+
+    checked = 0
+    blocked = 0
+
+    with ArtifactsQuery(
+        output_dir, key=sorter.get_domain_sorting_key(sorting_mode)
+    ) as artifacts:
+        start_time = time.perf_counter()
+
+        for subject in subjects:
+            subject = subject.strip()
+
+            if not subject or subject.startswith("#"):
+                continue
+
+            checked += 1
+            result = artifacts.query(subject)
+
+            if result:
+                blocked += 1
+                print(
+                    subject,
+                    "BLOCKED",
+                    " ".join(
+                        os.path.relpath(path, output_dir)
+                        for paths in result.values()
+                        for path in paths
+                    ),
+                )
+            else:
+                print(subject, "NOT_BLOCKED")
+
+        elapsed = time.perf_counter() - start_time
+
+    logging.info(
+        "Checked %s subjects (blocked: %s) in %.3fs (%s subjects/s).",
+        f"{checked:,d}",
+        f"{blocked:,d}",
+        elapsed,
+        f"{checked / elapsed if elapsed else 0:,.0f}",
+    )
+
+    return checked, blocked
@@ -0,0 +1,365 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides the reduction of our datasets before their
+generation.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import contextlib
+import ipaddress
+import logging
+import time
+from typing import Any, Callable, Dict, Generator, Iterable, List, Set, Tuple, Union
+
+from ultimate_hosts_blacklist.deployment_launcher import generator
+
+#: The separator we use between reversed labels. It is lower than any
+#: character allowed into a domain, so that a domain and all its subdomains
+#: are contiguous once sorted.
+LABEL_SEPARATOR: str = "\x00"
+
+CIDR_NOTATION: str = "cidr"
+TCP_WRAPPERS_NOTATION: str = "tcp_wrappers"
+
+
+def reverse_labels(subject: str) -> str:
+    """
+    Provides the reversed-label representation of the given domain.
+
+    As example, :code:`a.example.com` becomes :code:`com\\x00example\\x00a`.
+
+    :param subject:
+        The domain to convert.
+    """
+
+    return LABEL_SEPARATOR.join(reversed(subject.split(".")))
+
+
+def restore_labels(subject: str) -> str:
+    """
+    Provides the domain behind the given reversed-label representation.
+
+    :param subject:
+        The reversed-label representation to convert.
+    """
+
+    return ".".join(reversed(subject.split(LABEL_SEPARATOR)))
+
+
+def describe(dataset: Union[str, Any]) -> str:
+    """
+    Provides the (short) description of the given file or in-memory object to
+    log.
+
+    :param dataset:
+        The file or in-memory object to describe.
+    """
+
+    if isinstance(dataset, list):
+        return f"<list entries={len(dataset)}>"
+
+    return str(dataset)
+
+
+@contextlib.contextmanager
+def open_output(
+    destination: Union[str, Any],
+) -> Generator[Callable[[str], None], None, None]:
+    """
+    Provides the function to call in order to write a subject into the given
+    destination.
+
+    :param destination:
+        The file to write or - in memory mode - the object to append the
+        subjects to. As example, a :py:class:`list` or a
+        :py:class:`~ultimate_hosts_blacklist.deployment_launcher.domainset.CompactDomainSet`.
+    """
+
+    if isinstance(destination, str):
+        with open(destination, "w", encoding="utf-8") as file_stream:
+            yield lambda x: file_stream.write(f"{x}\n")
+    else:
+        yield destination.append
+
+
+def get_covered_subdomains(input_files: List[Union[str, Iterable[str]]]) -> Set[str]:
+    """
+    Provides the domains which are covered by one of their listed parents.
+
+    The domains are sorted by their reversed labels, which is the order of a
+    depth-first walk of a suffix trie: every subdomain of a listed domain
+    directly follows it. A single linear pass is then enough to find all
+    covered subdomains.
+
+    :param input_files:
+        The files (or in-memory subjects) to read.
+    """
+
+    reversed_subjects = [reverse_labels(x) for x in generator.iter_lines(input_files)]
+
+    reversed_subjects.sort()
+
+    result = set()
+    covering = None
+
+    for subject in reversed_subjects:
+        if covering is not None and subject.startswith(covering):
+            result.add(restore_labels(subject))
+        else:
+            covering = subject + LABEL_SEPARATOR
+
+    return result
+
+
+def collapse_subdomains(
+    input_files: List[Union[str, Iterable[str]]], destination: Union[str, Any]
+) -> Tuple[int, int]:
+    """
+    Writes the given domains into the given destination - without the ones
+    covered by one of their listed parents. The order of the input files is
+    kept.
+
+    :param input_files:
+        The files (or in-memory subjects) to read.
+    :param destination:
+        The file (or in-memory object) to write. See :py:func:`open_output`.
+
+    :return:
+        The number of read domains and the number of written ones.
+    """
+
+    logging.info(
+        "Started to collapse the subdomains of %s",
+        [describe(x) for x in input_files],
+    )
+
+    start_time = time.perf_counter()
+
+    covered = get_covered_subdomains(input_files)
+
+    read_count = 0
+    written_count = 0
+
+    with open_output(destination) as write:
+        for line in generator.iter_lines(input_files):
+            read_count += 1
+
+            if line in covered:
+                continue
+
+            write(line)
+            written_count += 1
+
+    logging.info(
+        "Finished to collapse the subdomains of %s into %s "
+        "(read: %s, written: %s, reduction: %.2f%%, time: %.3fs)",
+        [describe(x) for x in input_files],
+        describe(destination),
+        f"{read_count:,d}",
+        f"{written_count:,d}",
+        (read_count - written_count) / read_count * 100 if read_count else 0,
+        time.perf_counter() - start_time,
+    )
+
+    return read_count, written_count
+
+
+def get_cidr_blocks(
+    start: int, end: int, max_prefix_length: int
+) -> Generator[Tuple[int, int], None, None]:
+    """
+    Provides the minimal list of CIDR blocks covering the given (inclusive)
+    range of addresses.
+
+    :param start:
+        The first address of the range.
+    :param end:
+        The last address of the range.
+    :param max_prefix_length:
+        The number of bits of an address (32 or 128).
+
+    :return:
+        The network address and the prefix length of each block.
+    """
+
+    while start <= end:
+        if start:
+            host_bits = min((start & -start).bit_length() - 1, max_prefix_length)
+        else:
+            host_bits = max_prefix_length
+
+        while (1 << host_bits) > end - start + 1:
+            host_bits -= 1
+
+        yield start, max_prefix_length - host_bits
+
+        start += 1 << host_bits
+
+
+def format_cidr_block(
+    version: int, address: int, prefix_length: int, *, notation: str = CIDR_NOTATION
+) -> str:
+    """
+    Provides the textual representation of the given block.
+
+    :param version:
+        The IP version of the block.
+    :param address:
+        The network address of the block.
+    :param prefix_length:
+        The prefix length of the block.
+    :param notation:
+        The notation to apply.
+
+        - :code:`cidr`: :code:`net/prefixlen`.
+        - :code:`tcp_wrappers`: :code:`net/mask` for IPv4 and
+          :code:`[net]/prefixlen` for IPv6, as understood by
+          :code:`hosts.deny`.
+
+        Single addresses are always written without any prefix.
+    """
+
+    if version == 4:
+        network = ipaddress.IPv4Network((address, prefix_length))
+    else:
+        network = ipaddress.IPv6Network((address, prefix_length))
+
+    if prefix_length == network.max_prefixlen:
+        return str(network.network_address)
+
+    if notation == TCP_WRAPPERS_NOTATION:
+        if version == 4:
+            return f"{network.network_address}/{network.netmask}"
+        return f"[{network.network_address}]/{prefix_length}"
+
+    return str(network)
+
+
+def aggregate_ips(
+    input_files: List[Union[str, Iterable[str]]],
+    destinations: Dict[str, Union[str, Any]],
+) -> Tuple[int, int]:
+    """
+    Collapses the given IPs (and networks) into the minimal list of CIDR
+    blocks and writes them, numerically sorted, into the given destinations.
+
+    Adjacent and contained addresses are merged. Entries which can't be
+    parsed are written as is at the end.
+
+    :param input_files:
+        The files (or in-memory subjects) to read.
+    :param destinations:
+        The files (or in-memory objects) to write, indexed by the notation to
+        apply. See :py:func:`open_output`.
+
+    :return:
+        The number of read entries and the number of written ones.
+    """
+
+    logging.info(
+        "Started to aggregate the IPs of %s", [describe(x) for x in input_files]
+    )
+
+    start_time = time.perf_counter()
+
+    ranges = {4: [], 6: []}
+    unparsable = []
+    read_count = 0
+
+    for line in generator.iter_lines(input_files):
+        read_count += 1
+
+        try:
+            network = ipaddress.ip_network(line, strict=False)
+        except ValueError:
+            unparsable.append(line)
+            continue
+
+        ranges[network.version].append(
+            (int(network.network_address), int(network.broadcast_address))
+        )
+
+    blocks = []
+
+    for version, max_prefix_length in ((4, 32), (6, 128)):
+        current_start = current_end = None
+
+        for start, end in sorted(ranges[version]):
+            if current_end is not None and start <= current_end + 1:
+                current_end = max(current_end, end)
+                continue
+
+            if current_end is not None:
+                blocks.extend(
+                    (version, address, prefix_length)
+                    for address, prefix_length in get_cidr_blocks(
+                        current_start, current_end, max_prefix_length
+                    )
+                )
+
+            current_start, current_end = start, end
+
+        if current_end is not None:
+            blocks.extend(
+                (version, address, prefix_length)
+                for address, prefix_length in get_cidr_blocks(
+                    current_start, current_end, max_prefix_length
+                )
+            )
+
+        ranges[version] = None
+
+    for notation, destination in destinations.items():
+        with open_output(destination) as write:
+            for version, address, prefix_length in blocks:
+                write(
+                    format_cidr_block(
+                        version, address, prefix_length, notation=notation
+                    )
+                )
+
+            for line in unparsable:
+                write(line)
+
+    written_count = len(blocks) + len(unparsable)
+
+    logging.info(
+        "Finished to aggregate the IPs of %s into %s "
+        "(read: %s, written: %s, reduction: %.2f%%, time: %.3fs)",
+        [describe(x) for x in input_files],
+        [describe(x) for x in destinations.values()],
+        f"{read_count:,d}",
+        f"{written_count:,d}",
+        (read_count - written_count) / read_count * 100 if read_count else 0,
+        time.perf_counter() - start_time,
+    )
+
+    return read_count, written_count
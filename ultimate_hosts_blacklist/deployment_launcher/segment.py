@@ -0,0 +1,170 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+Provides the shared memory segments our fetch workers hand their results over
+with.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import os
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+from typing import Generator, Optional
+
+#: The number of bytes we decode at once while reading a segment.
+READ_SIZE: int = 64 * 1024
+
+
+def share_resource_tracker() -> None:
+    """
+    Starts the resource tracker of the current process - if it is not running
+    yet - so that the workers we fork share it instead of each starting their
+    own.
+    """
+
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+
+
+def release(segment: shared_memory.SharedMemory) -> None:
+    """
+    Closes and removes the given shared memory segment.
+    """
+
+    try:
+        segment.close()
+    except BufferError:
+        # A reader is still alive. The memory is freed once it is collected.
+        pass
+
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class LineSegment:
+    """
+    Provides (newline-delimited) lines held into a shared memory segment.
+
+    A fetch worker creates the segment - see :py:meth:`create` - and returns
+    it. Only its name and size are pickled: the process which receives it
+    attaches to the same memory, reads the lines straight from it and owns the
+    segment from then on. The segment is removed once the receiving object is
+    deleted - or with :py:meth:`unlink`.
+
+    The segment can be iterated several times, just like a file. See
+    :py:func:`~ultimate_hosts_blacklist.deployment_launcher.generator.read_input`.
+
+    :param name:
+        The name of the segment to attach to.
+    :param size:
+        The number of bytes of the lines.
+    """
+
+    name: Optional[str] = None
+    size: int = 0
+
+    def __init__(self, name: str, size: int) -> None:
+        self.name = name
+        self.size = size
+
+        self._segment = shared_memory.SharedMemory(name=name)
+        self._finalizer = weakref.finalize(self, release, self._segment)
+
+    def __reduce__(self):
+        return type(self), (self.name, self.size)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} name={self.name!r} bytes={self.size}>"
+
+    def __iter__(self) -> Generator[str, None, None]:
+        view = self._segment.buf[: self.size]
+        start = 0
+
+        try:
+            while start < self.size:
+                end = min(start + READ_SIZE, self.size)
+                block = view[start:end].tobytes()
+
+                # We only decode complete lines.
+                while end < self.size:
+                    cut = block.rfind(b"\n") + 1
+
+                    if cut:
+                        block = block[:cut]
+                        end = start + cut
+                        break
+
+                    block += view[end : end + READ_SIZE].tobytes()
+                    end = min(end + READ_SIZE, self.size)
+
+                yield from block.decode("utf-8").splitlines(True)
+
+                start = end
+        finally:
+            view.release()
+
+    @classmethod
+    def create(cls, data: bytes) -> "LineSegment":
+        """
+        Creates a new segment holding the given lines.
+
+        The created segment is not owned by the current process: it is not
+        removed when the current process exits but by the process we hand
+        it over to.
+
+        :param data:
+            The (newline-delimited) lines to hold.
+        """
+
+        segment = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        segment.buf[: len(data)] = data
+
+        if os.name == "posix":
+            # Otherwise, the resource tracker of a worker removes the segment
+            # when the worker exits.
+            resource_tracker.unregister(segment._name, "shared_memory")
+
+        result = cls.__new__(cls)
+        result.name = segment.name
+        result.size = len(data)
+        result._segment = segment
+        result._finalizer = weakref.finalize(result, segment.close)
+
+        return result
+
+    def unlink(self) -> None:
+        """
+        Removes the segment.
+        """
+
+        self._finalizer.detach()
+        release(self._segment)
@@ -0,0 +1,812 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides our long-running service: it keeps our setup
+warm and makes a release each time it is triggered. It also provides our worker
+nodes, which fetch the sources shared by a coordinator.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import concurrent.futures
+import copy
+import hmac
+import http.server
+import ipaddress
+import json
+import logging
+import os
+import shutil
+import signal
+import socketserver
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from github import Github
+from PyFunceble.helpers.file import FileHelper
+
+from ultimate_hosts_blacklist.deployment_launcher import (
+    distributed,
+    generator,
+    profiling,
+    sorter,
+)
+from ultimate_hosts_blacklist.deployment_launcher.defaults import (
+    hubgit,
+    infrastructure,
+    outputs,
+)
+from ultimate_hosts_blacklist.deployment_launcher.orchester import Orchestration
+
+
+class ReleaseService:
+    """
+    Makes a release each time it is triggered, from a single warm process:
+    PyFunceble is imported once, the fetching workers - along with their
+    parsed whitelist and HTTP sessions - are kept alive and so is our GitHub
+    client.
+
+    The releases are made one at a time by a dedicated thread. The triggers
+    received while a release is running are coalesced into a single next
+    release.
+
+    :param orchestration_kwargs:
+        The arguments to give to each
+        :py:class:`~ultimate_hosts_blacklist.deployment_launcher.orchester.Orchestration`.
+    """
+
+    orchestration_kwargs: Optional[Dict[str, Any]] = None
+    executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+    github_api: Optional[Github] = None
+
+    runs: int = 0
+    coalesced: int = 0
+    failures: int = 0
+    last_run: Optional[Dict[str, Any]] = None
+
+    _condition: Optional[threading.Condition] = None
+    _thread: Optional[threading.Thread] = None
+    _running: bool = False
+    _stopping: bool = False
+    _pending: bool = False
+    _pending_sources: Optional[Set[str]] = None
+    _pending_since: Optional[float] = None
+    _refreshed_at: float = 0.0
+
+    def __init__(self, **orchestration_kwargs) -> None:
+        self.orchestration_kwargs = orchestration_kwargs
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=None)
+        self.github_api = Github(hubgit.GITHUB_TOKEN)
+
+        self._condition = threading.Condition()
+        self._refreshed_at = time.monotonic()
+
+        self._thread = threading.Thread(
+            target=self.run_forever, name="uhb-release", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "ReleaseService":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops the release thread - once the current release is done - and the
+        fetching workers.
+        """
+
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+        self._thread.join()
+        self.executor.shutdown(wait=True)
+
+    def trigger(self, sources: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Requests a new release.
+
+        :param sources:
+            The only sources to fetch again. Requires an entry store, a full
+            release is made otherwise. :py:data:`None` means all of them.
+
+        :return:
+            Whether the request was coalesced with an already pending one.
+        """
+
+        if not self.orchestration_kwargs.get("entry_store"):
+            sources = None
+
+        with self._condition:
+            coalesced = self._pending
+
+            if not self._pending:
+                self._pending = True
+                self._pending_since = time.time()
+                self._pending_sources = set(sources) if sources else None
+            elif not sources:
+                self._pending_sources = None
+            elif self._pending_sources is not None:
+                self._pending_sources.update(sources)
+
+            if coalesced:
+                self.coalesced += 1
+
+            self._condition.notify_all()
+
+            return {"queued": True, "coalesced": coalesced, "running": self._running}
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Provides the state of the service and the report of the latest
+        release.
+
+        .. note::
+            The report is copied, as it may still be updated - once the
+            mirror is deployed.
+        """
+
+        with self._condition:
+            return {
+                "state": "running" if self._running else "idle",
+                "pending": self._pending,
+                "pending_sources": (
+                    sorted(self._pending_sources)
+                    if self._pending_sources is not None
+                    else None
+                ),
+                "runs": self.runs,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "last_run": copy.deepcopy(self.last_run),
+            }
+
+    def run_forever(self) -> None:
+        """
+        Makes the requested releases, one at a time, until the service is
+        closed.
+        """
+
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+
+                if self._stopping:
+                    return
+
+                sources = self._pending_sources
+                triggered_at = self._pending_since
+
+                self._pending = False
+                self._pending_sources = None
+                self._pending_since = None
+                self._running = True
+
+            try:
+                report = self.release(sorted(sources) if sources else None)
+            finally:
+                with self._condition:
+                    self._running = False
+
+            report["triggered_at"] = datetime.fromtimestamp(
+                triggered_at, timezone.utc
+            ).isoformat()
+            report["latency"] = time.time() - triggered_at
+
+            with self._condition:
+                self.runs += 1
+                self.last_run = report
+
+                if report["error"]:
+                    self.failures += 1
+
+            logging.info(
+                "Release %r done in %.3fs (latency: %.3fs, error: %r).",
+                report["version"],
+                report["duration"],
+                report["latency"],
+                report["error"],
+            )
+
+    def release(self, sources: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Makes a single release.
+
+        :param sources:
+            The only sources to fetch again.
+
+        :return:
+            The report of the release.
+        """
+
+        refresh_repositories_to_ignore = (
+            time.monotonic() - self._refreshed_at >= infrastructure.WARM_CACHE_TTL
+        )
+
+        if refresh_repositories_to_ignore:
+            self._refreshed_at = time.monotonic()
+
+        started_at = time.time()
+        report = {
+            "version": None,
+            "sources": sources,
+            "started_at": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+            "timings": {},
+            "disk_usage": {},
+            "telemetry": None,
+            "error": None,
+        }
+
+        orchestration = None
+
+        try:
+            setup_start = time.perf_counter()
+
+            infrastructure.refresh(
+                repositories_to_ignore=refresh_repositories_to_ignore
+            )
+            report["version"] = infrastructure.VERSION
+
+            orchestration = Orchestration(
+                **self.orchestration_kwargs,
+                update_sources=sources,
+                github_api=self.github_api,
+                executor=self.executor,
+            )
+
+            report["timings"]["setup"] = time.perf_counter() - setup_start
+
+            orchestration.start()
+        except Exception:
+            report["error"] = traceback.format_exc(limit=5)
+            logging.exception("Could not make the release.")
+        finally:
+            if orchestration is not None:
+                timings = orchestration.timings
+                report["timings"].update(timings)
+                report["disk_usage"].update(orchestration.workspace.peak_usage)
+                report["telemetry"] = orchestration.telemetry.get_report()
+
+                if orchestration.mirror_deployment is not None:
+                    # The mirror is triggered in the background - the report
+                    # may already be published by then.
+                    def update_timings(_: concurrent.futures.Future) -> None:
+                        with self._condition:
+                            report["timings"].update(timings)
+
+                    orchestration.mirror_deployment.add_done_callback(update_timings)
+
+            del orchestration
+
+        report["duration"] = time.time() - started_at
+
+        return report
+
+
+class ServiceRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Handles the requests sent to our service.
+
+    - :code:`POST /release`: requests a new release. The body is optional. It
+      can be a JSON object with the :code:`sources` to fetch again, or a
+      GitHub push webhook - the pushed repository is then fetched again. The
+      other GitHub events (e.g. :code:`ping`) are acknowledged and ignored.
+      The sources have to match :py:data:`hubgit.REPOSITORY_NAME_PATTERN`.
+    - :code:`GET /status`: provides the state of the service and the report of
+      the latest release.
+
+    When :py:data:`infrastructure.SERVICE_SECRET` is set, the releases have to
+    be requested with a valid :code:`X-Hub-Signature-256` header (as sent by
+    the GitHub webhooks).
+    """
+
+    server_version = "UHBDeploymentLauncher"
+
+    def address_string(self) -> str:
+        if self.client_address:
+            return super().address_string()
+
+        return "local"
+
+    def log_message(self, message_format: str, *args) -> None:
+        logging.debug("[%s] %s", self.address_string(), message_format % args)
+
+    def send_json(self, status: int, data: Dict[str, Any]) -> None:
+        """
+        Sends the given data as a JSON response.
+        """
+
+        body = json.dumps(data, indent=4).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def is_authorized(self, body: bytes) -> bool:
+        """
+        Checks the signature of the given body, if needed.
+        """
+
+        if not infrastructure.SERVICE_SECRET:
+            return True
+
+        return hmac.compare_digest(
+            distributed.get_signature(body),
+            self.headers.get("X-Hub-Signature-256", ""),
+        )
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/status":
+            self.send_json(200, self.server.service.get_status())
+        else:
+            self.send_json(404, {"error": "Not found."})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/release":
+            self.send_json(404, {"error": "Not found."})
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if not self.is_authorized(body):
+            self.send_json(403, {"error": "Invalid signature."})
+            return
+
+        event = self.headers.get("X-GitHub-Event")
+
+        if event and event != "push":
+            self.send_json(200, {"queued": False, "event": event})
+            return
+
+        try:
+            data = json.loads(body) if body.strip() else {}
+        except ValueError:
+            self.send_json(400, {"error": "Invalid JSON body."})
+            return
+
+        if not isinstance(data, dict):
+            data = {}
+
+        sources = data.get("sources")
+
+        if not sources and isinstance(data.get("repository"), dict):
+            sources = [data["repository"].get("name")]
+
+        if sources and (
+            not isinstance(sources, list)
+            or not all(Orchestration.is_valid_repository_name(x) for x in sources)
+        ):
+            self.send_json(400, {"error": "Invalid sources."})
+            return
+
+        self.send_json(202, self.server.service.trigger(sources or None))
+
+
+def fetch_sorted(
+    repository: str,
+    profiler: Optional[profiling.Profiler] = None,
+    sorting_mode: str = "standard",
+) -> Tuple[bytes, str, str, Dict[str, Any]]:
+    """
+    Fetches the given source - for a coordinator - and sorts its domains and
+    IPs.
+
+    :param repository:
+        The name of the source to fetch.
+    :param profiler:
+        The profiler of the :code:`fetch` and :code:`sort` stages - if any.
+    :param sorting_mode:
+        The sorting mode of the domains. See :py:func:`sorter.get_domain_order`.
+
+    :return:
+        The information of the source, its fetched domains and IPs - each file
+        sorted (in the final order of the coordinator) and deduplicated - and
+        the telemetry record of the fetching.
+    """
+
+    info_dir = tempfile.mkdtemp()
+
+    try:
+        (domain_file, ip_file), record = Orchestration.fetch_and_measure(
+            repository, info_dir, profiler=profiler
+        )
+
+        with profiling.profile(profiler, "sort"):
+            lines = sorted(
+                set(generator.iter_lines([domain_file])),
+                key=sorter.get_domain_order(sorting_mode),
+            )
+
+            with open(domain_file, "w", encoding="utf-8") as file_stream:
+                file_stream.writelines(f"{x}\n" for x in lines)
+
+            record["entries_out"] = len(lines) + sorter.sort_unique_ips(ip_file)[1]
+            record["bytes_out"] = (
+                os.stat(domain_file).st_size + os.stat(ip_file).st_size
+            )
+
+        info_file = os.path.join(info_dir, f"{repository}.json")
+
+        if os.path.isfile(info_file):
+            with open(info_file, "rb") as file_stream:
+                info = file_stream.read()
+        else:
+            info = b""
+    finally:
+        shutil.rmtree(info_dir, ignore_errors=True)
+
+    return info, domain_file, ip_file, record
+
+
+class FetchNode:
+    """
+    Fetches and sorts the sources a coordinator shares with us - in distributed
+    mode - from a pool of warm worker processes.
+
+    :param max_workers:
+        The number of sources we process at once. Defaults to the number of
+        CPUs.
+    :param profiler:
+        Profiles our worker processes. Its report is merged when we are
+        closed.
+    """
+
+    max_workers: int = 0
+    executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+    profiler: Optional[profiling.Profiler] = None
+
+    fetched: int = 0
+    failures: int = 0
+    running: int = 0
+
+    _lock: Optional[threading.Lock] = None
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        profiler: Optional[profiling.Profiler] = None,
+    ) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.profiler = profiler
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers
+        )
+
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "FetchNode":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops our worker processes.
+        """
+
+        self.executor.shutdown(wait=True)
+
+        if self.profiler is not None:
+            self.profiler.merge()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Provides the state of the node.
+        """
+
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self.running,
+                "fetched": self.fetched,
+                "failures": self.failures,
+            }
+
+    def fetch(
+        self, repository: str, sorting_mode: str = "standard"
+    ) -> Tuple[bytes, str, str, Dict[str, Any]]:
+        """
+        Fetches and sorts the given source. See :py:func:`fetch_sorted`.
+        """
+
+        with self._lock:
+            self.running += 1
+
+        try:
+            result = self.executor.submit(
+                fetch_sorted, repository, self.profiler, sorting_mode
+            ).result()
+        except Exception:
+            with self._lock:
+                self.failures += 1
+
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+
+        with self._lock:
+            self.fetched += 1
+
+        return result
+
+
+class NodeRequestHandler(ServiceRequestHandler):
+    """
+    Handles the requests sent to our worker node.
+
+    - :code:`POST /fetch`: fetches and sorts the source given as a JSON object
+      (:code:`{"repository": "...", "sorting_mode": "..."}`) - in the final
+      order of the coordinator. The information of the source, its domains
+      and its IPs are sent one after the other. The size of each part
+      is given by the :py:data:`distributed.PART_SIZE_HEADERS`, and the
+      telemetry record of the fetching by the
+      :py:data:`distributed.TELEMETRY_HEADER`.
+    - :code:`GET /status`: provides the state of the node.
+
+    When :py:data:`infrastructure.SERVICE_SECRET` is set, the sources have to
+    be requested with a valid :code:`X-Hub-Signature-256` header. The
+    repository has to match :py:data:`hubgit.REPOSITORY_NAME_PATTERN`.
+    """
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/status":
+            self.send_json(200, self.server.node.get_status())
+        else:
+            self.send_json(404, {"error": "Not found."})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/fetch":
+            self.send_json(404, {"error": "Not found."})
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if not self.is_authorized(body):
+            self.send_json(403, {"error": "Invalid signature."})
+            return
+
+        try:
+            data = json.loads(body)
+            repository = data["repository"]
+            sorting_mode = data.get("sorting_mode", "standard")
+        except (ValueError, TypeError, KeyError, AttributeError):
+            repository = sorting_mode = None
+
+        if (
+            not isinstance(repository, str)
+            or not repository
+            or sorting_mode not in outputs.SORTING_MODES
+        ):
+            self.send_json(400, {"error": "Invalid JSON body."})
+            return
+
+        if not Orchestration.is_valid_repository_name(repository):
+            self.send_json(400, {"error": "Invalid repository."})
+            return
+
+        try:
+            info, domain_file, ip_file, record = self.server.node.fetch(
+                repository, sorting_mode
+            )
+        except Exception as exception:
+            logging.exception("[%r] Could not fetch the source.", repository)
+            self.send_json(500, {"error": str(exception)})
+            return
+
+        try:
+            sizes = [len(info), os.stat(domain_file).st_size, os.stat(ip_file).st_size]
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(sum(sizes)))
+
+            for header, size in zip(distributed.PART_SIZE_HEADERS, sizes):
+                self.send_header(header, str(size))
+
+            self.send_header(distributed.TELEMETRY_HEADER, json.dumps(record))
+
+            self.end_headers()
+            self.wfile.write(info)
+
+            for file in (domain_file, ip_file):
+                with open(file, "rb") as file_stream:
+                    shutil.copyfileobj(file_stream, self.wfile)
+        finally:
+            FileHelper(domain_file).delete()
+            FileHelper(ip_file).delete()
+
+
+class ServiceHTTPServer(http.server.ThreadingHTTPServer):
+    """
+    Provides our service over TCP.
+    """
+
+    service: Optional[ReleaseService] = None
+
+
+class NodeHTTPServer(http.server.ThreadingHTTPServer):
+    """
+    Provides our worker node over TCP.
+    """
+
+    node: Optional[FetchNode] = None
+
+
+class ServiceUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Provides our service over a Unix socket.
+    """
+
+    daemon_threads = True
+    service: Optional[ReleaseService] = None
+
+
+def is_loopback(host: str) -> bool:
+    """
+    Checks if the given host only listens on the loopback interface.
+
+    :param host:
+        The host to check.
+    """
+
+    if host == "localhost":
+        return True
+
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def check_host(host: str) -> None:
+    """
+    Checks that we can listen on the given host: anything beyond the loopback
+    interface requires :py:data:`infrastructure.SERVICE_SECRET`.
+
+    :param host:
+        The host to check.
+
+    :raise ValueError:
+        When we can't listen on the given host.
+    """
+
+    if not infrastructure.SERVICE_SECRET and not is_loopback(host):
+        raise ValueError(
+            f"<host> ({host!r}) is not a loopback address: "
+            "UHB_SERVICE_SECRET has to be set."
+        )
+
+
+def serve(
+    *,
+    host: str = infrastructure.SERVICE_HOST,
+    port: int = infrastructure.SERVICE_PORT,
+    unix_socket: Optional[str] = None,
+    **orchestration_kwargs,
+) -> None:
+    """
+    Runs our service until it is interrupted.
+
+    :param host:
+        The host to listen on.
+    :param port:
+        The port to listen on.
+    :param unix_socket:
+        The Unix socket to listen on, instead of the host and port.
+    :param orchestration_kwargs:
+        The arguments to give to each release. See :py:class:`ReleaseService`.
+
+    :raise ValueError:
+        When we can't listen on the given host. See :py:func:`check_host`.
+    """
+
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+        server = ServiceUnixServer(unix_socket, ServiceRequestHandler)
+        address = unix_socket
+    else:
+        check_host(host)
+
+        server = ServiceHTTPServer((host, port), ServiceRequestHandler)
+        address = f"http://{host}:{server.server_address[1]}"
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with server, ReleaseService(**orchestration_kwargs) as service:
+        server.service = service
+
+        logging.info("Listening on %s.", address)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Stopping the service.")
+
+    if unix_socket and os.path.exists(unix_socket):
+        os.remove(unix_socket)
+
+
+def serve_node(
+    *,
+    host: str = infrastructure.NODE_HOST,
+    port: int = infrastructure.NODE_PORT,
+    max_workers: Optional[int] = None,
+    profiler: Optional[profiling.Profiler] = None,
+) -> None:
+    """
+    Runs a worker node - for a coordinator - until it is interrupted.
+
+    :param host:
+        The host to listen on.
+    :param port:
+        The port to listen on.
+    :param max_workers:
+        The number of sources to process at once. See :py:class:`FetchNode`.
+    :param profiler:
+        Profiles our worker processes. See :py:class:`FetchNode`.
+
+    :raise ValueError:
+        When we can't listen on the given host. See :py:func:`check_host`.
+    """
+
+    check_host(host)
+
+    server = NodeHTTPServer((host, port), NodeRequestHandler)
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with server, FetchNode(max_workers, profiler=profiler) as node:
+        server.node = node
+
+        logging.info(
+            "Listening on http://%s:%d (workers: %d).",
+            host,
+            server.server_address[1],
+            node.max_workers,
+        )
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Stopping the node.")
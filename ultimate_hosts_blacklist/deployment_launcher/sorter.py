@@ -0,0 +1,514 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides the sorting of our datasets.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import collections
+import heapq
+import ipaddress
+import logging
+import os
+import socket
+import sys
+import time
+from array import array
+from typing import Any, Callable, Generator, Iterable, List, Optional, Tuple, Union
+
+from PyFunceble.cli.processes.file_sorter import FileSorterProcessesManager
+from PyFunceble.cli.processes.workers.file_sorter import FileSorterWorker
+from PyFunceble.cli.utils.sort import hierarchical, standard
+
+from ultimate_hosts_blacklist.deployment_launcher import generator, profiling
+from ultimate_hosts_blacklist.deployment_launcher.defaults import outputs
+
+#: Our (unsigned) 64-bit array typecode.
+UINT64_TYPECODE: str = "Q"
+UINT64_MASK: int = (1 << 64) - 1
+
+#: The number of bits our radix sort sorts at once - and the matching
+#: (unsigned) array typecode. See :py:func:`radix_sort_packed`.
+RADIX_BITS: int = 16
+RADIX_TYPECODE: str = "H"
+
+
+def get_domain_sorting_key(sorting_mode: str = "standard") -> Callable[[str], Any]:
+    """
+    Provides the sorting key of our domains.
+
+    :param sorting_mode:
+        The sorting mode. See :py:data:`outputs.SORTING_MODES`.
+
+        - :code:`standard`: the natural order of the domains.
+        - :code:`hierarchical`: the natural order of their reversed labels.
+          As example, :code:`sub.example.com` is sorted as
+          :code:`com.example.sub`.
+
+    :raise ValueError:
+        When the given sorting mode is not supported.
+    """
+
+    if sorting_mode.lower() not in outputs.SORTING_MODES:
+        raise ValueError("<sorting_mode> not supported.")
+
+    if sorting_mode.lower() == "hierarchical":
+        return hierarchical
+
+    return standard
+
+
+def get_domain_order(
+    sorting_mode: str = "standard",
+) -> Callable[[str], Tuple[Any, str]]:
+    """
+    Provides the order of our domains: their sorting key, then the domains
+    themselves. This is the order of the
+    :py:class:`~ultimate_hosts_blacklist.deployment_launcher.domainset.CompactDomainSet`
+    and of our sorted files.
+
+    :param sorting_mode:
+        The sorting mode. See :py:func:`get_domain_sorting_key`.
+    """
+
+    sorting_key = get_domain_sorting_key(sorting_mode)
+
+    def get_order(subject: str) -> Tuple[Any, str]:
+        return sorting_key(subject), subject
+
+    return get_order
+
+
+def get_ip_order(subject: str) -> Tuple[int, int, str]:
+    """
+    Provides the order of the given IP into our sorted files - the one of
+    :py:class:`PackedIPSet`: IPv4 first, then IPv6 and finally the lines which
+    can't be parsed. Two subjects with the same order are duplicates.
+
+    :param subject:
+        The IP to convert.
+    """
+
+    for version, family in ((4, socket.AF_INET), (6, socket.AF_INET6)):
+        try:
+            return version, int.from_bytes(socket.inet_pton(family, subject), "big"), ""
+        except OSError:
+            pass
+
+    return 7, 0, subject
+
+
+def merge_unique(
+    input_files: List[Union[str, Iterable[str]]], key: Callable[[str], Any]
+) -> Generator[str, None, None]:
+    """
+    Merges the given sorted inputs and removes the duplicates.
+
+    :param input_files:
+        The inputs to merge - each sorted with the given key. See
+        :py:func:`generator.read_input`.
+    :param key:
+        The order of the inputs. Two subjects with the same order are
+        duplicates.
+    """
+
+    previous = None
+
+    for order, subject in heapq.merge(
+        *(((key(y), y) for y in generator.iter_lines([x])) for x in input_files)
+    ):
+        if order != previous:
+            previous = order
+
+            yield subject
+
+
+def get_ip_sorting_key(subject: str) -> Tuple[int, int, int]:
+    """
+    Provides the (numeric) sorting key of the given IP or network.
+
+    IPv4 are sorted before IPv6. Subjects which can't be parsed are sorted
+    last.
+
+    :param subject:
+        The IP or network to convert.
+    """
+
+    try:
+        network = ipaddress.ip_network(
+            subject.strip().replace("[", "").replace("]", ""), strict=False
+        )
+    except ValueError:
+        return 7, 0, 0
+
+    return network.version, int(network.network_address), network.prefixlen
+
+
+def get_ip_range(subject: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Provides the version, the first and the last address (as integers) of the
+    given IP or network.
+
+    :param subject:
+        The IP or network to convert.
+
+    :return:
+        :py:data:`None` if the given subject can't be parsed.
+    """
+
+    try:
+        network = ipaddress.ip_network(
+            subject.strip().replace("[", "").replace("]", ""), strict=False
+        )
+    except ValueError:
+        return None
+
+    return (
+        network.version,
+        int(network.network_address),
+        int(network.broadcast_address),
+    )
+
+
+def is_ip(subject: str) -> bool:
+    """
+    Checks if the given subject is an IP or a network.
+
+    Most domains are rejected without being parsed: an IPv4 (or network)
+    ends with a digit and an IPv6 contains a colon.
+
+    :param subject:
+        The subject to check.
+    """
+
+    subject = subject.strip()
+
+    if not subject[-1:].isdigit() and ":" not in subject:
+        return False
+
+    return get_ip_range(subject) is not None
+
+
+def pack_ips(
+    input_files: List[Union[str, Iterable[str]]],
+) -> Tuple[array, array, array, List[str], int]:
+    """
+    Parses the IPs of the given files into packed integers.
+
+    :param input_files:
+        The files (or in-memory subjects) to read.
+
+    :return:
+        A tuple of:
+
+        - the IPv4 (64-bit array),
+        - the high 64 bits of the IPv6 (64-bit array),
+        - the low 64 bits of the IPv6 (64-bit array),
+        - the lines which couldn't be parsed,
+        - the (estimated) memory the lines would use as :py:class:`str`.
+    """
+
+    ipv4 = array(UINT64_TYPECODE)
+    ipv6_high = array(UINT64_TYPECODE)
+    ipv6_low = array(UINT64_TYPECODE)
+    unparsable = []
+    text_size = 0
+
+    for input_file in input_files:
+        for line in generator.read_input(input_file):
+            line = line.strip()
+
+            if not line:
+                continue
+
+            text_size += sys.getsizeof(line)
+
+            try:
+                ipv4.append(
+                    int.from_bytes(socket.inet_pton(socket.AF_INET, line), "big")
+                )
+                continue
+            except OSError:
+                pass
+
+            try:
+                address = int.from_bytes(socket.inet_pton(socket.AF_INET6, line), "big")
+            except OSError:
+                unparsable.append(line)
+                continue
+
+            ipv6_high.append(address >> 64)
+            ipv6_low.append(address & UINT64_MASK)
+
+    return ipv4, ipv6_high, ipv6_low, unparsable, text_size
+
+
+def radix_sort_packed(*columns: array) -> Tuple[array, ...]:
+    """
+    Numerically sorts the given packed integers with a (LSD) radix sort:
+    :py:data:`RADIX_BITS` bits at a time, from the least significant ones.
+    The integers stay packed - no Python object is kept per integer.
+
+    Multiple columns can be given to sort integers wider than 64 bits: the
+    first column holds the most significant bits.
+
+    :param columns:
+        The packed integers to sort. They are reused as buffers: their content
+        is undefined afterwards.
+    """
+
+    size = len(columns[0])
+    sources = list(columns)
+    buffers = [array(UINT64_TYPECODE, bytes(size * x.itemsize)) for x in columns]
+
+    digits_per_value = 64 // RADIX_BITS
+    radix_mask = (1 << RADIX_BITS) - 1
+
+    for column_index in reversed(range(len(sources))):
+        for digit_index in range(digits_per_value):
+            if sys.byteorder == "big":
+                digit_index = digits_per_value - 1 - digit_index
+
+            with memoryview(sources[column_index]) as view, view.cast(
+                "B"
+            ) as bytes_view, bytes_view.cast(RADIX_TYPECODE) as digits_view:
+                digits = array(
+                    RADIX_TYPECODE, digits_view[digit_index::digits_per_value].tobytes()
+                )
+
+            counts = collections.Counter(digits)
+
+            if len(counts) <= 1:
+                # All the integers share the same digit: nothing to move.
+                continue
+
+            positions = [0] * (radix_mask + 1)
+            position = 0
+
+            for digit in sorted(counts):
+                positions[digit] = position
+                position += counts[digit]
+
+            if len(sources) == 1:
+                buffer = buffers[0]
+
+                for value, digit in zip(sources[0], digits):
+                    buffer[positions[digit]] = value
+                    positions[digit] += 1
+            else:
+                for index, digit in enumerate(digits):
+                    target = positions[digit]
+                    positions[digit] += 1
+
+                    for source, buffer in zip(sources, buffers):
+                        buffer[target] = source[index]
+
+            sources, buffers = buffers, sources
+
+    return tuple(sources)
+
+
+def sort_unique_packed(*columns: array) -> Tuple[array, ...]:
+    """
+    Numerically sorts the given packed integers and removes the duplicates.
+    See :py:func:`radix_sort_packed`.
+
+    Multiple columns can be given to sort integers wider than 64 bits: the
+    first column holds the most significant bits.
+
+    :param columns:
+        The packed integers to sort. They are reused as buffers: their content
+        is undefined afterwards.
+    """
+
+    result = radix_sort_packed(*columns)
+    size = 0
+    previous = None
+
+    if len(result) == 1:
+        column = result[0]
+
+        for value in column:
+            if value != previous:
+                # We never write ahead of what we read.
+                column[size] = value
+                size += 1
+                previous = value
+    else:
+        for value in zip(*result):
+            if value != previous:
+                for column, part in zip(result, value):
+                    column[size] = part
+
+                size += 1
+                previous = value
+
+    for column in result:
+        del column[size:]
+
+    return result
+
+
+class PackedIPSet:
+    """
+    Provides the numerically sorted and unique IPs of the given files, held as
+    packed integers. The IPs are formatted back to text while iterating: IPv4
+    first, then IPv6 and finally the lines which couldn't be parsed.
+
+    :param input_files:
+        The files (or in-memory subjects) to read.
+    """
+
+    ipv4: Optional[array] = None
+    ipv6_high: Optional[array] = None
+    ipv6_low: Optional[array] = None
+    unparsable: Optional[List[str]] = None
+
+    read_count: int = 0
+    text_size: int = 0
+
+    def __init__(self, input_files: List[Union[str, Iterable[str]]]) -> None:
+        ipv4, ipv6_high, ipv6_low, unparsable, self.text_size = pack_ips(input_files)
+
+        self.read_count = len(ipv4) + len(ipv6_high) + len(unparsable)
+
+        (self.ipv4,) = sort_unique_packed(ipv4)
+        self.ipv6_high, self.ipv6_low = sort_unique_packed(ipv6_high, ipv6_low)
+        self.unparsable = sorted(set(unparsable))
+
+    def __len__(self) -> int:
+        return len(self.ipv4) + len(self.ipv6_high) + len(self.unparsable)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} entries={len(self)} bytes={self.nbytes}>"
+
+    def __iter__(self) -> Generator[str, None, None]:
+        for value in self.ipv4:
+            yield socket.inet_ntop(socket.AF_INET, value.to_bytes(4, "big"))
+
+        for high, low in zip(self.ipv6_high, self.ipv6_low):
+            yield socket.inet_ntop(
+                socket.AF_INET6, ((high << 64) | low).to_bytes(16, "big")
+            )
+
+        yield from self.unparsable
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Provides the number of bytes used by the packed IPs.
+        """
+
+        return sum(
+            x.buffer_info()[1] * x.itemsize
+            for x in (self.ipv4, self.ipv6_high, self.ipv6_low)
+        ) + sum(sys.getsizeof(x) for x in self.unparsable)
+
+
+def sort_unique_ips(file: str) -> Tuple[int, int]:
+    """
+    Numerically sorts the IPs of the given file and removes the duplicates.
+    The file is rewritten in place: IPv4 first, then IPv6 and finally the
+    lines which couldn't be parsed.
+
+    :param file:
+        The file to sort.
+
+    :return:
+        The number of read IPs and the number of written ones.
+    """
+
+    logging.info("Started sort of %r.", file)
+
+    start_time = time.perf_counter()
+
+    ips = PackedIPSet([file])
+
+    temporary_file = f"{file}.{os.getpid()}.sorting"
+
+    with open(temporary_file, "w", encoding="utf-8") as file_stream:
+        for ip in ips:
+            file_stream.write(f"{ip}\n")
+
+    os.replace(temporary_file, file)
+
+    logging.info(
+        "Finished sort of %r (read: %s, written: %s, packed: %s bytes, "
+        "as text: %s bytes, time: %.3fs).",
+        file,
+        f"{ips.read_count:,d}",
+        f"{len(ips):,d}",
+        f"{ips.nbytes:,d}",
+        f"{ips.text_size:,d}",
+        time.perf_counter() - start_time,
+    )
+
+    return ips.read_count, len(ips)
+
+
+class ProfiledFileSorterWorker(FileSorterWorker):
+    """
+    Sorts the given files - like the PyFunceble file sorter - under our
+    :py:attr:`profiler`. See :py:func:`profiling.profile`.
+    """
+
+    profiler: Optional[profiling.Profiler] = None
+
+    def target(self, consumed: Any) -> Optional[Tuple[Any, ...]]:
+        with profiling.profile(self.profiler, "sort"):
+            return super().target(consumed)
+
+
+class ProfiledFileSorterProcessesManager(FileSorterProcessesManager):
+    """
+    Provides the PyFunceble file sorter - with profiled workers.
+
+    :param profiler:
+        The profiler of our workers - if any.
+    """
+
+    WORKER_OBJ: ProfiledFileSorterWorker = ProfiledFileSorterWorker
+
+    profiler: Optional[profiling.Profiler] = None
+
+    def __init__(
+        self, *args, profiler: Optional[profiling.Profiler] = None, **kwargs
+    ) -> None:
+        self.profiler = profiler
+
+        super().__init__(*args, **kwargs)
+
+    def create(self) -> "ProfiledFileSorterProcessesManager":
+        super().create()
+
+        for worker in self._created_workers:
+            worker.profiler = self.profiler
+
+        return self
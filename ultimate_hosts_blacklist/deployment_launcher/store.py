@@ -0,0 +1,438 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides our persistent entry store: the unique entries
+of all sources along with the sources listing them, so that a single source can
+be applied without a full rebuild.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import heapq
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Generator, List, Optional, Tuple
+
+from PyFunceble.helpers.directory import DirectoryHelper
+from PyFunceble.helpers.file import FileHelper
+
+from ultimate_hosts_blacklist.deployment_launcher import delta, index, provenance
+
+FORMAT_VERSION: int = 1
+
+#: The filenames of our store.
+STATE_FILENAME: str = "store.json"
+RUN_FILENAME: str = "entries.run"
+LOG_FILENAME: str = "entries.log"
+SOURCES_DIRNAME: str = "sources"
+INFO_DIRNAME: str = "info"
+
+#: The number of logged entries (relative to the number of entries of the run)
+#: above which the log is merged into a new run.
+COMPACTION_RATIO: float = 0.1
+
+
+class EntryStore:
+    """
+    Provides our persistent entry store.
+
+    The store keeps each unique entry along with the bitset of the sources
+    listing it (its reference counts) as a sorted run - a provenance index -
+    plus a log of the changes applied since the run was written. It also keeps
+    the sorted entries of each source so that a new version of a source can be
+    diffed against the previous one.
+
+    Applying a source is then proportional to the size of that source and of
+    its changes, instead of the size of all sources.
+
+    :param directory:
+        The directory of the store.
+    """
+
+    directory: Optional[str] = None
+    info_dir: Optional[str] = None
+    sources: Optional[List[str]] = None
+
+    _run: Optional[provenance.ProvenanceIndex] = None
+    _overlay: Optional[Dict[bytes, int]] = None
+    _logged: int = 0
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.info_dir = os.path.join(directory, INFO_DIRNAME)
+
+        DirectoryHelper(os.path.join(directory, SOURCES_DIRNAME)).create()
+        DirectoryHelper(self.info_dir).create()
+
+        self.sources = []
+        self._overlay = {}
+
+        state_file = os.path.join(directory, STATE_FILENAME)
+
+        if FileHelper(state_file).exists():
+            with open(state_file, "r", encoding="utf-8") as file_stream:
+                state = json.load(file_stream)
+
+            if state["format_version"] != FORMAT_VERSION:
+                raise ValueError(
+                    f"<directory> ({directory!r}) is not a supported store."
+                )
+
+            self.sources = state["sources"]
+
+        if FileHelper(self.get_path(RUN_FILENAME)).exists():
+            self._run = provenance.ProvenanceIndex(self.get_path(RUN_FILENAME))
+
+        self.replay_log()
+
+    def __enter__(self) -> "EntryStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self) -> Generator[str, None, None]:
+        for entry, _ in self.iter_bitsets():
+            yield entry.decode("utf-8")
+
+    def __contains__(self, subject: str) -> bool:
+        return bool(self.get_bitset(index.normalize(subject)))
+
+    def close(self) -> None:
+        """
+        Closes the underlying run.
+        """
+
+        if self._run is not None:
+            self._run.close()
+            self._run = None
+
+    def get_path(self, filename: str) -> str:
+        """
+        Provides the path of the given file of the store.
+        """
+
+        return os.path.join(self.directory, filename)
+
+    def get_source_file(self, position: int) -> str:
+        """
+        Provides the path of the sorted entries of the source at the given
+        position.
+        """
+
+        return os.path.join(self.directory, SOURCES_DIRNAME, str(position))
+
+    def save_state(self) -> None:
+        """
+        Saves the state (format version and sources) of the store.
+        """
+
+        with open(self.get_path(STATE_FILENAME), "w", encoding="utf-8") as file_stream:
+            json.dump(
+                {"format_version": FORMAT_VERSION, "sources": self.sources},
+                file_stream,
+                indent=4,
+            )
+            file_stream.write("\n")
+
+    def replay_log(self) -> None:
+        """
+        Loads the changes logged since the run was written.
+        """
+
+        self._overlay = {}
+        self._logged = 0
+
+        if not FileHelper(self.get_path(LOG_FILENAME)).exists():
+            return
+
+        with open(self.get_path(LOG_FILENAME), "rb") as file_stream:
+            for line in file_stream:
+                position, entry = line.rstrip(b"\n").split(b"\t", 1)
+                marker = position[:1].decode("utf-8")
+
+                self.set_source_bit(
+                    entry, int(position[1:]), marker == delta.ADDED_MARKER
+                )
+
+    def get_bitset(self, entry: bytes) -> int:
+        """
+        Provides the current bitset of the given (normalized) entry.
+        """
+
+        if entry in self._overlay:
+            return self._overlay[entry]
+
+        if self._run is None:
+            return 0
+
+        return self._run.get_bitset(entry.decode("utf-8"))
+
+    def set_source_bit(
+        self, entry: bytes, position: int, value: bool
+    ) -> Tuple[int, int]:
+        """
+        Sets (or clears) the bit of the given source into the bitset of the
+        given (normalized) entry.
+
+        :return:
+            The previous and the new bitset.
+        """
+
+        previous = self.get_bitset(entry)
+
+        if value:
+            self._overlay[entry] = previous | (1 << position)
+        else:
+            self._overlay[entry] = previous & ~(1 << position)
+
+        self._logged += 1
+
+        return previous, self._overlay[entry]
+
+    def iter_bitsets(self) -> Generator[Tuple[bytes, int], None, None]:
+        """
+        Provides each (normalized) entry listed by at least one source along
+        with its bitset, in order.
+        """
+
+        if self._run is None:
+            run_entries = iter(())
+        else:
+            run_entries = (
+                (x, int.from_bytes(y, "little")) for x, y in self._run.iter_bitsets()
+            )
+
+        overlay_entries = iter(sorted(self._overlay.items()))
+
+        previous = None
+
+        for entry, bitset in heapq.merge(
+            overlay_entries, run_entries, key=lambda x: x[0]
+        ):
+            if entry == previous:
+                # The run version of an entry of the overlay.
+                continue
+
+            previous = entry
+
+            if entry in self._overlay:
+                bitset = self._overlay[entry]
+
+            if bitset:
+                yield entry, bitset
+
+    def rebuild(
+        self, sources: List[Tuple[str, List[str]]], *, version: str = ""
+    ) -> int:
+        """
+        Rebuilds the whole store from the given sources.
+
+        :param sources:
+            The name and the files (domains and IPs) of each source.
+        :param version:
+            The release version to store into the run.
+
+        :return:
+            The number of unique entries.
+        """
+
+        self.close()
+
+        for file in os.listdir(os.path.join(self.directory, SOURCES_DIRNAME)):
+            FileHelper(os.path.join(self.directory, SOURCES_DIRNAME, file)).delete()
+
+        self.sources = [x for x, _ in sources]
+
+        for position, (_, input_files) in enumerate(sources):
+            provenance.sort_source(input_files, self.get_source_file(position))
+
+        entries_count, _ = provenance.write_entries(
+            self.get_path(RUN_FILENAME),
+            self.sources,
+            provenance.merge_sources(
+                [self.get_source_file(x) for x in range(len(self.sources))]
+            ),
+            version=version,
+        )
+
+        FileHelper(self.get_path(LOG_FILENAME)).delete()
+        self.save_state()
+
+        self._run = provenance.ProvenanceIndex(self.get_path(RUN_FILENAME))
+        self.replay_log()
+
+        return entries_count
+
+    def apply_source(
+        self, name: str, input_files: List[str], *, version: str = ""
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Applies the new version of the given source.
+
+        The new entries of the source are diffed against the previous ones,
+        each difference is logged and applied to the bitset of its entry. The
+        log is merged into a new run once it grows too large.
+
+        :param name:
+            The name of the source. Unknown sources are added.
+        :param input_files:
+            The files (domains and IPs) of the new version of the source.
+        :param version:
+            The release version to store into the run, if compacted.
+
+        :return:
+            The entries which are now listed by our sources and the ones which
+            are not listed anymore.
+        """
+
+        start_time = time.perf_counter()
+
+        if name not in self.sources:
+            self.sources.append(name)
+            self.save_state()
+
+        position = self.sources.index(name)
+        source_file = self.get_source_file(position)
+        new_source_file = source_file + ".new"
+
+        provenance.sort_source(input_files, new_source_file)
+
+        if not FileHelper(source_file).exists():
+            FileHelper(source_file).write("", overwrite=True)
+
+        added = []
+        removed = []
+        changes = 0
+
+        with open(self.get_path(LOG_FILENAME), "ab") as log_stream:
+            for marker, entry in delta.merge_diff(
+                (x for x, _ in provenance.read_source(source_file, position)),
+                (x for x, _ in provenance.read_source(new_source_file, position)),
+            ):
+                log_stream.write(
+                    f"{marker}{position}\t".encode("utf-8") + entry + b"\n"
+                )
+                changes += 1
+
+                previous, current = self.set_source_bit(
+                    entry, position, marker == delta.ADDED_MARKER
+                )
+
+                if not previous and current:
+                    added.append(entry.decode("utf-8"))
+                elif previous and not current:
+                    removed.append(entry.decode("utf-8"))
+
+        os.replace(new_source_file, source_file)
+
+        logging.info(
+            "Applied %r to the entry store (changes: %s, added: %s, removed: %s, "
+            "time: %.3fs).",
+            name,
+            f"{changes:,d}",
+            f"{len(added):,d}",
+            f"{len(removed):,d}",
+            time.perf_counter() - start_time,
+        )
+
+        if self._run is None or self._logged > len(self._run) * COMPACTION_RATIO:
+            self.compact(version=version)
+
+        return added, removed
+
+    def compact(self, *, version: str = "") -> int:
+        """
+        Merges the log into a new run.
+
+        :param version:
+            The release version to store into the run.
+
+        :return:
+            The number of unique entries.
+        """
+
+        new_run_file = self.get_path(RUN_FILENAME) + ".new"
+
+        entries_count, _ = self.export(new_run_file, version=version)
+
+        self.close()
+        os.replace(new_run_file, self.get_path(RUN_FILENAME))
+        FileHelper(self.get_path(LOG_FILENAME)).delete()
+
+        self._run = provenance.ProvenanceIndex(self.get_path(RUN_FILENAME))
+        self.replay_log()
+
+        return entries_count
+
+    def export(self, destination: str, *, version: str = "") -> Tuple[int, int]:
+        """
+        Writes the current state of the store as a provenance index.
+
+        :param destination:
+            The file to write.
+        :param version:
+            The release version to store into the header.
+
+        :return:
+            The number of indexed entries and the number of written bytes.
+        """
+
+        return provenance.write_entries(
+            destination, self.sources, self.iter_bitsets(), version=version
+        )
+
+    def save_info(self, info_dir: str) -> None:
+        """
+        Saves the given info files of our sources.
+
+        :param info_dir:
+            The directory containing the info files to save.
+        """
+
+        for file in os.listdir(info_dir):
+            shutil.copy(os.path.join(info_dir, file), os.path.join(self.info_dir, file))
+
+    def load_info(self, info_dir: str) -> None:
+        """
+        Copies the saved info files of our sources into the given directory,
+        without overwriting the ones already there.
+
+        :param info_dir:
+            The directory to copy the info files into.
+        """
+
+        for file in os.listdir(self.info_dir):
+            if not FileHelper(os.path.join(info_dir, file)).exists():
+                shutil.copy(
+                    os.path.join(self.info_dir, file), os.path.join(info_dir, file)
+                )
@@ -0,0 +1,416 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+Provides the performance telemetry of our runs: what each stage - and the
+fetching of each source - cost.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+from ultimate_hosts_blacklist.deployment_launcher import segment
+
+try:
+    import resource
+except ImportError:
+    # Not available under Windows.
+    resource = None
+
+#: The interval (in seconds) between two samples of our memory usage.
+RSS_SAMPLING_INTERVAL: float = 0.25
+
+#: The number of bytes we read at once while counting the lines of a file.
+COUNT_SIZE: int = 1024 * 1024
+
+#: The counters of the data read and written by a stage - or a source.
+COUNTERS: List[str] = ["bytes_in", "bytes_out", "entries_in", "entries_out"]
+
+#: The number of sources listed - as the slowest ones - at the end of a run.
+SLOWEST_SOURCES_COUNT: int = 5
+
+#: The prefix of our Prometheus metrics.
+METRICS_PREFIX: str = "uhb"
+
+#: The Prometheus metrics of a record (stage or source) along with their
+#: description.
+METRICS: Dict[str, Tuple[str, str]] = {
+    "wall_time": ("wall_seconds", "Wall time"),
+    "cpu_time": ("cpu_seconds", "CPU time of the process"),
+    "children_cpu_time": (
+        "children_cpu_seconds",
+        "CPU time of the terminated child processes",
+    ),
+    "peak_rss": ("peak_rss_bytes", "Peak resident memory"),
+    "peak_disk_usage": ("peak_disk_usage_bytes", "Peak disk usage of the workspace"),
+    "bytes_in": ("in_bytes", "Bytes read"),
+    "bytes_out": ("out_bytes", "Bytes written"),
+    "entries_in": ("in_entries", "Entries read"),
+    "entries_out": ("out_entries", "Entries written"),
+}
+
+
+def get_rss() -> int:
+    """
+    Provides the current resident memory (in bytes) of the current process.
+    """
+
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as file_stream:
+            return int(file_stream.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return get_peak_rss()
+
+
+def get_peak_rss() -> int:
+    """
+    Provides the peak resident memory (in bytes) of the current process.
+    """
+
+    if resource is None:
+        return 0
+
+    # Given in kilobytes - except under macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_children_cpu_time() -> float:
+    """
+    Provides the CPU time (in seconds) of the terminated child processes.
+    """
+
+    if resource is None:
+        return 0.0
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    return usage.ru_utime + usage.ru_stime
+
+
+def count_lines(file: str) -> int:
+    """
+    Counts the lines of the given file.
+    """
+
+    result = 0
+    last_block = b"\n"
+
+    with open(file, "rb") as file_stream:
+        for block in iter(lambda: file_stream.read(COUNT_SIZE), b""):
+            result += block.count(b"\n")
+            last_block = block
+
+    if not last_block.endswith(b"\n"):
+        result += 1
+
+    return result
+
+
+def create_record() -> Dict[str, Any]:
+    """
+    Creates an empty record.
+    """
+
+    return {
+        "wall_time": 0.0,
+        "cpu_time": 0.0,
+        "children_cpu_time": 0.0,
+        "peak_rss": 0,
+        **{x: 0 for x in COUNTERS},
+    }
+
+
+class Telemetry:
+    """
+    Records the performance of a run: the wall time, the CPU time, the peak
+    resident memory and the volume of data read and written by each of its
+    stages - and by the fetching of each source.
+    """
+
+    started_at: Optional[float] = None
+    stages: Dict[str, Dict[str, Any]] = dict()
+    sources: Dict[str, Dict[str, Any]] = dict()
+
+    _volumes: Dict[Tuple[Any, ...], Tuple[int, int]] = dict()
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.stages = {}
+        self.sources = {}
+
+        self._volumes = {}
+
+    def get_volume(self, items: Iterable[Any]) -> Tuple[int, int]:
+        """
+        Provides the number of bytes and of entries of the given files or
+        in-memory datasets.
+        """
+
+        size = entries = 0
+
+        for item in items:
+            if isinstance(item, str):
+                try:
+                    stat = os.stat(item)
+                except OSError:
+                    continue
+
+                key = (item, stat.st_size, stat.st_mtime_ns)
+
+                if key not in self._volumes:
+                    self._volumes[key] = (stat.st_size, count_lines(item))
+
+                size += self._volumes[key][0]
+                entries += self._volumes[key][1]
+            elif isinstance(item, segment.LineSegment):
+                size += item.size
+                entries += sum(1 for _ in item)
+            elif hasattr(item, "__len__"):
+                size += getattr(item, "nbytes", 0)
+                entries += len(item)
+
+        return size, entries
+
+    @contextlib.contextmanager
+    def measure(
+        self,
+        stage: str,
+        *,
+        inputs: Iterable[Any] = (),
+        outputs: Optional[Callable[[], Iterable[Any]]] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Measures the given stage. See :py:attr:`stages`.
+
+        The given record can be completed by the stage itself.
+
+        :param stage:
+            The name of the stage.
+        :param inputs:
+            The files or datasets read by the stage.
+        :param outputs:
+            Provides the files or datasets written by the stage - once it is
+            over.
+        """
+
+        record = create_record()
+        record["bytes_in"], record["entries_in"] = self.get_volume(inputs)
+
+        peak_rss = [get_rss()]
+        stopped = threading.Event()
+
+        def sample() -> None:
+            while not stopped.wait(RSS_SAMPLING_INTERVAL):
+                peak_rss[0] = max(peak_rss[0], get_rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        start_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        start_children_cpu_time = get_children_cpu_time()
+
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - start_time
+            record["cpu_time"] = time.process_time() - start_cpu_time
+            record["children_cpu_time"] = (
+                get_children_cpu_time() - start_children_cpu_time
+            )
+
+            stopped.set()
+            sampler.join()
+
+            record["peak_rss"] = max(peak_rss[0], get_rss())
+
+            self.stages[stage] = record
+
+        if outputs is not None:
+            record["bytes_out"], record["entries_out"] = self.get_volume(outputs())
+
+    def add_source(self, name: str, record: Dict[str, Any]) -> None:
+        """
+        Records the fetching of the given source. See :py:attr:`sources`.
+        """
+
+        self.sources[name] = record
+
+    def sum_sources(self) -> Dict[str, int]:
+        """
+        Provides the total of the counters of our sources.
+        """
+
+        return {x: sum(y.get(x, 0) for y in self.sources.values()) for x in COUNTERS}
+
+    def get_report(self, **extra) -> Dict[str, Any]:
+        """
+        Provides the report of our run.
+
+        :param extra:
+            The extra data to report - at the top level.
+        """
+
+        return {
+            **extra,
+            "started_at": datetime.fromtimestamp(
+                self.started_at, timezone.utc
+            ).isoformat(),
+            "duration": time.time() - self.started_at,
+            "peak_rss": get_peak_rss(),
+            "stages": self.stages,
+            "sources": dict(sorted(self.sources.items())),
+        }
+
+
+def log_report(report: Dict[str, Any]) -> None:
+    """
+    Logs a summary of the given report: the cost of each stage and the
+    slowest sources.
+    """
+
+    for stage, record in report["stages"].items():
+        logging.info(
+            "[%s] Time: %.3fs (CPU: %.3fs + %.3fs in children), peak RSS: %s "
+            "bytes, peak disk usage: %s bytes, in: %s entries (%s bytes), out: %s "
+            "entries (%s bytes).",
+            stage,
+            record["wall_time"],
+            record["cpu_time"],
+            record["children_cpu_time"],
+            f"{record['peak_rss']:,d}",
+            f"{record.get('peak_disk_usage', 0):,d}",
+            f"{record['entries_in']:,d}",
+            f"{record['bytes_in']:,d}",
+            f"{record['entries_out']:,d}",
+            f"{record['bytes_out']:,d}",
+        )
+
+    slowest = sorted(
+        report["sources"].items(), key=lambda x: x[1]["wall_time"], reverse=True
+    )
+
+    for source, record in slowest[:SLOWEST_SOURCES_COUNT]:
+        logging.info(
+            "Slow source %r: %.3fs (CPU: %.3fs, in: %s entries, out: %s entries).",
+            source,
+            record["wall_time"],
+            record["cpu_time"],
+            f"{record['entries_in']:,d}",
+            f"{record['entries_out']:,d}",
+        )
+
+
+def write_json(report: Dict[str, Any], destination: str) -> None:
+    """
+    Writes the given report as JSON.
+    """
+
+    directory = os.path.dirname(destination)
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(destination + ".tmp", "w", encoding="utf-8") as file_stream:
+        json.dump(report, file_stream, indent=4)
+        file_stream.write("\n")
+
+    os.replace(destination + ".tmp", destination)
+
+
+def escape_label(value: str) -> str:
+    """
+    Escapes the given Prometheus label value.
+    """
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_prometheus(report: Dict[str, Any], destination: str) -> None:
+    """
+    Writes the given report as a Prometheus textfile - for the textfile
+    collector of the node exporter.
+    """
+
+    lines = [
+        f"# HELP {METRICS_PREFIX}_run_duration_seconds Duration of the latest run.",
+        f"# TYPE {METRICS_PREFIX}_run_duration_seconds gauge",
+        f"{METRICS_PREFIX}_run_duration_seconds {report['duration']}",
+        f"# HELP {METRICS_PREFIX}_run_peak_rss_bytes Peak resident memory of the "
+        "latest run.",
+        f"# TYPE {METRICS_PREFIX}_run_peak_rss_bytes gauge",
+        f"{METRICS_PREFIX}_run_peak_rss_bytes {report['peak_rss']}",
+        f"# HELP {METRICS_PREFIX}_run_timestamp_seconds End of the latest run.",
+        f"# TYPE {METRICS_PREFIX}_run_timestamp_seconds gauge",
+        f"{METRICS_PREFIX}_run_timestamp_seconds {time.time()}",
+    ]
+
+    if "version" in report:
+        lines += [
+            f"# HELP {METRICS_PREFIX}_run_info Version of the latest run.",
+            f"# TYPE {METRICS_PREFIX}_run_info gauge",
+            f'{METRICS_PREFIX}_run_info{{version="{escape_label(report["version"])}"}} 1',
+        ]
+
+    for kind in ("stage", "source"):
+        records = report[f"{kind}s"]
+
+        for key, (metric, description) in METRICS.items():
+            if not any(key in x for x in records.values()):
+                continue
+
+            name = f"{METRICS_PREFIX}_{kind}_{metric}"
+
+            lines.append(
+                f"# HELP {name} {description} of each {kind} of the latest run."
+            )
+            lines.append(f"# TYPE {name} gauge")
+
+            for record_name, record in records.items():
+                if key in record:
+                    lines.append(
+                        f'{name}{{{kind}="{escape_label(record_name)}"}} {record[key]}'
+                    )
+
+    directory = os.path.dirname(destination)
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(destination + ".tmp", "w", encoding="utf-8") as file_stream:
+        file_stream.write("\n".join(lines) + "\n")
+
+    os.replace(destination + ".tmp", destination)
@@ -0,0 +1,453 @@
+"""
+The deployment launcher of the Ultimate Hosts Blacklist project.
+
+This is the module that provides our persistent run workspace: the checkpoints
+which let us resume a failed run.
+
+License:
+::
+
+
+    MIT License
+
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Ultimate-Hosts-Blacklist Contributors
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025 Nissar Chababy - @funilrys
+    Copyright (c) 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024 Mitchell Krog - @mitchellkrogza
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import concurrent.futures
+import contextlib
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from datetime import datetime, timezone
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple
+
+from PyFunceble.helpers.directory import DirectoryHelper
+from PyFunceble.helpers.file import FileHelper
+
+from ultimate_hosts_blacklist.deployment_launcher import generator
+
+FORMAT_VERSION: int = 1
+
+#: The filenames of our workspace.
+STATE_FILENAME: str = "stages.json"
+FILES_DIRNAME: str = "files"
+INFO_DIRNAME: str = "info"
+HOT_DIRNAME: str = "hot"
+
+#: The interval (in seconds) between two samples of the disk usage.
+USAGE_SAMPLING_INTERVAL: float = 0.25
+
+#: The stages of a run, in order.
+FETCHED_STAGE: str = "fetched"
+MERGED_STAGE: str = "merged"
+SORTED_STAGE: str = "sorted"
+GENERATED_STAGE: str = "generated"
+DEPLOYED_STAGE: str = "deployed"
+
+
+def get_usage(directory: str) -> int:
+    """
+    Provides the size (in bytes) of the files under the given directory.
+    """
+
+    result = 0
+
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return result
+
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                result += get_usage(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                result += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            # Deleted in the meantime.
+            continue
+
+    return result
+
+
+def remove_directories(*directories: str) -> None:
+    """
+    Removes the given directories along with their content.
+    """
+
+    for directory in directories:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class Workspace:
+    """
+    Provides the workspace of a run: it owns the intermediate files of each
+    stage, accounts for the disk space they use and cleans them up.
+
+    A persistent workspace also keeps a manifest of the completed stages.
+    Each completed stage records the key of its inputs - which chains the key
+    and the output hashes of the previous stage with its own options - along
+    with the SHA-256 of its output files. A stage is then skipped when its
+    inputs are unchanged and its outputs are still intact.
+
+    :param directory:
+        The directory of a persistent workspace. Defaults to a temporary
+        directory which is removed once the run is over.
+    :param resume:
+        Keeps the completed stages of the previous run. Otherwise, the
+        workspace is emptied.
+    :param hot_dir:
+        The directory - ideally a tmpfs (e.g. :code:`/dev/shm`) - to write
+        the short-lived intermediate files (the downloaded sources) into.
+        Defaults to a subdirectory of the workspace. It is always removed
+        once the run is over.
+    :param quota:
+        The maximal number of bytes our intermediate files can use.
+        :code:`0` means that the usage is not limited.
+    """
+
+    directory: Optional[str] = None
+    persistent: Optional[bool] = None
+    files_dir: Optional[str] = None
+    info_dir: Optional[str] = None
+    hot_dir: Optional[str] = None
+    quota: Optional[int] = None
+    state: Optional[Dict[str, Any]] = None
+    peak_usage: Dict[str, int] = dict()
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        *,
+        resume: bool = False,
+        hot_dir: Optional[str] = None,
+        quota: int = 0,
+    ) -> None:
+        self.persistent = directory is not None
+
+        if self.persistent:
+            DirectoryHelper(directory).create()
+        else:
+            directory = tempfile.mkdtemp(prefix="uhb-workspace-")
+
+        self.directory = directory
+        self.files_dir = os.path.join(directory, FILES_DIRNAME)
+        self.info_dir = os.path.join(directory, INFO_DIRNAME)
+        self.quota = quota
+        self.state = {"format_version": FORMAT_VERSION, "stages": {}}
+        self.peak_usage = {}
+
+        if hot_dir:
+            DirectoryHelper(hot_dir).create()
+            self.hot_dir = tempfile.mkdtemp(prefix="uhb-hot-", dir=hot_dir)
+        else:
+            self.hot_dir = os.path.join(directory, HOT_DIRNAME)
+
+        if self.persistent:
+            self._finalizer = weakref.finalize(self, remove_directories, self.hot_dir)
+        else:
+            self._finalizer = weakref.finalize(
+                self, remove_directories, self.hot_dir, self.directory
+            )
+
+        state_file = os.path.join(directory, STATE_FILENAME)
+
+        if resume and FileHelper(state_file).exists():
+            with open(state_file, "r", encoding="utf-8") as file_stream:
+                try:
+                    state = json.load(file_stream)
+                except json.decoder.JSONDecodeError:
+                    logging.critical("Could not decode (workspace): %s", state_file)
+                    state = {}
+
+            if state.get("format_version") == FORMAT_VERSION:
+                self.state = state
+        else:
+            self.clear()
+
+        DirectoryHelper(self.files_dir).create()
+        DirectoryHelper(self.info_dir).create()
+        DirectoryHelper(self.hot_dir).create()
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Cleans our workspace up: the hot directory is removed - along with the
+        whole workspace if it is not persistent.
+        """
+
+        self._finalizer()
+
+    def clear(self) -> None:
+        """
+        Empties the workspace.
+        """
+
+        self.state["stages"] = {}
+
+        remove_directories(self.files_dir, self.info_dir, self.hot_dir)
+        FileHelper(os.path.join(self.directory, STATE_FILENAME)).delete()
+
+    def prune(self) -> None:
+        """
+        Deletes the intermediate files but keeps the manifest of the completed
+        stages.
+        """
+
+        remove_directories(self.files_dir, self.info_dir, self.hot_dir)
+
+    def create_file(self, prefix: str = "", *, hot: bool = False) -> str:
+        """
+        Creates a new (empty) intermediate file.
+
+        :param prefix:
+            The prefix of the name of the file.
+        :param hot:
+            Creates the file into our hot directory.
+
+        :return:
+            The path of the created file.
+        """
+
+        directory = self.hot_dir if hot else self.files_dir
+
+        DirectoryHelper(directory).create()
+
+        file_descriptor, file_path = tempfile.mkstemp(prefix=prefix, dir=directory)
+        os.close(file_descriptor)
+
+        return file_path
+
+    def get_usage(self) -> int:
+        """
+        Provides the number of bytes currently used by our intermediate files.
+        """
+
+        result = get_usage(self.directory)
+
+        if not self.hot_dir.startswith(self.directory + os.sep):
+            result += get_usage(self.hot_dir)
+
+        return result
+
+    def check_quota(self, usage: Optional[int] = None) -> None:
+        """
+        Checks that our intermediate files do not exceed our quota.
+
+        :param usage:
+            The usage to check. Defaults to the current one.
+
+        :raise OSError:
+            When the quota is exceeded.
+        """
+
+        if not self.quota:
+            return
+
+        if usage is None:
+            usage = self.get_usage()
+
+        if usage > self.quota:
+            raise OSError(
+                errno.EDQUOT,
+                f"{os.strerror(errno.EDQUOT)} ({usage:,d} bytes used, "
+                f"quota: {self.quota:,d} bytes)",
+                self.directory,
+            )
+
+    @contextlib.contextmanager
+    def track(self, stage: str) -> Generator[None, None, None]:
+        """
+        Tracks the peak disk usage of the given stage - sampled by a
+        background thread - and checks our quota once the stage is over.
+        See :py:attr:`peak_usage`.
+
+        :param stage:
+            The name of the stage.
+        """
+
+        peak = [self.get_usage()]
+        stopped = threading.Event()
+
+        def sample() -> None:
+            while not stopped.wait(USAGE_SAMPLING_INTERVAL):
+                peak[0] = max(peak[0], self.get_usage())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        try:
+            yield
+        finally:
+            stopped.set()
+            sampler.join()
+
+            peak[0] = max(peak[0], self.get_usage())
+            self.peak_usage[stage] = max(self.peak_usage.get(stage, 0), peak[0])
+
+        self.check_quota(peak[0])
+
+    def save(self) -> None:
+        """
+        Atomically saves the manifest of the completed stages.
+        """
+
+        state_file = os.path.join(self.directory, STATE_FILENAME)
+
+        with open(state_file + ".tmp", "w", encoding="utf-8") as file_stream:
+            json.dump(self.state, file_stream, indent=4)
+            file_stream.write("\n")
+
+        os.replace(state_file + ".tmp", state_file)
+
+    def get_inputs_key(
+        self, stage: str, previous_stage: Optional[str] = None, **options
+    ) -> str:
+        """
+        Provides the key of the inputs of the given stage.
+
+        :param stage:
+            The stage to describe.
+        :param previous_stage:
+            The stage whose outputs are the inputs of the given stage.
+        :param options:
+            The options which affect the outputs of the given stage.
+        """
+
+        previous = self.state["stages"].get(previous_stage, {})
+
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "stage": stage,
+                    "previous_inputs": previous.get("inputs"),
+                    "previous_hashes": previous.get("hashes"),
+                    "previous_data": previous.get("data"),
+                    "options": options,
+                },
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def is_intact(self, stage: str) -> bool:
+        """
+        Checks whether the output files of the given (completed) stage are
+        still intact.
+        """
+
+        for file, file_hash in self.state["stages"][stage]["hashes"].items():
+            if not os.path.isfile(file) or generator.get_file_hash(file) != file_hash:
+                logging.info("Checkpoint of %r: %r changed.", stage, file)
+                return False
+
+        return True
+
+    def get_resume_point(
+        self, stages: List[Tuple[str, Dict[str, Any]]]
+    ) -> Optional[str]:
+        """
+        Provides the latest stage we can resume after: the latest one whose
+        inputs - and the ones of all the stages before it - are unchanged and
+        whose outputs are still intact.
+
+        :param stages:
+            The stages of the run - in order - along with their options. See
+            :py:meth:`get_inputs_key`.
+
+        :return:
+            :py:data:`None` when we have to start from the beginning.
+        """
+
+        completed = []
+        previous_stage = None
+
+        for stage, options in stages:
+            record = self.state["stages"].get(stage)
+
+            if not record or record["inputs"] != self.get_inputs_key(
+                stage, previous_stage, **options
+            ):
+                break
+
+            completed.append(stage)
+            previous_stage = stage
+
+        for stage in reversed(completed):
+            if self.is_intact(stage):
+                return stage
+
+        return None
+
+    def complete(
+        self,
+        stage: str,
+        inputs_key: str,
+        *,
+        files: Iterable[str] = (),
+        data: Any = None,
+    ) -> None:
+        """
+        Records the completion of the given stage.
+
+        :param stage:
+            The completed stage.
+        :param inputs_key:
+            The key of its inputs. See :py:meth:`get_inputs_key`.
+        :param files:
+            Its output files - which are hashed by a pool of threads.
+        :param data:
+            Its (JSON serializable) outputs.
+        """
+
+        files = sorted(set(files))
+
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            hashes = dict(zip(files, executor.map(generator.get_file_hash, files)))
+
+        self.state["stages"][stage] = {
+            "inputs": inputs_key,
+            "hashes": hashes,
+            "data": data,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.save()
+
+        logging.info("Checkpoint of %r saved (files: %d).", stage, len(files))
+
+    def get_data(self, stage: str) -> Any:
+        """
+        Provides the (JSON serializable) outputs of the given completed stage.
+        """
+
+        return self.state["stages"][stage]["data"]